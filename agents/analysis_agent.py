@@ -4,6 +4,9 @@ import json
 import re
 from typing import Any
 
+from agents.llm_client import GeminiLLM
+
+
 class ConfigurationIdentifierTool(BaseTool):
     name: str = "MOSFET Configuration Identifierv "
     description: str = """
@@ -243,22 +246,6 @@ class CompleteCircuitAnalysisTool(BaseTool):
         return json.dumps(final_result, indent=4)
 
 
-# LLM client - simplified
-
-class GeminiLLM:
-    def __init__(self, model_name="gemini/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
-
 # Initialize the custom LLM for CrewAI
 llm = GeminiLLM()
 
@@ -0,0 +1,142 @@
+"""
+Vectorized DC operating-point solver for voltage-divider-biased NMOS stages.
+
+Every argument may be a scalar or a NumPy array; they broadcast against each other, so
+a single call solves thousands of candidate designs. The Level-1 (square-law) model
+with channel-length modulation is used:
+
+    saturation: I_D = k_n / 2 * V_ov^2 * (1 + λ V_DS)
+    triode:     I_D = k_n * (V_ov - V_DS / 2) * V_DS * (1 + λ V_DS)
+
+with k_n = K_p * W / L. The λ = 0 saturation solution is closed form and seeds a
+vectorized Newton iteration; designs that land in triode are re-solved with the
+triode equation.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+CUTOFF = 0
+TRIODE = 1
+SATURATION = 2
+
+
+def _newton(f_and_slope, i_d, lower, upper, iterations, tol):
+    converged = np.zeros(i_d.shape, dtype=bool)
+    for _ in range(iterations):
+        f, slope = f_and_slope(i_d)
+        step = f / np.where(slope == 0, 1.0, slope)
+        i_d = np.clip(i_d - step, lower, upper)
+        converged = np.abs(step) <= tol * np.maximum(np.abs(i_d), 1e-15)
+        if converged.all():
+            break
+    return i_d, converged
+
+
+def solve_bias(
+    vdd,
+    r1,
+    r2,
+    rd,
+    rs,
+    vth=0.7,
+    kn=500e-6,
+    lam=0.02,
+    iterations: int = 30,
+    tol: float = 1e-12,
+) -> Dict[str, np.ndarray]:
+    """
+    Solve the DC bias point of a batch of NMOS stages.
+
+    Args:
+        vdd: Supply voltage(s).
+        r1: Upper divider resistor(s), VDD to gate.
+        r2: Lower divider resistor(s), gate to ground.
+        rd: Drain resistor(s); 0 for a drain tied to VDD (source follower).
+        rs: Source resistor(s).
+        vth: Threshold voltage(s).
+        kn: Device transconductance parameter(s) K_p * W / L in A/V².
+        lam: Channel-length modulation in 1/V.
+        iterations (int, optional): Newton iteration limit.
+        tol (float, optional): Relative convergence tolerance on I_D.
+
+    Returns:
+        Dict[str, np.ndarray]: Broadcast arrays of I_D, the node voltages, V_GS, V_DS,
+        V_ov, g_m, r_o, a region code per design (CUTOFF, TRIODE or SATURATION), and
+        a converged flag.
+    """
+    vdd, r1, r2, rd, rs, vth, kn, lam = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (vdd, r1, r2, rd, rs, vth, kn, lam))
+    )
+    r_total = rd + rs
+    vg = vdd * r2 / (r1 + r2)
+    vgt = vg - vth
+    on = vgt > 0
+    i_max = np.where(r_total > 0, vdd / np.where(r_total > 0, r_total, 1.0), np.inf)
+
+    # λ = 0 closed form: (k_n R_S / 2) V_ov² + V_ov - V_GT = 0, written to stay finite at R_S = 0
+    a = 0.5 * kn * rs
+    vov0 = np.where(on, 2 * vgt / (1 + np.sqrt(1 + 4 * a * np.maximum(vgt, 0))), 0.0)
+    i_sat = np.minimum(0.5 * kn * vov0 ** 2, i_max)
+
+    def saturation(i_d):
+        vov = vgt - i_d * rs
+        vds = vdd - i_d * r_total
+        h = 1 + lam * vds
+        f = i_d - 0.5 * kn * vov ** 2 * h
+        slope = 1 + kn * vov * rs * h + 0.5 * kn * vov ** 2 * lam * r_total
+        return f, slope
+
+    i_d, converged = _newton(saturation, i_sat, 0.0, i_max, iterations, tol)
+    vov = vgt - i_d * rs
+    vds = vdd - i_d * r_total
+    triode = on & (vds < vov)
+
+    if triode.any():
+        def triode_equation(i_d):
+            vov = vgt - i_d * rs
+            vds = vdd - i_d * r_total
+            g = (vov - vds / 2) * vds
+            h = 1 + lam * vds
+            f = i_d - kn * g * h
+            dg = -rs * vds - r_total * (vov - vds)
+            slope = 1 - kn * (dg * h - g * lam * r_total)
+            return f, slope
+
+        i_tri, converged_tri = _newton(triode_equation, np.minimum(i_d, i_max), 0.0, i_max, iterations, tol)
+        i_d = np.where(triode, i_tri, i_d)
+        converged = np.where(triode, converged_tri, converged)
+
+    i_d = np.where(on, i_d, 0.0)
+    vs = i_d * rs
+    vd = vdd - i_d * rd
+    vds = vd - vs
+    vov = np.where(on, vg - vs - vth, 0.0)
+    region = np.where(~on, CUTOFF, np.where(vds < vov, TRIODE, SATURATION)).astype(np.int8)
+
+    h = 1 + lam * vds
+    gm = np.where(region == SATURATION, kn * vov * h, np.where(region == TRIODE, kn * vds * h, 0.0))
+    gds = np.where(
+        region == SATURATION,
+        0.5 * kn * vov ** 2 * lam,
+        np.where(region == TRIODE, kn * ((vov - vds) * h + (vov - vds / 2) * vds * lam), 0.0),
+    )
+    with np.errstate(divide="ignore"):
+        ro = np.where(gds > 0, 1 / np.where(gds > 0, gds, 1.0), np.inf)
+
+    return {
+        "I_D": i_d,
+        "V_G": vg,
+        "V_S": vs,
+        "V_D": vd,
+        "V_GS": vg - vs,
+        "V_DS": vds,
+        "V_ov": vov,
+        "g_m": gm,
+        "r_o": ro,
+        "region": region,
+        "saturated": region == SATURATION,
+        "converged": converged | ~on,
+    }
@@ -3,25 +3,9 @@ from crewai.tools import BaseTool
 import os
 from typing import Dict, Any
 
-import litellm
-
-
-
-
-class GeminiLLM:
-    def __init__(self, model_name="gemini/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
-
+from agents.llm_client import GeminiLLM
+from agents.eseries import CAPACITOR_RANGE, snap, snap_divider
+from agents.component_db import get_component_db
 
 
 # Initialize the custom LLM for CrewAI
@@ -252,7 +236,9 @@ class ComponentIdentificationTool(BaseTool):
         Identifies required components based on the circuit analysis.
         
         Args:
-            circuit_analysis: Dictionary containing circuit analysis results
+            circuit_analysis: Dictionary containing circuit analysis results. Optional
+                "component_values" (name to calculated value), "supply_voltage" and "mosfet"
+                ({"vth": ..., "kp": ...}) add concrete part candidates from the catalog.
             
         Returns:
             Dictionary with required components and their naming conventions
@@ -265,20 +251,121 @@ class ComponentIdentificationTool(BaseTool):
             # Check if it has source resistor
             is_rs_present = "with Rs" in circuit_type
             cs_tool = CommonSourceComponentTool()
-            return cs_tool._run(is_rs_present)
+            components = cs_tool._run(is_rs_present)
             
         elif "Common Drain (CD)" in circuit_type or "Source Follower" in circuit_type:
             cd_tool = CommonDrainComponentTool()
-            return cd_tool._run()
+            components = cd_tool._run()
             
         elif "Common Gate (CG)" in circuit_type:
             cg_tool = CommonGateComponentTool()
-            return cg_tool._run()
+            components = cg_tool._run()
             
         else:
             # Default to common source without Rs as fallback
             cs_tool = CommonSourceComponentTool()
-            return cs_tool._run(False)
+            components = cs_tool._run(False)
+
+        if circuit_analysis.get("component_values") or circuit_analysis.get("mosfet"):
+            components["part_candidates"] = find_part_candidates(
+                circuit_analysis.get("component_values", {}),
+                circuit_analysis.get("supply_voltage"),
+                circuit_analysis.get("mosfet"),
+            )
+        return components
+
+
+def find_part_candidates(values: Dict[str, Any], vdd: float = None, mosfet: Dict[str, float] = None) -> Dict[str, Any]:
+    """Helper function to look up catalog parts for calculated component values"""
+    db = get_component_db()
+    candidates = {}
+    for name, value in values.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+            continue
+        if name.upper().startswith("R"):
+            candidates[name] = db.find_resistors(value, max_tolerance=0.05)
+        elif name.upper().startswith("C"):
+            # Leave headroom over the supply for the voltage rating
+            candidates[name] = db.find_capacitors(value, min_voltage=1.5 * vdd if vdd else None)
+    if mosfet:
+        candidates["M1"] = db.find_mosfets(
+            channel=mosfet.get("channel", "N"),
+            vth=mosfet.get("vth"),
+            min_kp=mosfet.get("kp"),
+            min_vds=vdd,
+        )
+    return candidates
+
+
+class StandardValueTool(BaseTool):
+    name: str = "Standard Value Snapping Tool"
+    description: str = ("Snaps calculated resistor and capacitor values to purchasable E-series parts "
+                        "(E6, E12, E24, E48, E96). R1/R2 gate dividers are chosen as a pair that preserves "
+                        "the bias voltage.")
+
+    def _run(self, design: Dict) -> Dict:
+        """
+        Snaps calculated component values to standard parts.
+
+        Args:
+            design: Dictionary with "values" (component name to calculated value; names starting
+                with R are resistors, C capacitors), optional "resistor_series" (default E24),
+                "capacitor_series" (default E12) and "vdd".
+
+        Returns:
+            Dictionary with the standard value, calculated value and error of each component
+        """
+        values = design.get("values", {})
+        resistor_series = design.get("resistor_series", "E24")
+        capacitor_series = design.get("capacitor_series", "E12")
+        try:
+            return standard_value_table(values, resistor_series, capacitor_series, design.get("vdd"))
+        except ValueError as e:
+            return {"error": str(e)}
+
+
+def standard_value_table(
+    values: Dict[str, Any],
+    resistor_series: str = "E24",
+    capacitor_series: str = "E12",
+    vdd: float = None,
+) -> Dict[str, Any]:
+    """Helper function to snap named component values, keeping R1/R2 as a ratio-preserving pair"""
+    numeric = {name: float(value) for name, value in values.items()
+               if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0}
+    resistors = [name for name in numeric if name.upper().startswith("R")]
+    capacitors = [name for name in numeric if name.upper().startswith("C")]
+
+    snapped = {}
+    if resistors:
+        for name, value in zip(resistors, snap([numeric[n] for n in resistors], resistor_series)):
+            snapped[name] = float(value)
+    if capacitors:
+        for name, value in zip(capacitors, snap([numeric[n] for n in capacitors], capacitor_series, *CAPACITOR_RANGE)):
+            snapped[name] = float(value)
+
+    divider = None
+    if "R1" in numeric and "R2" in numeric:
+        pair = snap_divider(numeric["R1"], numeric["R2"], resistor_series, vdd=vdd)
+        snapped["R1"], snapped["R2"] = float(pair["R1"]), float(pair["R2"])
+        divider = {"ratio": float(pair["ratio"]), "ratio_error": float(pair["ratio_error"])}
+        if vdd is not None:
+            divider["V_G"] = float(pair["V_G"])
+
+    components = {
+        name: {
+            "calculated": numeric[name],
+            "standard": value,
+            "error_percent": round((value / numeric[name] - 1) * 100, 3),
+        }
+        for name, value in snapped.items()
+    }
+    return {
+        "resistor_series": resistor_series,
+        "capacitor_series": capacitor_series,
+        "components": components,
+        "divider": divider,
+    }
 
 
 # Create the Component Identification Specialist agent
@@ -288,7 +375,7 @@ component_selection_specialist = Agent(
     backstory="You're an expert in MOSFET circuit design with decades of experience in identifying the required components for different amplifier topologies. Your specialty lies in understanding the standard naming conventions and component requirements for common source, common drain, and common gate configurations with various biasing arrangements.",
     allow_delegation=False,
     verbose=True,
-    tools=[ComponentIdentificationTool()],
+    tools=[ComponentIdentificationTool(), StandardValueTool()],
     llm=llm
 )
 
@@ -299,7 +386,9 @@ component_selection_task = Task(
         "2. Identify the MOSFET configuration (Common Source, Common Drain, Common Gate).\n"
         "3. Determine all required components for the identified configuration with standard naming conventions.\n"
         "4. Assume voltage divider bias if no specific biasing is mentioned in the analysis.\n"
-        "5. Generate a complete list of required components without assigning specific values."
+        "5. Generate a complete list of required components without assigning specific values.\n"
+        "6. Where the previous agents already calculated values, use the Standard Value Snapping Tool "
+        "to report the nearest purchasable E-series parts."
     ),
     expected_output="A JSON format response containing the circuit configuration, bias type, description, and a complete list of required components with standard naming conventions organized by component type (active components, resistors, capacitors, voltage sources). and also include that values for the components that are recieved from the previous agents(i.e the specifications which are mentioned in the user propmpt)..final meaning is combining the both agents responses but in well structured format.. in json format..",
     agent=component_selection_specialist
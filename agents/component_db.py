@@ -0,0 +1,318 @@
+"""
+Local catalog of purchasable resistors, capacitors and discrete MOSFETs.
+
+Parts live in a SQLite file with indexes on the columns part selection filters on
+(value, tolerance, power / voltage rating, Vth, Kp), so a candidate query is an index
+range scan that returns in well under a millisecond even for catalogs of 100k+ parts.
+Vendor CSV dumps are bulk-imported in a single transaction with the indexes rebuilt
+afterwards. The catalog path is taken from CIRCUIT_COMPONENT_DB (default under
+~/.cache/circuit_maker); a new catalog is seeded with generic E-series passives.
+"""
+
+import csv
+import math
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Union
+
+from agents.cache import DEFAULT_CACHE_DIR
+from agents.eseries import CAPACITOR_RANGE, RESISTOR_RANGE, standard_values
+from agents.netlist_cache import parse_value
+
+
+COLUMNS = {
+    "resistors": ("part_number", "manufacturer", "value", "tolerance", "power", "package", "price", "stock"),
+    "capacitors": ("part_number", "manufacturer", "value", "tolerance", "voltage", "dielectric", "package",
+                   "price", "stock"),
+    "mosfets": ("part_number", "manufacturer", "channel", "vth", "kp", "vds_max", "id_max", "package",
+                "price", "stock"),
+}
+
+TEXT_COLUMNS = {"part_number", "manufacturer", "package", "dielectric", "channel"}
+
+INDEXES = {
+    "resistors": ("value", "tolerance", "power"),
+    "capacitors": ("value", "tolerance", "voltage"),
+    "mosfets": ("vth", "kp"),
+}
+
+_component_db: Optional["ComponentDatabase"] = None
+_component_db_lock = threading.Lock()
+
+
+@dataclass
+class ImportResult:
+    """Outcome of a CSV import: parts written and the rows skipped, by CSV line number."""
+    imported: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+
+
+def parse_quantity(text: Any) -> Optional[float]:
+    """
+    Parse catalog quantities such as "4.7k", "10 uF", "5%", "1/4W" or "0.25".
+
+    Returns:
+        float or None: The value in base units (percentages as fractions), None if empty.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    token = str(text).strip().replace(" ", "").replace("±", "")
+    if not token:
+        return None
+    if token.endswith("%"):
+        return float(token[:-1]) / 100
+    if "/" in token:
+        numerator, _, denominator = token.partition("/")
+        return float(numerator) / parse_value(denominator)
+    value = parse_value(token)
+    if value is None:
+        raise ValueError(f"Cannot parse quantity {text!r}")
+    return value
+
+
+def _engineering(value: float) -> str:
+    # 4990000 -> "4.99M", 1e-06 -> "1u": readable generic part numbers
+    prefixes = {-4: "p", -3: "n", -2: "u", -1: "m", 0: "", 1: "k", 2: "M", 3: "G"}
+    group = min(max(int(math.floor(math.log10(value) / 3)), -4), 3)
+    return f"{value / 10 ** (3 * group):.3g}{prefixes[group]}"
+
+
+class ComponentDatabase:
+    """SQLite-backed parts catalog with indexed candidate queries."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): SQLite file holding the catalog (":memory:" for a throwaway one).
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for table, columns in COLUMNS.items():
+            definitions = ", ".join(
+                f"{column} TEXT" if column in TEXT_COLUMNS else f"{column} REAL" for column in columns
+            )
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definitions}, PRIMARY KEY (part_number))")
+        self._create_indexes()
+        self._conn.commit()
+
+    def _create_indexes(self) -> None:
+        for table, columns in INDEXES.items():
+            for column in columns:
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})")
+
+    def _drop_indexes(self, table: str) -> None:
+        for column in INDEXES[table]:
+            self._conn.execute(f"DROP INDEX IF EXISTS {table}_{column}")
+
+    def count(self, table: str) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def insert(self, table: str, rows: Iterable[Dict[str, Any]], rebuild_indexes: bool = False) -> int:
+        """
+        Insert or replace parts.
+
+        Args:
+            table (str): "resistors", "capacitors" or "mosfets".
+            rows (Iterable[Dict[str, Any]]): Parts keyed by column name; missing columns are NULL.
+            rebuild_indexes (bool, optional): Drop the indexes during the load and rebuild them
+                once at the end, which is much faster for large imports.
+
+        Returns:
+            int: Number of rows written.
+        """
+        if table not in COLUMNS:
+            raise ValueError(f"Unknown component table {table!r}")
+        columns = COLUMNS[table]
+        statement = (f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join('?' for _ in columns)})")
+        with self._lock:
+            try:
+                if rebuild_indexes:
+                    self._drop_indexes(table)
+                cursor = self._conn.executemany(
+                    statement, (tuple(row.get(column) for column in columns) for row in rows)
+                )
+                written = cursor.rowcount
+                if rebuild_indexes:
+                    self._create_indexes()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                self._create_indexes()
+                raise
+        return written
+
+    def import_csv(
+        self,
+        table: str,
+        source: Union[str, TextIO],
+        column_map: Optional[Dict[str, str]] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+    ) -> ImportResult:
+        """
+        Bulk-import a vendor CSV dump.
+
+        Rows with a cell that does not parse are skipped and reported rather than aborting
+        the import.
+
+        Args:
+            table (str): "resistors", "capacitors" or "mosfets".
+            source (str or TextIO): CSV path or open file with a header row.
+            column_map (Dict[str, str], optional): Vendor header to catalog column, e.g.
+                {"Mfr Part #": "part_number", "Resistance": "value"}. Headers already named
+                like catalog columns map to themselves.
+            defaults (Dict[str, Any], optional): Values for columns the dump lacks.
+
+        Returns:
+            ImportResult: Number of parts imported and the reason each bad row was skipped.
+        """
+        column_map = column_map or {}
+        columns = set(COLUMNS[table])
+        result = ImportResult()
+
+        def rows(handle):
+            reader = csv.DictReader(handle)
+            for record in reader:
+                row = dict(defaults or {})
+                try:
+                    for header, text in record.items():
+                        column = column_map.get(header, header.strip().lower() if header else header)
+                        if column not in columns:
+                            continue
+                        if text is None:
+                            raise ValueError("missing cell")
+                        row[column] = text.strip() if column in TEXT_COLUMNS else parse_quantity(text)
+                except (ValueError, TypeError, ZeroDivisionError) as exc:
+                    result.errors[reader.line_num] = f"{column}: {exc}"
+                    continue
+                if row.get("part_number"):
+                    yield row
+
+        if isinstance(source, str):
+            with open(source, newline="", encoding="utf-8-sig") as handle:
+                result.imported = self.insert(table, rows(handle), rebuild_indexes=True)
+        else:
+            result.imported = self.insert(table, rows(source), rebuild_indexes=True)
+        return result
+
+    def _query(self, sql: str, parameters: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, parameters)
+            names = [description[0] for description in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def find_resistors(
+        self,
+        value: float,
+        max_tolerance: Optional[float] = None,
+        min_power: Optional[float] = None,
+        window: float = 0.1,
+        limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Resistors within ±window of value, closest first, then cheapest.
+
+        Args:
+            value (float): Target resistance in Ω.
+            max_tolerance (float, optional): Largest acceptable tolerance (0.01 for 1 %).
+            min_power (float, optional): Smallest acceptable power rating in W.
+            window (float, optional): Relative search band around value.
+            limit (int, optional): Maximum number of candidates.
+        """
+        return self._find("resistors", value, "tolerance", max_tolerance, "power", min_power, window, limit)
+
+    def find_capacitors(
+        self,
+        value: float,
+        max_tolerance: Optional[float] = None,
+        min_voltage: Optional[float] = None,
+        window: float = 0.2,
+        limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """Capacitors within ±window of value; see find_resistors (min_voltage in V)."""
+        return self._find("capacitors", value, "tolerance", max_tolerance, "voltage", min_voltage, window, limit)
+
+    def _find(self, table, value, tolerance_column, max_tolerance, rating_column, min_rating, window, limit):
+        sql = f"SELECT * FROM {table} WHERE value BETWEEN ? AND ?"
+        parameters: List[Any] = [value * (1 - window), value * (1 + window)]
+        if max_tolerance is not None:
+            sql += f" AND {tolerance_column} <= ?"
+            parameters.append(max_tolerance)
+        if min_rating is not None:
+            sql += f" AND {rating_column} >= ?"
+            parameters.append(min_rating)
+        sql += " ORDER BY ABS(value - ?), price IS NULL, price LIMIT ?"
+        parameters += [value, limit]
+        return self._query(sql, parameters)
+
+    def find_mosfets(
+        self,
+        channel: str = "N",
+        vth: Optional[float] = None,
+        vth_window: float = 0.5,
+        min_kp: Optional[float] = None,
+        min_vds: Optional[float] = None,
+        min_id: Optional[float] = None,
+        limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Discrete MOSFETs matching the device the design assumed.
+
+        Args:
+            channel (str, optional): "N" or "P".
+            vth (float, optional): Target threshold voltage; parts within ±vth_window V qualify.
+            vth_window (float, optional): Threshold search band in V.
+            min_kp (float, optional): Smallest acceptable transconductance parameter in A/V².
+            min_vds (float, optional): Smallest acceptable drain-source voltage rating.
+            min_id (float, optional): Smallest acceptable drain current rating.
+            limit (int, optional): Maximum number of candidates.
+        """
+        sql = "SELECT * FROM mosfets WHERE channel = ?"
+        parameters: List[Any] = [channel.upper()]
+        for condition, value in (("vth BETWEEN ? AND ?", None if vth is None else (vth - vth_window, vth + vth_window)),
+                                 ("kp >= ?", min_kp), ("vds_max >= ?", min_vds), ("id_max >= ?", min_id)):
+            if value is not None:
+                sql += f" AND {condition}"
+                parameters += list(value) if isinstance(value, tuple) else [value]
+        sql += " ORDER BY ABS(vth - ?), price IS NULL, price LIMIT ?" if vth is not None else \
+            " ORDER BY price IS NULL, price LIMIT ?"
+        parameters += [vth, limit] if vth is not None else [limit]
+        return self._query(sql, parameters)
+
+    def seed_generic(self) -> None:
+        """Fill the catalog with generic E96 1 % / E24 5 % resistors and E12 capacitors."""
+        resistors = []
+        for series, tolerance in (("E24", 0.05), ("E96", 0.01)):
+            for value in standard_values(series, *RESISTOR_RANGE):
+                resistors.append({"part_number": f"GEN-R-{series}-{_engineering(value)}", "manufacturer": "Generic",
+                                  "value": float(value), "tolerance": tolerance, "power": 0.25, "package": "0805"})
+        capacitors = [
+            {"part_number": f"GEN-C-E12-{_engineering(value)}", "manufacturer": "Generic", "value": float(value),
+             "tolerance": 0.1 if value < 1e-6 else 0.2, "voltage": 50.0,
+             "dielectric": "X7R" if value < 1e-6 else "Electrolytic", "package": "0805" if value < 1e-6 else "Radial"}
+            for value in standard_values("E12", *CAPACITOR_RANGE)
+        ]
+        self.insert("resistors", resistors, rebuild_indexes=True)
+        self.insert("capacitors", capacitors, rebuild_indexes=True)
+
+
+def get_component_db() -> ComponentDatabase:
+    """Return the process-wide catalog, creating (and seeding) it on first use."""
+    global _component_db
+    with _component_db_lock:
+        if _component_db is None:
+            path = os.getenv("CIRCUIT_COMPONENT_DB") or os.path.join(DEFAULT_CACHE_DIR, "components.sqlite")
+            _component_db = ComponentDatabase(path)
+            if _component_db.count("resistors") == 0 and _component_db.count("capacitors") == 0:
+                _component_db.seed_generic()
+        return _component_db
@@ -1,9 +1,12 @@
 from crewai import Agent, Task
 from crewai.tools import BaseTool
-import litellm
+from agents.llm_client import GeminiLLM
+from agents.mna import TOPOLOGY_PORTS, cutoff_frequencies, topology_response
 import os
 from typing import Any, Dict, List
 
+import numpy as np
+
 from pydantic import Field
 from dotenv import load_dotenv
 
@@ -15,26 +18,96 @@ API_KEY = os.getenv("GEMINI_API_KEY")
 os.environ["GEMINI_API_KEY"] = API_KEY
 
 
+# Initialize the custom LLM for CrewAI
+llm = GeminiLLM()
 
-class GeminiLLM:
-    def __init__(self, model_name="gemini/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
 
+def _parallel(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # a || b that stays finite when either side is infinite (e.g. rd = inf)
+    with np.errstate(divide="ignore"):
+        return 1 / (1 / a + 1 / b)
 
 
-# Initialize the custom LLM for CrewAI
-llm = GeminiLLM()
+def evaluate_small_signal_batch(
+    topology: str,
+    gm,
+    rd=np.inf,
+    Rd=0.0,
+    Rs=0.0,
+    Rg=0.0,
+    Cgs=0.0,
+    Cgd=0.0,
+    Cin=0.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the small-signal metrics of many designs of one topology at once.
+
+    Args:
+        topology (str): "Common Source", "Common Drain" or "Common Gate".
+        gm: Transconductance(s) in S.
+        rd: Drain-source resistance(s) in Ω (inf for an ideal device).
+        Rd: Drain resistor(s) in Ω.
+        Rs: Source resistor(s) in Ω.
+        Rg: Gate (bias network) resistance(s) in Ω.
+        Cgs: Gate-source capacitance(s) in F.
+        Cgd: Gate-drain capacitance(s) in F.
+        Cin: Input coupling capacitance(s) in F; 0 for a DC-coupled input.
+
+    Returns:
+        Dict[str, np.ndarray]: Broadcast arrays of voltage_gain, voltage_gain_db,
+        input_impedance, output_impedance, low_cutoff (coupling-capacitor pole) and
+        high_cutoff (input pole including the Miller effect).
+    """
+    gm, rd, Rd, Rs, Rg, Cgs, Cgd, Cin = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (gm, rd, Rd, Rs, Rg, Cgs, Cgd, Cin))
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if topology == "Common Source":
+            output_impedance = _parallel(Rd, rd)
+            voltage_gain = -gm * output_impedance
+            input_impedance = Rg
+            input_capacitance = Cgs + Cgd * (1 + np.abs(voltage_gain))  # Miller effect
+            high_cutoff = 1 / (2 * np.pi * Rg * input_capacitance)
+        elif topology == "Common Drain":
+            load = _parallel(Rs, rd)
+            voltage_gain = gm * load / (1 + gm * load)
+            input_impedance = Rg
+            output_impedance = _parallel(load, 1 / gm)
+            effective_capacitance = Cgs + Cgd * (1 - voltage_gain)
+            high_cutoff = 1 / (2 * np.pi * Rg * effective_capacitance)
+        elif topology == "Common Gate":
+            output_impedance = _parallel(Rd, rd)
+            voltage_gain = gm * output_impedance
+            input_impedance = 1 / gm
+            high_cutoff = 1 / (2 * np.pi * Rs * Cgs)
+        else:
+            raise ValueError("Invalid topology specified. Must be one of: Common Source, Common Drain, or Common Gate")
+
+        voltage_gain_db = 20 * np.log10(np.abs(voltage_gain))
+        low_cutoff = np.where(Cin > 0, 1 / (2 * np.pi * input_impedance * Cin), 0.0)
 
+    return {
+        "voltage_gain": voltage_gain,
+        "voltage_gain_db": voltage_gain_db,
+        "input_impedance": input_impedance,
+        "output_impedance": output_impedance,
+        "low_cutoff": low_cutoff,
+        "high_cutoff": high_cutoff,
+    }
+
+
+def _format_metrics(metrics: Dict[str, np.ndarray], formulas: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "voltage_gain": float(metrics["voltage_gain"]),
+        "voltage_gain_db": f"{float(metrics['voltage_gain_db'])} dB",
+        "input_impedance": f"{float(metrics['input_impedance'])} Ω",
+        "output_impedance": f"{float(metrics['output_impedance'])} Ω",
+        "bandwidth": {
+            "low_cutoff": f"{float(metrics['low_cutoff'])} Hz",
+            "high_cutoff": f"{float(metrics['high_cutoff'])} Hz"
+        },
+        "formulas": formulas
+    }
 
 
 class CommonSourceAnalysisTool(BaseTool):
@@ -52,6 +125,7 @@ class CommonSourceAnalysisTool(BaseTool):
         rd = transistor_params.get("rd", float('inf'))  # Drain-source resistance
         Rd = component_values.get("drain_resistor", 0)  # Drain resistor
         Rg = component_values.get("gate_resistor", 0)  # Gate resistor
+        Cin = component_values.get("input_capacitor", 0)  # Input coupling capacitor
         Cgs = transistor_params.get("Cgs", 0)  # Gate-source capacitance
         Cgd = transistor_params.get("Cgd", 0)  # Gate-drain capacitance
         
@@ -72,37 +146,15 @@ class CommonSourceAnalysisTool(BaseTool):
         }
         
         # Calculate key performance metrics
-        # Voltage gain (Av)
-        voltage_gain = -1 * gm * (Rd * rd) / (Rd + rd)
-        voltage_gain_db = 20 * (voltage_gain if voltage_gain > 0 else -voltage_gain)
-        
-        # Input impedance
-        input_impedance = Rg
-        
-        # Output impedance
-        output_impedance = Rd * rd / (Rd + rd)
-        
-        # Bandwidth calculation (simplified)
-        # For low frequency cutoff
-        input_capacitance = Cgs + Cgd * (1 + abs(voltage_gain))  # Miller effect
-        low_cutoff_freq = 1 / (2 * 3.14159 * Rg * input_capacitance)
-        
-        # Store calculated metrics
-        small_signal_analysis["performance_metrics"] = {
-            "voltage_gain": voltage_gain,
-            "voltage_gain_db": f"{voltage_gain_db} dB",
-            "input_impedance": f"{input_impedance} Ω",
-            "output_impedance": f"{output_impedance} Ω",
-            "bandwidth": {
-                "low_cutoff": f"{low_cutoff_freq} Hz"
-            },
-            "formulas": {
-                "voltage_gain": "Av = -gm * (Rd || rd)",
-                "input_impedance": "Zin = Rg",
-                "output_impedance": "Zout = Rd || rd",
-                "miller_capacitance": "Cin = Cgs + Cgd*(1+|Av|)"
-            }
-        }
+        metrics = evaluate_small_signal_batch("Common Source", gm, rd, Rd=Rd, Rg=Rg, Cgs=Cgs, Cgd=Cgd, Cin=Cin)
+        small_signal_analysis["performance_metrics"] = _format_metrics(metrics, {
+            "voltage_gain": "Av = -gm * (Rd || rd)",
+            "input_impedance": "Zin = Rg",
+            "output_impedance": "Zout = Rd || rd",
+            "miller_capacitance": "Cin = Cgs + Cgd*(1+|Av|)",
+            "low_cutoff": "f_L = 1 / (2π * Zin * C_in)",
+            "high_cutoff": "f_H = 1 / (2π * Rg * (Cgs + Cgd*(1+|Av|)))"
+        })
         
         return small_signal_analysis
 
@@ -122,6 +174,7 @@ class CommonDrainAnalysisTool(BaseTool):
         rd = transistor_params.get("rd", float('inf'))  # Drain-source resistance
         Rs = component_values.get("source_resistor", 0)  # Source resistor
         Rg = component_values.get("gate_resistor", 0)  # Gate resistor
+        Cin = component_values.get("input_capacitor", 0)  # Input coupling capacitor
         Cgs = transistor_params.get("Cgs", 0)  # Gate-source capacitance
         Cgd = transistor_params.get("Cgd", 0)  # Gate-drain capacitance
         
@@ -130,7 +183,7 @@ class CommonDrainAnalysisTool(BaseTool):
             "topology": "Common Drain",
             "small_signal_model": {
                 "elements": [
-                    {"name": "gm*vgs", "from": "source", "to": "drain", "value": f"{gm} S * vgs"},
+                    {"name": "gm*vgs", "from": "drain", "to": "source", "value": f"{gm} S * vgs"},
                     {"name": "rd", "from": "drain", "to": "source", "value": f"{rd} Ω"},
                     {"name": "Rs", "from": "source", "to": "gnd", "value": f"{Rs} Ω"},
                     {"name": "Rg", "from": "gate", "to": "gnd", "value": f"{Rg} Ω"},
@@ -142,37 +195,15 @@ class CommonDrainAnalysisTool(BaseTool):
         }
         
         # Calculate key performance metrics
-        # Voltage gain (Av)
-        gm_Rs_parallel_rd = (gm * Rs * rd) / (Rs + rd)
-        voltage_gain = gm_Rs_parallel_rd / (1 + gm_Rs_parallel_rd)
-        voltage_gain_db = 20 * (voltage_gain if voltage_gain > 0 else -voltage_gain)
-        
-        # Input impedance
-        input_impedance = Rg
-        
-        # Output impedance
-        output_impedance = Rs * rd / (Rs + rd + gm * Rs * rd)
-        
-        # Bandwidth calculation
-        effective_capacitance = Cgs + Cgd * (1 - voltage_gain)
-        low_cutoff_freq = 1 / (2 * 3.14159 * Rg * effective_capacitance)
-        
-        # Store calculated metrics
-        small_signal_analysis["performance_metrics"] = {
-            "voltage_gain": voltage_gain,
-            "voltage_gain_db": f"{voltage_gain_db} dB",
-            "input_impedance": f"{input_impedance} Ω",
-            "output_impedance": f"{output_impedance} Ω",
-            "bandwidth": {
-                "low_cutoff": f"{low_cutoff_freq} Hz"
-            },
-            "formulas": {
-                "voltage_gain": "Av = gm*Rs*rd/(Rs+rd) / (1 + gm*Rs*rd/(Rs+rd))",
-                "input_impedance": "Zin = Rg",
-                "output_impedance": "Zout = Rs || (rd/(1+gm*rd))",
-                "effective_capacitance": "Ceff = Cgs + Cgd*(1-Av)"
-            }
-        }
+        metrics = evaluate_small_signal_batch("Common Drain", gm, rd, Rs=Rs, Rg=Rg, Cgs=Cgs, Cgd=Cgd, Cin=Cin)
+        small_signal_analysis["performance_metrics"] = _format_metrics(metrics, {
+            "voltage_gain": "Av = gm*Rs*rd/(Rs+rd) / (1 + gm*Rs*rd/(Rs+rd))",
+            "input_impedance": "Zin = Rg",
+            "output_impedance": "Zout = Rs || (rd/(1+gm*rd))",
+            "effective_capacitance": "Ceff = Cgs + Cgd*(1-Av)",
+            "low_cutoff": "f_L = 1 / (2π * Zin * C_in)",
+            "high_cutoff": "f_H = 1 / (2π * Rg * Ceff)"
+        })
         
         return small_signal_analysis
 
@@ -192,6 +223,7 @@ class CommonGateAnalysisTool(BaseTool):
         rd = transistor_params.get("rd", float('inf'))  # Drain-source resistance
         Rd = component_values.get("drain_resistor", 0)  # Drain resistor
         Rs = component_values.get("source_resistor", 0)  # Source resistor
+        Cin = component_values.get("input_capacitor", 0)  # Input coupling capacitor
         Cgs = transistor_params.get("Cgs", 0)  # Gate-source capacitance
         Cgd = transistor_params.get("Cgd", 0)  # Gate-drain capacitance
         
@@ -212,36 +244,15 @@ class CommonGateAnalysisTool(BaseTool):
         }
         
         # Calculate key performance metrics
-        # Voltage gain (Av)
-        voltage_gain = gm * (Rd * rd) / (Rd + rd)
-        voltage_gain_db = 20 * (voltage_gain if voltage_gain > 0 else -voltage_gain)
-        
-        # Input impedance
-        input_impedance = 1 / gm
-        
-        # Output impedance
-        output_impedance = Rd * rd / (Rd + rd)
-        
-        # Bandwidth calculation
-        source_capacitance = Cgs
-        low_cutoff_freq = 1 / (2 * 3.14159 * Rs * source_capacitance)
-        
-        # Store calculated metrics
-        small_signal_analysis["performance_metrics"] = {
-            "voltage_gain": voltage_gain,
-            "voltage_gain_db": f"{voltage_gain_db} dB",
-            "input_impedance": f"{input_impedance} Ω",
-            "output_impedance": f"{output_impedance} Ω",
-            "bandwidth": {
-                "low_cutoff": f"{low_cutoff_freq} Hz"
-            },
-            "formulas": {
-                "voltage_gain": "Av = gm * (Rd || rd)",
-                "input_impedance": "Zin = 1/gm",
-                "output_impedance": "Zout = Rd || rd",
-                "source_capacitance": "Cs = Cgs"
-            }
-        }
+        metrics = evaluate_small_signal_batch("Common Gate", gm, rd, Rd=Rd, Rs=Rs, Cgs=Cgs, Cgd=Cgd, Cin=Cin)
+        small_signal_analysis["performance_metrics"] = _format_metrics(metrics, {
+            "voltage_gain": "Av = gm * (Rd || rd)",
+            "input_impedance": "Zin = 1/gm",
+            "output_impedance": "Zout = Rd || rd",
+            "source_capacitance": "Cs = Cgs",
+            "low_cutoff": "f_L = 1 / (2π * Zin * C_in)",
+            "high_cutoff": "f_H = 1 / (2π * Rs * Cgs)"
+        })
         
         return small_signal_analysis
 
@@ -351,8 +362,56 @@ def get_tradeoffs_for_topology(topology: str, metrics: Dict[str, Any]) -> Dict[s
     return tradeoffs
 
 
-# Create the tool
+class FrequencyResponseTool(BaseTool):
+    name: str = "MOSFET Frequency Response Tool"
+    description: str = ("Computes the full Bode response of a Common Source, Common Drain or Common Gate "
+                        "amplifier by modified nodal analysis of its small signal model, and reports the "
+                        "low-frequency and peak gain and the -3 dB cutoff frequencies.")
+
+    analyzer: SmallSignalAnalyzer = Field(default_factory=SmallSignalAnalyzer)
+
+    def _run(self, circuit_design: Dict[str, Any]) -> Dict[str, Any]:
+        topology = circuit_design.get("topology", "")
+        if topology not in TOPOLOGY_PORTS:
+            return {
+                "error": "Invalid topology specified. Must be one of: Common Source, Common Drain, or Common Gate"
+            }
+        sweep = circuit_design.get("frequency_range", {})
+        start = sweep.get("start", 1.0)
+        stop = sweep.get("stop", 1e10)
+        points_per_decade = sweep.get("points_per_decade", 20)
+        frequencies = np.logspace(np.log10(start), np.log10(stop),
+                                  int(round(np.log10(stop / start) * points_per_decade)) + 1)
+
+        analysis = self.analyzer._run(circuit_design)["small_signal_analysis"]
+        elements = analysis["small_signal_model"]["elements"]
+        source_resistance = circuit_design.get("component_values", {}).get("source_resistance", 0)
+        try:
+            bode = topology_response(topology, elements, frequencies, source_resistance)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            return {"error": f"Frequency response failed: {e}"}
+        cutoffs = cutoff_frequencies(bode["frequencies"], bode["magnitude_db"])
+
+        return {
+            "topology": topology,
+            "method": "modified nodal analysis",
+            "low_frequency_gain_db": f"{float(bode['magnitude_db'][0])} dB",
+            "peak_gain_db": f"{float(cutoffs['peak_db'])} dB",
+            "bandwidth": {
+                "low_cutoff": f"{float(cutoffs['low_cutoff'])} Hz",
+                "high_cutoff": f"{float(cutoffs['high_cutoff'])} Hz"
+            },
+            "bode": {
+                "frequency_hz": bode["frequencies"].tolist(),
+                "magnitude_db": np.round(bode["magnitude_db"], 4).tolist(),
+                "phase_deg": np.round(bode["phase_deg"], 3).tolist()
+            }
+        }
+
+
+# Create the tools
 small_signal_analyzer_tool = SmallSignalAnalyzer()
+frequency_response_tool = FrequencyResponseTool()
 
 
 # Create the agent
@@ -362,7 +421,7 @@ small_signal_analysis_agent = Agent(
     backstory="You are a highly specialized analog IC designer with extensive experience in MOSFET small signal analysis. With a PhD in Microelectronics and 15 years of industry experience, you've developed proprietary techniques for accurately predicting circuit performance using advanced small signal modeling. Your methodology has been adopted by leading semiconductor companies for analyzing amplifier stages in critical applications from medical devices to aerospace systems. Your ability to extract maximum performance from transistor configurations through precise small signal analysis has made you a sought-after consultant for challenging analog design problems.",
     allow_delegation=False,
     verbose=True,
-    tools=[small_signal_analyzer_tool],
+    tools=[small_signal_analyzer_tool, frequency_response_tool],
     llm=GeminiLLM()
 )
 
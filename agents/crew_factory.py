@@ -0,0 +1,378 @@
+"""
+Builds the circuit design crew once per process and reuses it across requests.
+
+Streamlit re-executes main.py on every interaction, but this module stays imported,
+so the agents, tools and LLM clients are constructed a single time. Each kickoff
+borrows an idle crew from a small pool (cloning the prototype only when several
+sessions run at once) and receives a KickoffContext carrying its per-request state.
+"""
+
+import contextvars
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from crewai import Crew
+from agents.analysis_agent import senior_circuit_analyzer, circuit_analysis_task
+from agents.component_agent import component_selection_specialist, component_selection_task
+from agents.connection_agent import small_signal_analysis_agent, small_signal_analysis_task
+from agents.formula_agent import formulas_equations_engineer, formula_calculation_task
+from agents.netlist_agent import netlist_generator, netlist_generation_task
+#from agents.schematic import schematic_agent, schematic_task
+from agents.pyspice_agent import netlist_to_pyspice_generator, netlist_to_pyspice_task
+from agents.simulation_agent import pyspice_simulation_expert, pyspice_simulation_task
+from agents.validation_agent import performance_validation_engineer, performance_validation_task
+from agents.matplot_lib import circuit_code_generator, circuit_code_generation_task
+from agents.llm_client import stream_tokens
+from agents.progress import StageProgress
+from agents.scheduler import run_graph
+from agents.compiler import NETLIST, PYSPICE, SIMULATION, SKIPPED_STAGES, CompiledDesign, compile_design
+from agents.netlist_cache import cached_report
+from agents.netlist_checker import check_netlist
+from agents.netlist_parser import NetlistParseError
+from agents.rawfile import store_waveforms
+from agents import ngspice_service
+
+
+# Progress labels, in task order
+STAGES = [
+    "Analyzing circuit requirements...",
+    "Selecting components...",
+    "Performing small signal analysis...",
+    "Calculating formulas and equations...",
+    "Generating netlist...",
+    "Converting to PySpice...",
+    "Running simulation...",
+    "Validating performance...",
+    "Generating schematic code..."
+]
+
+# Real inputs of each task, as indexes into the task list above. Component selection
+# and formula calculation only need the analysis, and the schematic code only needs
+# the netlist, so the scheduler runs those alongside their siblings. The LLM simulation
+# task runs the PySpice script, so it keeps that input; the edge is only cut in practice
+# when the netlist was simulated in-process and the PySpice stage had nothing to do.
+# Inputs from later tasks in the list (2 <- 3) are only honoured by the scheduler.
+TASK_INPUTS = [
+    [],         # circuit analysis <- prompt
+    [0],        # component selection <- analysis
+    [0, 3],     # small signal analysis <- analysis, calculated values
+    [0],        # formula calculation <- analysis
+    [1, 2, 3],  # netlist <- components, small signal results, calculated values
+    [4],        # PySpice code <- netlist
+    [4, 5],     # simulation <- netlist, PySpice code
+    [0, 4, 6],  # validation <- requirements, netlist, simulation results
+    [4]         # schematic code <- netlist
+]
+
+_current_progress: contextvars.ContextVar[Optional[StageProgress]] = contextvars.ContextVar(
+    "current_progress", default=None
+)
+
+
+def _on_task_complete(output):
+    progress = _current_progress.get()
+    if progress is not None:
+        progress.advance()
+
+
+def create_crew():
+    """Create and return a CrewAI Crew with all agents and tasks."""
+    crew = Crew(
+        agents=[
+            senior_circuit_analyzer,
+            component_selection_specialist,
+            small_signal_analysis_agent,
+            formulas_equations_engineer,
+            netlist_generator,
+            netlist_to_pyspice_generator,
+            pyspice_simulation_expert,
+            performance_validation_engineer,
+            circuit_code_generator
+        ],
+        tasks=[
+            circuit_analysis_task,
+            component_selection_task,
+            small_signal_analysis_task,
+            formula_calculation_task,
+            netlist_generation_task,
+            netlist_to_pyspice_task,
+            pyspice_simulation_task,
+            performance_validation_task,
+            circuit_code_generation_task
+        ],
+        task_callback=_on_task_complete,
+        verbose=True
+    )
+    # Declare the real inputs so each task sees exactly the upstream outputs it uses.
+    # Sequential kickoff runs the tasks in list order, so a later task (the formulas for
+    # small signal analysis) would hand over the output it kept from the previous
+    # request; only the parallel scheduler, which passes upstream outputs itself, keeps
+    # those edges.
+    for index, (task, inputs) in enumerate(zip(crew.tasks, TASK_INPUTS)):
+        earlier = [i for i in inputs if i < index]
+        if earlier:
+            task.context = [crew.tasks[i] for i in earlier]
+    return crew
+
+
+@dataclass
+class KickoffContext:
+    """Per-request state handed to a kickoff; cheap to create."""
+    prompt: str
+    inputs: Dict[str, Any]
+    setup_seconds: float
+    build_seconds: float
+    progress: Optional[StageProgress] = None
+    outputs: List[Any] = field(default_factory=list)
+    compiled: Optional[CompiledDesign] = None
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def setup_seconds_saved(self) -> float:
+        """Crew construction time this request avoided by reusing the cached crew."""
+        return max(self.build_seconds - self.setup_seconds, 0.0)
+
+
+_idle_crews: "queue.SimpleQueue[Crew]" = queue.SimpleQueue()
+_prototype_lock = threading.Lock()
+_prototype_lent = False
+
+
+@lru_cache(maxsize=1)
+def _prototype():
+    start = time.perf_counter()
+    crew = create_crew()
+    return crew, time.perf_counter() - start
+
+
+def get_crew() -> Crew:
+    """Return the process-wide crew, building it on first use."""
+    return _prototype()[0]
+
+
+def _acquire_crew() -> Crew:
+    global _prototype_lent
+    try:
+        return _idle_crews.get_nowait()
+    except queue.Empty:
+        pass
+    # The prototype serves the first session; concurrent sessions get their own copy
+    # because tasks keep per-run output on the crew.
+    with _prototype_lock:
+        if not _prototype_lent:
+            _prototype_lent = True
+            return get_crew()
+    return get_crew().copy()
+
+
+def new_context(
+    prompt: str,
+    inputs: Optional[Dict[str, Any]] = None,
+    progress: Optional[StageProgress] = None,
+) -> KickoffContext:
+    """Prepare the per-request context, timing how long obtaining a crew takes."""
+    start = time.perf_counter()
+    _, build_seconds = _prototype()
+    return KickoffContext(
+        prompt=prompt,
+        inputs=dict(inputs or {}, prompt=prompt),
+        setup_seconds=time.perf_counter() - start,
+        build_seconds=build_seconds,
+        progress=progress,
+    )
+
+
+def _interpolate(crew: Crew, inputs: Dict[str, Any]) -> None:
+    for agent in crew.agents:
+        agent.crew = crew
+        agent.interpolate_inputs(inputs)
+    for task in crew.tasks:
+        interpolate = getattr(task, "interpolate_inputs_and_add_conversation_history", None)
+        (interpolate or task.interpolate_inputs)(inputs)
+
+
+def _simulate_in_process(netlist: str) -> Optional[str]:
+    try:
+        results = ngspice_service.simulate_netlist(netlist)
+    except ngspice_service.SimulationError:
+        return None
+    summary = ngspice_service.summarize(results)
+    store = store_waveforms(netlist, results)
+    if store is not None:
+        summary["waveforms"] = store
+    return json.dumps(summary, indent=2)
+
+
+def _structural_failure(netlist: str) -> Optional[str]:
+    try:
+        check = check_netlist(netlist)
+    except NetlistParseError:
+        return None
+    if check.ok:
+        return None
+    return json.dumps({
+        "method": "structural netlist check",
+        "simulated": False,
+        "errors": [issue["message"] for issue in check.errors],
+        "warnings": [issue["message"] for issue in check.warnings],
+    }, indent=2)
+
+
+def _run_parallel(
+    crew: Crew,
+    context: KickoffContext,
+    on_token,
+    thread_initializer,
+    resolved: Dict[int, str],
+):
+    progress = context.progress
+    # Stages found to be unnecessary while running, and in-process reports by netlist
+    skipped: Set[int] = set()
+    simulated: Dict[str, Optional[str]] = {}
+
+    def simulate_in_process(netlist: str) -> Optional[str]:
+        # A structurally broken netlist cannot simulate; report it instead of running
+        if netlist not in simulated:
+            simulated[netlist] = _structural_failure(netlist) or _simulate_in_process(netlist)
+        return simulated[netlist]
+
+    def run(index: int, upstream: List[Any]):
+        if index in resolved:
+            return resolved[index]
+        task = crew.tasks[index]
+        usage_handler = (lambda usage: progress.add_usage(usage, index)) if progress is not None else None
+
+        def execute():
+            with stream_tokens(on_token, usage_handler):
+                execute_task = getattr(task, "execute_sync", None) or task.execute
+                return execute_task(
+                    agent=task.agent,
+                    context="\n\n".join(str(output) for output in upstream),
+                    tools=task.agent.tools
+                )
+
+        if index == PYSPICE:
+            # The script is only needed by the LLM simulation, i.e. for netlists the
+            # in-process simulators reject; simulate first and generate it on demand
+            if simulate_in_process(str(upstream[0])) is not None:
+                skipped.add(PYSPICE)
+                if progress is not None:
+                    progress.skip(PYSPICE)
+                return ""
+            return execute()
+        if index == SIMULATION:
+            netlist = str(upstream[TASK_INPUTS[SIMULATION].index(NETLIST)])
+            report = simulate_in_process(netlist)
+            if report is not None:
+                return report
+            # Equivalent netlists (re-runs, validation loops) reuse the earlier simulation
+            return cached_report(netlist, execute)[0]
+        return execute()
+
+    def on_start(index: int):
+        if index not in resolved:
+            progress.start(index)
+
+    def on_complete(index: int, output: Any):
+        if index not in resolved and index not in skipped:
+            progress.complete(index)
+
+    _interpolate(crew, context.inputs)
+    context.outputs = run_graph(
+        TASK_INPUTS,
+        run,
+        on_start=on_start if progress is not None else None,
+        on_complete=on_complete if progress is not None else None,
+        thread_initializer=thread_initializer,
+    )
+    # Like a sequential crew, the final task's output is the result
+    return context.outputs[-1]
+
+
+def kickoff_crew(
+    context: KickoffContext,
+    on_token=None,
+    parallel: bool = True,
+    thread_initializer: Optional[Callable[[], None]] = None,
+    compiler: bool = True,
+):
+    """
+    Run the CrewAI workflow for the given context, streaming LLM tokens to on_token.
+
+    With parallel=True the tasks run on the dependency-graph scheduler, so stages that
+    do not feed each other overlap; thread_initializer runs in each worker thread
+    (e.g. to attach the Streamlit script context). parallel=False keeps the plain
+    sequential crew.kickoff().
+
+    The parallel scheduler simulates the netlist in-process (ngspice when PySpice's library
+    is available, the built-in NumPy simulator otherwise) and then skips the PySpice code
+    generation stage; for netlists neither simulator can run, the PySpice script is
+    generated and the LLM simulation stage runs it.
+
+    With compiler=True, fully specified prompts are first compiled deterministically
+    (see agents.compiler); a complete compilation is returned without calling the LLM,
+    and otherwise the parallel scheduler only runs the stages it could not resolve.
+    """
+    progress = context.progress
+    resolved: Dict[int, str] = {}
+    if compiler:
+        context.compiled = compile_design(
+            context.prompt,
+            on_start=progress.start if progress is not None else None,
+            on_complete=progress.complete if progress is not None else None,
+        )
+        if context.compiled.complete:
+            if progress is not None:
+                for stage in SKIPPED_STAGES:
+                    progress.skip(stage)
+            return context.compiled
+        resolved = context.compiled.outputs
+
+    crew = _acquire_crew()
+    try:
+        if parallel:
+            # The scheduler reports stage boundaries itself, so the crew's task callback
+            # (which still fires inside execute_sync) finds no progress to advance
+            return _run_parallel(crew, context, on_token, thread_initializer, resolved)
+        token = _current_progress.set(progress)
+        try:
+            if progress is not None:
+                progress.start(0)
+            with stream_tokens(on_token, progress.add_usage if progress is not None else None):
+                return crew.kickoff(inputs=context.inputs)
+        finally:
+            _current_progress.reset(token)
+    finally:
+        _idle_crews.put(crew)
+
+
+def measure_setup_savings(repeats: int = 5) -> Dict[str, float]:
+    """
+    Compare building a fresh crew per request with reusing the cached one.
+
+    Args:
+        repeats (int, optional): Number of timed repetitions for each strategy.
+
+    Returns:
+        Dict[str, float]: Mean seconds per request for both strategies and the saving.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        create_crew()
+    rebuild = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        new_context("")
+    reuse = (time.perf_counter() - start) / repeats
+
+    return {
+        "rebuild_seconds": rebuild,
+        "reuse_seconds": reuse,
+        "saved_seconds": rebuild - reuse,
+    }
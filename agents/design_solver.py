@@ -0,0 +1,273 @@
+"""
+Numeric design engine for single-stage MOSFET amplifiers.
+
+Solves for RD, RS, R1, R2 and the bias point of Common Source, Common Drain and Common
+Gate stages from a gain target, supply and input swing, using the square-law (Level-1)
+model with channel-length modulation and an optional resistive load. The overdrive voltage
+is the free variable: the drain (or source) is centred in its allowed swing range, the gain
+becomes a function of V_ov alone, and a bracketing root finder lands it on the target.
+"""
+
+import math
+from typing import Any, Callable, Dict
+
+
+# MOSFETParametersTool defaults
+DEFAULT_VTH = 0.7
+DEFAULT_KP = 100e-6
+DEFAULT_W_OVER_L = 5.0
+DEFAULT_LAMBDA = 0.02
+
+
+def solve_bracket(f: Callable[[float], float], lo: float, hi: float, tol: float = 1e-12, max_iter: int = 100) -> float:
+    """
+    Find a root of f in [lo, hi] with the Illinois variant of regula falsi.
+
+    Args:
+        f (Callable[[float], float]): Continuous function with a sign change on [lo, hi].
+        lo (float): Lower bracket.
+        hi (float): Upper bracket.
+        tol (float, optional): Relative tolerance on the bracket width.
+        max_iter (int, optional): Iteration limit.
+
+    Returns:
+        float: The root.
+
+    Raises:
+        ValueError: If f(lo) and f(hi) have the same sign.
+    """
+    f_lo, f_hi = f(lo), f(hi)
+    if f_lo == 0:
+        return lo
+    if f_hi == 0:
+        return hi
+    if (f_lo > 0) == (f_hi > 0):
+        raise ValueError("Root is not bracketed")
+
+    side = 0
+    x = lo
+    for _ in range(max_iter):
+        x = (lo * f_hi - hi * f_lo) / (f_hi - f_lo)
+        f_x = f(x)
+        if f_x == 0 or abs(hi - lo) <= tol * max(abs(x), 1e-300):
+            break
+        if (f_x > 0) == (f_hi > 0):
+            hi, f_hi = x, f_x
+            if side == -1:
+                f_lo /= 2
+            side = -1
+        else:
+            lo, f_lo = x, f_x
+            if side == 1:
+                f_hi /= 2
+            side = 1
+    return x
+
+
+def _parallel(*resistances: float) -> float:
+    # Infinite resistances (no r_o, no load) drop out
+    return 1.0 / sum(1.0 / r for r in resistances)
+
+
+def _solve_overdrive(gain_of: Callable[[float], float], gain: float, vov_max: float) -> float:
+    # Unloaded, the gain falls monotonically with V_ov. A finite load also pulls it to zero
+    # at small V_ov (gm -> 0), so it peaks in between; the falling branch past the peak is
+    # the one that becomes the unloaded design as the load grows.
+    lo, hi = 1e-6 * vov_max, vov_max * (1 - 1e-9)
+    samples = [lo * (hi / lo) ** (i / 120) for i in range(121)]
+    peak = max(samples, key=gain_of)
+    if gain_of(peak) < gain:
+        raise ValueError(f"Gain {gain:g} is out of reach with this load and supply (at most {gain_of(peak):.4g})")
+    return solve_bracket(lambda v: gain_of(v) - gain, peak, hi)
+
+
+def _divider(vdd: float, vg: float, r_in: float) -> Dict[str, float]:
+    # R1 || R2 = r_in and R2 / (R1 + R2) = vg / vdd
+    if not 0 < vg < vdd:
+        raise ValueError(f"Gate bias {vg:.4g} V is outside the supply (0, {vdd:g} V); no divider can set it")
+    return {"R1": r_in * vdd / vg, "R2": r_in * vdd / (vdd - vg)}
+
+
+def _drain_loaded_design(
+    topology: str,
+    gain: float,
+    vdd: float,
+    vin_amplitude: float,
+    vth: float,
+    k: float,
+    lam: float,
+    source_fraction: float,
+    r_in: float,
+    r_load: float,
+) -> Dict[str, Any]:
+    # Shared by CS (RS bypassed), |Av| = gm * (RD || ro || RL), and CG, where the input at
+    # the source also drives current through ro: Av = (gm + 1/ro) * (RD || ro || RL)
+    vs = source_fraction * vdd
+    common_gate = topology == "Common Gate"
+
+    def bias(vov: float) -> Dict[str, float]:
+        vd = (vdd + vs + vov) / 2  # centre the drain between VDD and the saturation edge
+        vds = vd - vs
+        i_d = 0.5 * k * vov ** 2 * (1 + lam * vds)
+        ro = (1 + lam * vds) / (lam * i_d) if lam else math.inf
+        rd = (vdd - vd) / i_d
+        gm = 2 * i_d / vov
+        av = (gm + (1 / ro if common_gate else 0.0)) * _parallel(rd, ro, r_load)
+        return {"V_D": vd, "V_DS": vds, "I_D": i_d, "r_o": ro, "RD": rd, "g_m": gm, "A_v": av}
+
+    vov = _solve_overdrive(lambda v: bias(v)["A_v"], gain, vdd - vs)
+    point = bias(vov)
+    vg = vs + vth + vov
+    headroom = (vdd - vs - vov) / 2
+    return {
+        "topology": topology,
+        "target_gain": gain,
+        "voltage_gain": -point["A_v"] if topology == "Common Source" else point["A_v"],
+        "I_D": point["I_D"],
+        "V_ov": vov,
+        "V_GS": vth + vov,
+        "V_DS": point["V_DS"],
+        "V_G": vg,
+        "V_S": vs,
+        "V_D": point["V_D"],
+        "g_m": point["g_m"],
+        "r_o": point["r_o"],
+        "RD": point["RD"],
+        "RS": vs / point["I_D"],
+        **_divider(vdd, vg, r_in),
+        "output_swing_headroom": headroom,
+        "feasible": vg < vdd and headroom >= gain * vin_amplitude,
+        "region": "saturation" if point["V_DS"] >= vov else "triode",
+    }
+
+
+def design_common_source(
+    gain: float,
+    vdd: float,
+    vin_amplitude: float = 0.0,
+    vth: float = DEFAULT_VTH,
+    kp: float = DEFAULT_KP,
+    w_over_l: float = DEFAULT_W_OVER_L,
+    lam: float = DEFAULT_LAMBDA,
+    source_fraction: float = 0.1,
+    r_in: float = 1e6,
+    r_load: float = math.inf,
+) -> Dict[str, Any]:
+    """
+    Design a voltage-divider-biased Common Source stage with a bypassed source resistor.
+
+    Args:
+        gain (float): Target voltage gain magnitude.
+        vdd (float): Supply voltage.
+        vin_amplitude (float, optional): Peak input signal, used for the swing check.
+        vth (float, optional): Threshold voltage.
+        kp (float, optional): Process transconductance μ_n C_ox in A/V².
+        w_over_l (float, optional): Aspect ratio.
+        lam (float, optional): Channel-length modulation in 1/V.
+        source_fraction (float, optional): Share of VDD dropped across RS for bias stability.
+        r_in (float, optional): Target input resistance R1 || R2.
+        r_load (float, optional): Resistive load AC-coupled to the output.
+
+    Returns:
+        Dict[str, Any]: Component values, bias point, small-signal parameters and a
+        feasibility flag for the requested output swing.
+    """
+    if gain <= 0:
+        raise ValueError("Common Source gain target must be positive (magnitude)")
+    return _drain_loaded_design("Common Source", gain, vdd, vin_amplitude, vth, kp * w_over_l, lam,
+                                source_fraction, r_in, r_load)
+
+
+def design_common_gate(
+    gain: float,
+    vdd: float,
+    vin_amplitude: float = 0.0,
+    vth: float = DEFAULT_VTH,
+    kp: float = DEFAULT_KP,
+    w_over_l: float = DEFAULT_W_OVER_L,
+    lam: float = DEFAULT_LAMBDA,
+    source_fraction: float = 0.1,
+    r_in: float = 1e6,
+    r_load: float = math.inf,
+) -> Dict[str, Any]:
+    """Design a Common Gate stage (gate AC-grounded, signal into the source); see design_common_source."""
+    if gain <= 0:
+        raise ValueError("Common Gate gain target must be positive")
+    return _drain_loaded_design("Common Gate", gain, vdd, vin_amplitude, vth, kp * w_over_l, lam,
+                                source_fraction, r_in, r_load)
+
+
+def design_common_drain(
+    gain: float,
+    vdd: float,
+    vin_amplitude: float = 0.0,
+    vth: float = DEFAULT_VTH,
+    kp: float = DEFAULT_KP,
+    w_over_l: float = DEFAULT_W_OVER_L,
+    lam: float = DEFAULT_LAMBDA,
+    r_in: float = 1e6,
+    r_load: float = math.inf,
+) -> Dict[str, Any]:
+    """
+    Design a Common Drain (source follower) stage with the drain tied to VDD.
+
+    Args:
+        gain (float): Target voltage gain, strictly between 0 and 1.
+        vdd (float): Supply voltage.
+        vin_amplitude (float, optional): Peak input signal, used for the swing check.
+        vth, kp, w_over_l, lam, r_in, r_load: As for design_common_source.
+
+    Returns:
+        Dict[str, Any]: Component values, bias point and small-signal parameters.
+    """
+    if not 0 < gain < 1:
+        raise ValueError("Common Drain gain target must be between 0 and 1")
+    k = kp * w_over_l
+
+    def bias(vov: float) -> Dict[str, float]:
+        vs = (vdd - vth - vov) / 2  # centre the source so V_G = V_S + V_GS stays below VDD
+        vds = vdd - vs
+        i_d = 0.5 * k * vov ** 2 * (1 + lam * vds)
+        ro = (1 + lam * vds) / (lam * i_d) if lam else math.inf
+        rs = vs / i_d
+        gm = 2 * i_d / vov
+        load = _parallel(rs, ro, r_load)
+        return {"V_S": vs, "V_DS": vds, "I_D": i_d, "r_o": ro, "RS": rs, "g_m": gm,
+                "A_v": gm * load / (1 + gm * load)}
+
+    vov = _solve_overdrive(lambda v: bias(v)["A_v"], gain, vdd - vth)
+    point = bias(vov)
+    vg = point["V_S"] + vth + vov
+    return {
+        "topology": "Common Drain",
+        "target_gain": gain,
+        "voltage_gain": point["A_v"],
+        "I_D": point["I_D"],
+        "V_ov": vov,
+        "V_GS": vth + vov,
+        "V_DS": point["V_DS"],
+        "V_G": vg,
+        "V_S": point["V_S"],
+        "V_D": vdd,
+        "g_m": point["g_m"],
+        "r_o": point["r_o"],
+        "RS": point["RS"],
+        **_divider(vdd, vg, r_in),
+        "output_swing_headroom": point["V_S"],
+        "feasible": point["V_S"] >= gain * vin_amplitude,
+        "region": "saturation" if point["V_DS"] >= vov else "triode",
+    }
+
+
+DESIGNERS = {
+    "Common Source": design_common_source,
+    "Common Drain": design_common_drain,
+    "Common Gate": design_common_gate,
+}
+
+
+def design_amplifier(topology: str, gain: float, vdd: float, **kwargs) -> Dict[str, Any]:
+    """Dispatch to the designer for topology ("Common Source", "Common Drain" or "Common Gate")."""
+    if topology not in DESIGNERS:
+        raise ValueError("Invalid topology specified. Must be one of: Common Source, Common Drain, or Common Gate")
+    return DESIGNERS[topology](gain, vdd, **kwargs)
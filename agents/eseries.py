@@ -0,0 +1,156 @@
+"""
+IEC 60063 E-series preferred values and fast snapping of calculated values onto them.
+
+Each series is expanded once into a sorted array spanning the requested decades, so
+snapping any number of values is a single numpy.searchsorted plus a comparison of the
+two neighbours in log space. Divider networks are snapped as a pair: for every standard
+R2 near the ideal one, the ideal R1 for the same ratio is snapped by searchsorted, and
+the pair that best preserves the divider ratio (the gate bias V_G) wins.
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+
+# E6, E12 and E24 are historical roundings and must be tabulated
+E6 = (1.0, 1.5, 2.2, 3.3, 4.7, 6.8)
+E12 = (1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2)
+E24 = (1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+       3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1)
+
+SERIES = {"E6": E6, "E12": E12, "E24": E24, "E48": 48, "E96": 96}
+
+# Default ranges for the parts the designs use
+RESISTOR_RANGE = (1.0, 10e6)
+CAPACITOR_RANGE = (1e-12, 10e-3)
+
+
+def _mantissas(series: str) -> np.ndarray:
+    if series not in SERIES:
+        raise ValueError(f"Unknown E-series {series!r}; expected one of {', '.join(SERIES)}")
+    table = SERIES[series]
+    if isinstance(table, int):
+        # E48 and E96 follow the rounded geometric progression exactly (3 significant digits)
+        return np.round(10 ** (np.arange(table) / table), 2)
+    return np.array(table)
+
+
+@lru_cache(maxsize=32)
+def standard_values(series: str = "E24", low: float = RESISTOR_RANGE[0], high: float = RESISTOR_RANGE[1]) -> np.ndarray:
+    """
+    Sorted array of every value of a series between low and high (inclusive).
+
+    Args:
+        series (str, optional): "E6", "E12", "E24", "E48" or "E96".
+        low (float, optional): Smallest value of interest.
+        high (float, optional): Largest value of interest.
+
+    Returns:
+        np.ndarray: Read-only sorted values; cached per (series, low, high).
+    """
+    mantissas = _mantissas(series)
+    first, last = int(np.floor(np.log10(low))), int(np.ceil(np.log10(high)))
+    # Work from integer mantissas (8.2 -> 820) so 820 * 1e3 and 470 / 1e14 are exactly the
+    # floats written as 820000 and 4.7e-12
+    digits = np.round(mantissas * 100)
+    exponents = np.arange(first, last + 1)[:, None] - 2
+    values = np.unique(np.where(
+        exponents >= 0, digits * 10.0 ** np.abs(exponents), digits / 10.0 ** np.abs(exponents)
+    ).ravel())
+    values = values[(values >= low * (1 - 1e-12)) & (values <= high * (1 + 1e-12))]
+    values.setflags(write=False)
+    return values
+
+
+def snap(
+    values,
+    series: str = "E24",
+    low: float = RESISTOR_RANGE[0],
+    high: float = RESISTOR_RANGE[1],
+    mode: str = "nearest",
+) -> np.ndarray:
+    """
+    Snap values onto a standard series.
+
+    Args:
+        values: Scalar or array of calculated values.
+        series (str, optional): Target series.
+        low (float, optional): Lower end of the value range searched.
+        high (float, optional): Upper end of the value range searched.
+        mode (str, optional): "nearest" (in ratio terms), "up" or "down".
+
+    Returns:
+        np.ndarray: Standard values with the shape of values.
+    """
+    table = standard_values(series, low, high)
+    values = np.asarray(values, dtype=float)
+    upper = np.clip(np.searchsorted(table, values), 0, len(table) - 1)
+    lower = np.clip(upper - 1, 0, len(table) - 1)
+    if mode == "up":
+        return table[np.where(table[lower] >= values, lower, upper)]
+    if mode == "down":
+        return table[np.where(table[upper] <= values, upper, lower)]
+    if mode != "nearest":
+        raise ValueError("mode must be 'nearest', 'up' or 'down'")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closer_to_lower = np.abs(np.log(values / table[lower])) <= np.abs(np.log(table[upper] / values))
+    return table[np.where(closer_to_lower, lower, upper)]
+
+
+def snap_divider(
+    r1,
+    r2,
+    series: str = "E24",
+    window: float = 2.0,
+    low: float = RESISTOR_RANGE[0],
+    high: float = RESISTOR_RANGE[1],
+    vdd: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Choose standard R1 (top) and R2 (bottom) values that best preserve R2 / (R1 + R2).
+
+    Only standard R2 values within a factor window of the ideal R2 are considered (so the
+    divider's input resistance stays close to the design), and for each of them the two
+    standard R1 values bracketing the ideal R1 are found by searchsorted.
+
+    Args:
+        r1: Ideal upper resistor(s).
+        r2: Ideal lower resistor(s).
+        series (str, optional): Target series.
+        window (float, optional): R2 may move by up to this factor either way.
+        low (float, optional): Lower end of the value range searched.
+        high (float, optional): Upper end of the value range searched.
+        vdd (float, optional): Supply, to report the resulting gate voltage.
+
+    Returns:
+        Dict[str, np.ndarray]: R1, R2, the achieved ratio, its relative error and, with
+        vdd, the gate voltage V_G.
+    """
+    table = standard_values(series, low, high)
+    r1, r2 = np.broadcast_arrays(np.asarray(r1, dtype=float), np.asarray(r2, dtype=float))
+    target = r2 / (r1 + r2)
+
+    per_decade = len(_mantissas(series))
+    count = int(np.ceil(2 * per_decade * np.log10(window))) + 2
+    start = np.searchsorted(table, r2 / window)
+    candidates_r2 = table[np.clip(start[..., None] + np.arange(count), 0, len(table) - 1)]
+
+    ideal_r1 = candidates_r2 * (1 - target[..., None]) / target[..., None]
+    upper = np.clip(np.searchsorted(table, ideal_r1), 0, len(table) - 1)
+    candidates_r1 = np.stack([table[np.clip(upper - 1, 0, len(table) - 1)], table[upper]], axis=-1)
+    candidates_r2 = np.broadcast_to(candidates_r2[..., None], candidates_r1.shape)
+
+    ratio = candidates_r2 / (candidates_r1 + candidates_r2)
+    error = np.abs(ratio / target[..., None, None] - 1)
+    flat = error.reshape(error.shape[:-2] + (-1,))
+    best = np.argmin(flat, axis=-1)[..., None]
+
+    def pick(array):
+        return np.take_along_axis(array.reshape(flat.shape), best, axis=-1)[..., 0]
+
+    result = {"R1": pick(candidates_r1), "R2": pick(candidates_r2), "ratio": pick(ratio), "ratio_error": pick(error)}
+    if vdd is not None:
+        result["V_G"] = vdd * result["ratio"]
+    return result
@@ -2,33 +2,14 @@ from crewai import Agent, Task
 from crewai.tools import BaseTool
 from typing import Any, Dict
 
-import litellm
+from agents.llm_client import GeminiLLM
+from agents.design_solver import design_amplifier
 import os
 from typing import Any, Dict, List
 
 from pydantic import Field
 
 
-
-
-
-
-class GeminiLLM:
-    def __init__(self, model_name="gemini/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
-
-
-
 # Initialize the custom LLM for CrewAI
 llm = GeminiLLM()
 
@@ -170,17 +151,33 @@ class CommonGateFormulaTool(BaseTool):
         }
 
 
+class AmplifierDesignSolverTool(BaseTool):
+    name: str = "MOSFET Amplifier Design Solver Tool"
+    description: str = ("Numerically solves Common Source, Common Drain or Common Gate designs: given the "
+                        "topology, target gain, VDD and input amplitude (plus optional MOSFET parameters "
+                        "vth, kp, w_over_l, lam) returns RD, RS, R1, R2 and the bias point.")
+
+    def _run(self, topology: str, gain: float, vdd: float, vin_amplitude: float = 0.0,
+             mosfet_parameters: Dict[str, float] = None) -> Dict[str, Any]:
+        try:
+            return design_amplifier(topology, float(gain), float(vdd), vin_amplitude=float(vin_amplitude),
+                                    **(mosfet_parameters or {}))
+        except ValueError as exc:
+            return {"error": f"No design found for {topology} with gain {gain} at VDD={vdd}: {exc}"}
+
+
 # Initialize the tools
 common_source_tool = CommonSourceFormulaTool()
 common_drain_tool = CommonDrainFormulaTool()
 common_gate_tool = CommonGateFormulaTool()
+design_solver_tool = AmplifierDesignSolverTool()
 
 # Create a MOSFET engineer agent that uses these tools
 formulas_equations_engineer = Agent(
     role="MOSFET Circuit Design Engineer",
     goal="Design and analyze MOSFET amplifier circuits to meet user specifications",
     backstory="An expert in analog electronics with specialization in MOSFET amplifier design. You apply the right formulas to calculate component values and predict circuit performance.",
-    tools=[common_source_tool, common_drain_tool, common_gate_tool],
+    tools=[common_source_tool, common_drain_tool, common_gate_tool, design_solver_tool],
     verbose=True,
     llm=llm
 )
@@ -190,7 +187,8 @@ formula_calculation_task = Task(
     description=(
         "1. Identify the MOSFET circuit topology based on user requirements\n"
         "2. Retrieve the appropriate formulas using the relevant formula tool\n"
-        "3. Apply the formulas to calculate all circuit parameters and component values\n"
+        "3. Calculate all component values and the bias point with the design solver tool, "
+        "using the formulas to explain the results\n"
         "4. Make reasonable assumptions for any unknown values\n"
         "5. Verify that the calculated values meet the specified requirements\n"
         "6. Output a comprehensive design with all parameters and analysis results"
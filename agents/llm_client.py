@@ -0,0 +1,194 @@
+"""
+Shared LLM client used by every agent module.
+
+Completions are cached on disk, keyed by model, messages and call parameters, so
+re-running the same design prompt returns without another round trip to the provider.
+The cache location and limits can be tuned through environment variables:
+
+    CIRCUIT_LLM_CACHE            path of the cache file ("" disables caching)
+    CIRCUIT_LLM_CACHE_MAX_BYTES  size bound before LRU eviction (default 256 MiB)
+    CIRCUIT_LLM_CACHE_TTL        entry lifetime in seconds (default 7 days)
+
+The client is asyncio-native: ``agenerate`` and ``astream`` use litellm's async
+streaming completion and all sessions share one background event loop. The
+synchronous ``generate`` used by CrewAI runs on that loop too and forwards tokens
+to the handler installed with ``stream_tokens`` as they arrive.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import os
+import queue
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+import litellm
+
+from agents.cache import DEFAULT_CACHE_DIR, DiskCache, make_key
+
+
+DEFAULT_MODEL = "gemini/gemini-2.0-flash-lite"
+
+_response_cache: Optional[DiskCache] = None
+_response_cache_lock = threading.Lock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+# Per-session token sink; set with stream_tokens() around a kickoff.
+_token_handler: contextvars.ContextVar[Tuple[Optional[Callable], Optional[Callable]]] = contextvars.ContextVar(
+    "token_handler", default=(None, None)
+)
+
+
+def get_response_cache() -> Optional[DiskCache]:
+    """Return the process-wide response cache, creating it on first use."""
+    global _response_cache
+    path = os.getenv("CIRCUIT_LLM_CACHE", os.path.join(DEFAULT_CACHE_DIR, "llm_responses.sqlite"))
+    if not path:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = DiskCache(
+                path,
+                max_bytes=int(os.getenv("CIRCUIT_LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+                ttl=float(os.getenv("CIRCUIT_LLM_CACHE_TTL", 7 * 24 * 3600)),
+            )
+        return _response_cache
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop, started on a daemon thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _loop
+
+
+def run_coroutine(coro) -> Any:
+    """Run a coroutine on the shared event loop and block until it completes."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+@contextlib.contextmanager
+def stream_tokens(
+    handler: Optional[Callable[[str], None]],
+    usage_handler: Optional[Callable[[Dict[str, Any]], None]] = None,
+):
+    """
+    Forward every generated token to handler while the block is active.
+
+    Args:
+        handler (Callable[[str], None]): Called with each text delta, in the thread
+            that invoked ``generate``.
+        usage_handler (Callable[[Dict[str, Any]], None], optional): Called once per
+            completion with its prompt/completion token counts.
+    """
+    token = _token_handler.set((handler, usage_handler))
+    try:
+        yield
+    finally:
+        _token_handler.reset(token)
+
+
+class GeminiLLM:
+    def __init__(self, model_name=DEFAULT_MODEL, cache: Optional[DiskCache] = None, **params):
+        self.model_name = model_name
+        self.params = params
+        self.cache = cache if cache is not None else get_response_cache()
+
+    def cache_key(self, messages: List[Dict[str, Any]]) -> str:
+        return make_key(self.model_name, messages, self.params)
+
+    async def _events(self, messages) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("text", delta) events as they stream, then a single ("usage", dict) event."""
+        key = self.cache_key(messages)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield "text", cached.decode("utf-8")
+                yield "usage", {"prompt_tokens": 0, "completion_tokens": 0, "cached": True}
+                return
+
+        response = await litellm.acompletion(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            **{"stream_options": {"include_usage": True}, **self.params}
+        )
+        parts = []
+        usage = None
+        async for chunk in response:
+            usage = getattr(chunk, "usage", None) or usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield "text", delta
+
+        if self.cache is not None and parts:
+            self.cache.set(key, "".join(parts).encode("utf-8"))
+        yield "usage", {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) if usage else 0,
+            # Providers that omit usage in streams are approximated by the chunk count
+            "completion_tokens": getattr(usage, "completion_tokens", 0) if usage else len(parts),
+            "cached": False,
+        }
+
+    async def astream(self, messages) -> AsyncIterator[str]:
+        """Yield text deltas as the provider streams them; cached responses arrive as one chunk."""
+        async for kind, value in self._events(messages):
+            if kind == "text":
+                yield value
+
+    async def agenerate(self, messages) -> str:
+        return "".join([delta async for delta in self.astream(messages)])
+
+    def _sync_events(self, messages) -> Iterator[Tuple[str, Any]]:
+        events: "queue.Queue[Any]" = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for event in self._events(messages):
+                    events.put(event)
+            except BaseException as exc:
+                events.put(exc)
+            finally:
+                events.put(done)
+
+        asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+        while True:
+            item = events.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def stream(self, messages) -> Iterator[str]:
+        """Synchronous view of astream driven by the shared event loop."""
+        for kind, value in self._sync_events(messages):
+            if kind == "text":
+                yield value
+
+    def generate(self, messages):
+        handler, usage_handler = _token_handler.get()
+        parts = []
+        for kind, value in self._sync_events(messages):
+            if kind == "text":
+                parts.append(value)
+                if handler is not None:
+                    handler(value)
+            elif usage_handler is not None:
+                usage_handler(value)
+        return "".join(parts)
+
+    def chat(self, messages):
+        return self.generate(messages)
+
+
+# Initialize the custom LLM for CrewAI
+llm = GeminiLLM()
@@ -1,25 +1,10 @@
 
 from typing import Any
 from crewai import Agent, Task
-import litellm
+from agents.llm_client import GeminiLLM
 import os
 
 
-
-class GeminiLLM:
-    def __init__(self, model_name="gemini/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
-
 # Initialize the custom LLM for CrewAI
 llm = GeminiLLM()
 
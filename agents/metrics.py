@@ -0,0 +1,310 @@
+"""
+Performance metrics of simulated amplifiers, computed from AC and transient vectors.
+
+Each metric is one vectorized pass over its input. The last axis runs over frequency
+or time, and any leading axes are a batch: one simulation, or the stacked points of a
+sweep (agents.sweep), use the same code. The abscissa may be a single row or stacked
+like the vectors. Stacked rows share one axis after sweep stacking, so the first finite
+row is used.
+
+    midband_gain        peak |H| of the AC response and where it occurs
+    bandwidth           -3 dB points interpolated on a log axis, and their distance
+    phase_margin        180 deg + phase of a loop gain where |L| falls through 1
+    harmonic_distortion THD by FFT over an integer number of periods of a transient
+    supply_power        average power drawn from a supply (operating point or transient)
+    integrated_noise    RMS noise from a noise spectral density
+
+extract_metrics applies them to a results dictionary (NgSpiceService.simulate,
+agents.spice_sim, a rawfile or a sweep) under the parameter names
+ValidationReportGeneratorTool checks.
+"""
+
+from typing import Any, Dict, Mapping, Optional, Union
+
+import numpy as np
+
+from agents.mna import cutoff_frequencies
+
+
+# Resampling density for the THD FFT and the number of harmonics summed by default
+SAMPLES_PER_PERIOD = 256
+HARMONICS = 9
+
+
+def _axis(values: Any) -> np.ndarray:
+    """One real abscissa row from a 1-D or stacked abscissa."""
+    axis = np.real(np.asarray(values, dtype=complex if np.iscomplexobj(values) else float))
+    if axis.ndim == 1:
+        return axis
+    rows = axis.reshape(-1, axis.shape[-1])
+    finite = np.flatnonzero(np.isfinite(rows).all(axis=-1))
+    return rows[finite[0] if len(finite) else 0]
+
+
+def midband_gain(frequency: np.ndarray, response: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Peak magnitude of a frequency response.
+
+    Args:
+        frequency (np.ndarray): Frequency grid in Hz.
+        response (np.ndarray): Complex transfer function; the last axis runs over frequency.
+
+    Returns:
+        Dict[str, np.ndarray]: gain (V/V), gain_db and the frequency of the peak.
+    """
+    f = _axis(frequency)
+    magnitude = np.abs(response)
+    peak = np.argmax(magnitude, axis=-1)
+    gain = np.take_along_axis(magnitude, peak[..., None], axis=-1)[..., 0]
+    with np.errstate(divide="ignore"):
+        gain_db = 20 * np.log10(gain)
+    return {"gain": gain, "gain_db": gain_db, "frequency": f[peak]}
+
+
+def bandwidth(frequency: np.ndarray, response: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    -3 dB points of a frequency response around its peak.
+
+    Args:
+        frequency (np.ndarray): Frequency grid in Hz, ascending.
+        response (np.ndarray): Complex transfer function; the last axis runs over frequency.
+
+    Returns:
+        Dict[str, np.ndarray]: low_cutoff and high_cutoff (0 / inf where the response
+        does not fall 3 dB inside the grid) and bandwidth, their difference.
+    """
+    magnitude_db = 20 * np.log10(np.maximum(np.abs(response), 1e-300))
+    cutoffs = cutoff_frequencies(_axis(frequency), magnitude_db)
+    return {
+        "low_cutoff": cutoffs["low_cutoff"],
+        "high_cutoff": cutoffs["high_cutoff"],
+        "bandwidth": cutoffs["high_cutoff"] - cutoffs["low_cutoff"],
+    }
+
+
+def phase_margin(frequency: np.ndarray, loop_gain: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Phase margin of a loop gain L, for a closed loop L / (1 + L).
+
+    The last frequency at which |L| falls through 1 is the crossover; magnitude is
+    interpolated on log-log axes and the unwrapped phase linearly in log frequency.
+
+    Args:
+        frequency (np.ndarray): Frequency grid in Hz, ascending.
+        loop_gain (np.ndarray): Complex loop gain; the last axis runs over frequency.
+
+    Returns:
+        Dict[str, np.ndarray]: phase_margin in degrees, wrapped to (-180, 180], and
+        crossover_frequency; both NaN where |L| never crosses 1 inside the grid.
+    """
+    log_f = np.log10(_axis(frequency))
+    with np.errstate(divide="ignore"):
+        log_magnitude = np.log10(np.abs(loop_gain))
+    phase = np.degrees(np.unwrap(np.angle(loop_gain), axis=-1))
+    above = log_magnitude >= 0
+    falling = above[..., :-1] & ~above[..., 1:]
+    found = falling.any(axis=-1)
+    index = falling.shape[-1] - 1 - np.argmax(falling[..., ::-1], axis=-1)
+
+    def at(values: np.ndarray, offset: int) -> np.ndarray:
+        return np.take_along_axis(values, (index + offset)[..., None], axis=-1)[..., 0]
+
+    m0, m1 = at(log_magnitude, 0), at(log_magnitude, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(m1 != m0, -m0 / (m1 - m0), 0.0)
+    crossover = 10 ** (log_f[index] + t * (log_f[index + 1] - log_f[index]))
+    margin = 180.0 + at(phase, 0) + t * (at(phase, 1) - at(phase, 0))
+    margin = 180.0 - np.mod(180.0 - margin, 360.0)
+    return {
+        "phase_margin": np.where(found, margin, np.nan),
+        "crossover_frequency": np.where(found, crossover, np.nan),
+    }
+
+
+def fundamental_frequency(time: np.ndarray, waveform: np.ndarray) -> Optional[float]:
+    """
+    Frequency of a periodic waveform from its rising mean crossings (first row if stacked).
+
+    Returns:
+        float or None: The frequency in Hz, or None with fewer than two rising crossings.
+    """
+    t = _axis(time)
+    y = np.asarray(waveform, dtype=float).reshape(-1, len(t))[0]
+    y = y - y.mean()
+    rising = np.flatnonzero((y[:-1] < 0) & (y[1:] >= 0))
+    if len(rising) < 2:
+        return None
+    # Interpolated crossing instants
+    crossings = t[rising] - y[rising] * (t[rising + 1] - t[rising]) / (y[rising + 1] - y[rising])
+    return float((len(crossings) - 1) / (crossings[-1] - crossings[0]))
+
+
+def harmonic_distortion(
+    time: np.ndarray,
+    waveform: np.ndarray,
+    fundamental: float,
+    harmonics: int = HARMONICS,
+    periods: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Total harmonic distortion of a transient waveform.
+
+    The last whole periods of the record (all that fit, or the last `periods`) are
+    resampled onto a uniform grid, so the non-uniform steps of adaptive simulators are
+    fine and the fundamental and every harmonic fall exactly on FFT bins.
+
+    Args:
+        time (np.ndarray): Time points, ascending.
+        waveform (np.ndarray): Waveform; the last axis runs over time.
+        fundamental (float): Fundamental frequency in Hz.
+        harmonics (int, optional): Harmonics above the fundamental to include.
+        periods (int, optional): Periods to analyze, counted back from the end.
+
+    Returns:
+        Dict[str, np.ndarray]: thd (ratio), thd_percent, fundamental_amplitude and
+        harmonic_amplitudes (last axis: 2nd, 3rd, ... harmonic).
+
+    Raises:
+        ValueError: If the record is shorter than one period.
+    """
+    t = _axis(time)
+    y = np.asarray(waveform, dtype=float)
+    period = 1.0 / fundamental
+    available = int(np.floor((t[-1] - t[0]) / period * (1 + 1e-9)))
+    count = available if periods is None else min(periods, available)
+    if count < 1:
+        raise ValueError(f"The record ({t[-1] - t[0]:g} s) is shorter than one period ({period:g} s)")
+    samples = count * max(SAMPLES_PER_PERIOD, 4 * (harmonics + 1))
+    grid = t[-1] - count * period + np.arange(samples) * (count * period / samples)
+    # Linear interpolation of every row at once
+    right = np.clip(np.searchsorted(t, grid, side="right"), 1, len(t) - 1)
+    weight = (grid - t[right - 1]) / (t[right] - t[right - 1])
+    sampled = y[..., right - 1] * (1 - weight) + y[..., right] * weight
+    spectrum = np.abs(np.fft.rfft(sampled, axis=-1)) * (2.0 / samples)
+    bins = count * np.arange(2, harmonics + 2)
+    bins = bins[bins < spectrum.shape[-1]]
+    fundamental_amplitude = spectrum[..., count]
+    harmonic_amplitudes = spectrum[..., bins]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        thd = np.sqrt(np.sum(harmonic_amplitudes ** 2, axis=-1)) / fundamental_amplitude
+    return {
+        "thd": thd,
+        "thd_percent": 100 * thd,
+        "fundamental_amplitude": fundamental_amplitude,
+        "harmonic_amplitudes": harmonic_amplitudes,
+    }
+
+
+def supply_power(
+    supply_voltage: np.ndarray,
+    supply_current: np.ndarray,
+    time: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Power drawn from a voltage supply.
+
+    Args:
+        supply_voltage (np.ndarray): Voltage across the supply.
+        supply_current (np.ndarray): Its SPICE branch current (positive into the + terminal,
+            so negative while the supply delivers power).
+        time (np.ndarray, optional): Time points; the power is then averaged over the
+            record with the trapezoidal rule (steps need not be uniform).
+
+    Returns:
+        np.ndarray: Delivered power in W.
+    """
+    power = -np.asarray(supply_voltage, dtype=float) * np.asarray(supply_current, dtype=float)
+    if time is None:
+        return power
+    t = _axis(time)
+    energy = np.sum(0.5 * (power[..., 1:] + power[..., :-1]) * np.diff(t), axis=-1)
+    return energy / (t[-1] - t[0])
+
+
+def integrated_noise(frequency: np.ndarray, density: np.ndarray) -> np.ndarray:
+    """
+    RMS noise over a band from a spectral density.
+
+    Args:
+        frequency (np.ndarray): Frequency grid in Hz, ascending.
+        density (np.ndarray): Noise density in V/sqrt(Hz) (or A/sqrt(Hz)); the last axis
+            runs over frequency.
+
+    Returns:
+        np.ndarray: The RMS value, sqrt of the integrated power density.
+    """
+    f = _axis(frequency)
+    power = np.abs(np.asarray(density)) ** 2
+    return np.sqrt(np.sum(0.5 * (power[..., 1:] + power[..., :-1]) * np.diff(f), axis=-1))
+
+
+def extract_metrics(
+    results: Mapping[str, Mapping[str, Any]],
+    output_node: str = "vout",
+    input_node: str = "vin",
+    supply: str = "vdd",
+    fundamental: Optional[float] = None,
+    loop_gain: Optional[Union[str, np.ndarray]] = None,
+) -> Dict[str, Any]:
+    """
+    Compute every metric the results support, under the names the validation report uses.
+
+    Args:
+        results (Mapping[str, Mapping[str, Any]]): Analysis name to vector name to values,
+            from one simulation or stacked by a sweep.
+        output_node (str, optional): Amplifier output node.
+        input_node (str, optional): Node driven by the input source; the AC response is
+            V(output) / V(input) when it is present.
+        supply (str, optional): Supply source, also taken as the name of its + node.
+        fundamental (float, optional): Input frequency for the THD; found from the input
+            (or output) waveform when omitted.
+        loop_gain (str or np.ndarray, optional): Loop gain of a feedback amplifier, as the
+            name of an AC vector or the complex values on the AC frequency grid. The phase
+            margin is only computed from it: the closed-loop V(output) / V(input) is not a
+            loop gain.
+
+    Returns:
+        Dict[str, Any]: voltage_gain (midband, V/V), low_cutoff, high_cutoff and bandwidth
+        (Hz), phase_margin (deg) and crossover_frequency (Hz) when a loop gain is given,
+        distortion (THD, %), power_consumption (W) and noise (V rms): whichever the
+        analyses present allow. The AC figures need an AC stimulus at the input.
+        Values are floats for a single simulation and arrays for stacked results.
+    """
+    metrics: Dict[str, Any] = {}
+    ac = results.get("ac", {})
+    stimulus = np.asarray(ac[input_node]) if input_node in ac else None
+    # An input without AC excitation makes the gain 0 / 0; leave it out instead of NaN
+    if "frequency" in ac and output_node in ac and (stimulus is None or np.any(stimulus != 0)):
+        response = np.asarray(ac[output_node])
+        if stimulus is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                response = response / stimulus
+        metrics["voltage_gain"] = midband_gain(ac["frequency"], response)["gain"]
+        metrics.update(bandwidth(ac["frequency"], response))
+    loop = ac.get(loop_gain) if isinstance(loop_gain, str) else loop_gain
+    if "frequency" in ac and loop is not None:
+        metrics.update(phase_margin(ac["frequency"], np.asarray(loop)))
+
+    tran = results.get("tran", {})
+    if "time" in tran and output_node in tran:
+        frequency = fundamental or fundamental_frequency(tran["time"], tran.get(input_node, tran[output_node]))
+        if frequency is not None:
+            try:
+                metrics["distortion"] = harmonic_distortion(tran["time"], tran[output_node], frequency)["thd_percent"]
+            except ValueError:
+                pass
+
+    branch = f"{supply}#branch"
+    if "time" in tran and supply in tran and branch in tran:
+        metrics["power_consumption"] = supply_power(tran[supply], tran[branch], tran["time"])
+    elif supply in results.get("op", {}) and branch in results.get("op", {}):
+        metrics["power_consumption"] = supply_power(results["op"][supply], results["op"][branch])
+
+    noise = results.get("noise", {})
+    if "frequency" in noise and "onoise_spectrum" in noise:
+        metrics["noise"] = integrated_noise(noise["frequency"], noise["onoise_spectrum"])
+    elif "onoise_total" in noise:
+        metrics["noise"] = np.asarray(noise["onoise_total"], dtype=float)
+
+    return {name: float(value) if np.ndim(value) == 0 else np.asarray(value) for name, value in metrics.items()}
+
@@ -0,0 +1,201 @@
+"""
+Modified nodal analysis (MNA) of small-signal amplifier models in the frequency domain.
+
+The element lists produced by the small-signal tools (gm*vgs, rd, Rd, Rs, Rg, Cgs, Cgd)
+are stamped into a conductance matrix G and a capacitance matrix C. The input is driven
+by an ideal 1 V AC source (one extra MNA row), and Y(jω) = G + jωC is assembled for every
+frequency point and solved in a single batched numpy.linalg.solve.
+
+Element values may be arrays, in which case a batch of designs is solved at once and
+responses come back with shape (designs, frequencies).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Supply and ground rails are AC ground in a small-signal model
+AC_GROUND = {"gnd", "0", "vdd"}
+
+# Input node, output node and any extra AC-grounded terminals per topology
+TOPOLOGY_PORTS = {
+    "Common Source": ("gate", "drain", ("source",)),  # RS bypassed by CS
+    "Common Drain": ("gate", "source", ("drain",)),
+    "Common Gate": ("source", "drain", ("gate",)),
+}
+
+# Controlling voltages of dependent sources, as (positive node, negative node)
+CONTROL_NODES = {"vgs": ("gate", "source")}
+
+# Shunt conductance from every node to ground, as SPICE does, so floating nodes stay solvable
+GMIN = 1e-12
+
+
+def element_value(value: Any) -> np.ndarray:
+    """Numeric value of an element: numbers and arrays pass through, "4700 Ω" strings are parsed."""
+    if isinstance(value, str):
+        return np.asarray(float(value.split()[0]))
+    return np.asarray(value, dtype=float)
+
+
+def _element_kind(element: Dict[str, Any]) -> Tuple[str, Optional[Tuple[str, str]]]:
+    name = element["name"]
+    if "*" in name:
+        control = name.split("*")[1].strip().lower()
+        if control not in CONTROL_NODES:
+            raise ValueError(f"Unsupported controlling voltage in element {name!r}")
+        return "vccs", CONTROL_NODES[control]
+    if name[0].upper() == "C":
+        return "capacitor", None
+    if name[0].upper() == "R":
+        return "resistor", None
+    raise ValueError(f"Unsupported small-signal element {name!r}")
+
+
+def ac_response(
+    elements: List[Dict[str, Any]],
+    input_node: str,
+    output_node: str,
+    frequencies: Sequence[float],
+    ac_ground: Sequence[str] = (),
+    source_resistance: float = 0.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Solve the small-signal transfer function V(output_node) / V(input) over a frequency grid.
+
+    Args:
+        elements (List[Dict[str, Any]]): Elements as listed in small_signal_model["elements"];
+            each has a name, "from" and "to" nodes and a value. Resistors and capacitors are
+            recognised by the leading R/C of their name, "gm*vgs" is a voltage-controlled
+            current source flowing from "from" to "to".
+        input_node (str): Node driven by the 1 V AC source.
+        output_node (str): Node whose voltage is the response.
+        frequencies (Sequence[float]): Frequency points in Hz.
+        ac_ground (Sequence[str], optional): Extra nodes tied to AC ground (bypassed terminals).
+        source_resistance (float, optional): Thevenin resistance of the signal source.
+
+    Returns:
+        Dict[str, np.ndarray]: frequencies, the complex response, magnitude_db and phase_deg.
+    """
+    grounded = AC_GROUND | set(ac_ground)
+    frequencies = np.asarray(frequencies, dtype=float)
+    parsed = [(element, *_element_kind(element), element_value(element["value"])) for element in elements]
+    batch = np.broadcast_shapes(*(value.shape for *_, value in parsed)) if parsed else ()
+
+    source_node = "_source" if source_resistance > 0 else input_node
+    nodes: Dict[str, int] = {}
+    for name in [source_node, input_node, output_node] + [
+        node for element in elements for node in (element["from"], element["to"])
+    ]:
+        if name not in grounded and name not in nodes:
+            nodes[name] = len(nodes)
+    if input_node in grounded or output_node in grounded:
+        raise ValueError("Input and output nodes must not be AC ground")
+
+    size = len(nodes) + 1  # node voltages plus the input source current
+    G = np.zeros(batch + (size, size))
+    C = np.zeros(batch + (size, size))
+
+    def stamp(matrix, a, b, value):
+        i, j = nodes.get(a), nodes.get(b)
+        if i is not None:
+            matrix[..., i, i] += value
+        if j is not None:
+            matrix[..., j, j] += value
+        if i is not None and j is not None:
+            matrix[..., i, j] -= value
+            matrix[..., j, i] -= value
+
+    for element, kind, control, value in parsed:
+        a, b = element["from"], element["to"]
+        if kind == "resistor":
+            with np.errstate(divide="ignore"):
+                stamp(G, a, b, np.where(value > 0, 1 / np.where(value > 0, value, 1.0), 0.0))
+        elif kind == "capacitor":
+            stamp(C, a, b, value)
+        else:
+            # Current gm * (V+ - V-) leaves node a and enters node b
+            for row, sign in ((nodes.get(a), 1.0), (nodes.get(b), -1.0)):
+                if row is None:
+                    continue
+                for col, polarity in ((nodes.get(control[0]), 1.0), (nodes.get(control[1]), -1.0)):
+                    if col is not None:
+                        G[..., row, col] += sign * polarity * value
+
+    if source_resistance > 0:
+        stamp(G, source_node, input_node, 1 / source_resistance)
+    index = np.arange(len(nodes))
+    G[..., index, index] += GMIN
+    driven = nodes[source_node]
+    G[..., driven, -1] = 1.0
+    G[..., -1, driven] = 1.0
+
+    omega = 2 * np.pi * frequencies
+    Y = G[..., None, :, :] + 1j * omega[:, None, None] * C[..., None, :, :]
+    rhs = np.zeros(Y.shape[:-1], dtype=complex)
+    rhs[..., -1] = 1.0
+    response = np.linalg.solve(Y, rhs[..., None])[..., nodes[output_node], 0]
+
+    with np.errstate(divide="ignore"):
+        magnitude_db = 20 * np.log10(np.abs(response))
+    return {
+        "frequencies": frequencies,
+        "response": response,
+        "magnitude_db": magnitude_db,
+        "phase_deg": np.degrees(np.angle(response)),
+    }
+
+
+def topology_response(
+    topology: str,
+    elements: List[Dict[str, Any]],
+    frequencies: Sequence[float],
+    source_resistance: float = 0.0,
+) -> Dict[str, np.ndarray]:
+    """Run ac_response with the input/output nodes of a "Common Source/Drain/Gate" model."""
+    if topology not in TOPOLOGY_PORTS:
+        raise ValueError("Invalid topology specified. Must be one of: Common Source, Common Drain, or Common Gate")
+    input_node, output_node, ac_ground = TOPOLOGY_PORTS[topology]
+    return ac_response(elements, input_node, output_node, frequencies, ac_ground, source_resistance)
+
+
+def cutoff_frequencies(frequencies: np.ndarray, magnitude_db: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Locate the -3 dB points around the peak of one or more magnitude responses.
+
+    Args:
+        frequencies (np.ndarray): Frequency grid in Hz, ascending.
+        magnitude_db (np.ndarray): Magnitudes in dB; the last axis runs over frequency.
+
+    Returns:
+        Dict[str, np.ndarray]: peak_db, low_cutoff and high_cutoff (interpolated on a log
+        frequency axis; 0 / inf where the response does not fall 3 dB inside the grid).
+    """
+    magnitude_db = np.asarray(magnitude_db, dtype=float)
+    log_f = np.log10(frequencies)
+    peak_index = np.argmax(magnitude_db, axis=-1)
+    peak_db = np.take_along_axis(magnitude_db, peak_index[..., None], axis=-1)[..., 0]
+    below = magnitude_db < peak_db[..., None] - 3.0
+    position = np.arange(magnitude_db.shape[-1])
+
+    def crossing(mask, neighbour_offset, default):
+        has = mask.any(axis=-1)
+        index = np.where(
+            neighbour_offset > 0,
+            np.where(has, mask.shape[-1] - 1 - np.argmax(mask[..., ::-1], axis=-1), 0),
+            np.where(has, np.argmax(mask, axis=-1), 0),
+        )
+        other = np.clip(index + neighbour_offset, 0, mask.shape[-1] - 1)
+        m0 = np.take_along_axis(magnitude_db, index[..., None], axis=-1)[..., 0]
+        m1 = np.take_along_axis(magnitude_db, other[..., None], axis=-1)[..., 0]
+        target = peak_db - 3.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(m1 != m0, (target - m0) / (m1 - m0), 0.0)
+        log_cut = log_f[index] + t * (log_f[other] - log_f[index])
+        # Rows without a crossing interpolate garbage; keep it out of the power
+        return np.where(has, 10 ** np.where(has, log_cut, 0.0), default)
+
+    low = crossing(below & (position < peak_index[..., None]), 1, 0.0)
+    high = crossing(below & (position > peak_index[..., None]), -1, np.inf)
+    return {"peak_db": peak_db, "low_cutoff": low, "high_cutoff": high}
@@ -0,0 +1,185 @@
+"""
+Monte Carlo tolerance and yield analysis of single-stage MOSFET amplifiers.
+
+N samples of the passive component values and of the MOSFET threshold voltage and
+transconductance parameter are drawn in one go, pushed through the vectorized bias
+solver (agents.bias_solver) and small-signal evaluator (agents.connection_agent), and
+checked against the same requirement directions ValidationReportGeneratorTool applies.
+Every step is array-at-a-time, so 100k samples take a fraction of a second.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from agents.bias_solver import SATURATION, solve_bias
+from agents.connection_agent import evaluate_small_signal_batch
+from agents.validation_agent import meets_requirement
+
+
+# Requirements the sampled metrics can be checked against
+REQUIREMENTS = ("voltage_gain", "bandwidth", "power_consumption")
+
+
+@dataclass
+class Tolerances:
+    """
+    Manufacturing spread of each quantity.
+
+    Resistor and capacitor tolerances are the ± band of the part (treated as 3σ of a
+    normal distribution, truncated to the band). MOSFET spreads are 1σ.
+    """
+    resistor: float = 0.05
+    capacitor: float = 0.10
+    vth_sigma: float = 0.03   # absolute, V
+    kp_sigma: float = 0.05    # relative
+
+
+def _banded(rng: np.random.Generator, nominal: float, tolerance: float, n: int) -> np.ndarray:
+    spread = np.clip(rng.standard_normal(n) / 3, -1, 1) * tolerance
+    return nominal * (1 + spread)
+
+
+def sample_design(
+    values: Dict[str, Any],
+    mosfet: Dict[str, float],
+    n: int,
+    tolerances: Tolerances,
+    rng: np.random.Generator,
+) -> Dict[str, np.ndarray]:
+    """
+    Draw n samples of every component value and MOSFET parameter.
+
+    Args:
+        values (Dict[str, Any]): Nominal component values as produced by the design solver
+            (RD, RS, R1, R2 and optionally CIN, C_gs, C_gd).
+        mosfet (Dict[str, float]): Nominal vth, kp, w, l and lambda.
+        n (int): Number of samples.
+        tolerances (Tolerances): Spread of each quantity.
+        rng (np.random.Generator): Source of randomness.
+
+    Returns:
+        Dict[str, np.ndarray]: One array of length n per quantity.
+    """
+    samples = {
+        name: _banded(rng, values.get(name, 0.0), tolerances.resistor, n)
+        for name in ("RD", "RS", "R1", "R2")
+    }
+    samples["CIN"] = _banded(rng, values.get("CIN", 0.0), tolerances.capacitor, n)
+    # Intrinsic capacitances track the oxide and geometry, not the part tolerance
+    samples["C_gs"] = np.full(n, values.get("C_gs", 0.0))
+    samples["C_gd"] = np.full(n, values.get("C_gd", 0.0))
+    samples["vth"] = mosfet["vth"] + tolerances.vth_sigma * rng.standard_normal(n)
+    samples["kp"] = mosfet["kp"] * (1 + tolerances.kp_sigma * rng.standard_normal(n))
+    return samples
+
+
+def evaluate_samples(
+    topology: str,
+    samples: Dict[str, np.ndarray],
+    vdd: float,
+    mosfet: Dict[str, float],
+) -> Dict[str, np.ndarray]:
+    """
+    Bias and small-signal metrics of every sample.
+
+    Args:
+        topology (str): "Common Source", "Common Drain" or "Common Gate".
+        samples (Dict[str, np.ndarray]): Output of sample_design.
+        vdd (float): Supply voltage.
+        mosfet (Dict[str, float]): Nominal MOSFET parameters (w, l and lambda are not varied).
+
+    Returns:
+        Dict[str, np.ndarray]: voltage_gain (magnitude), bandwidth, power_consumption,
+        the -3 dB points, I_D and a saturated flag per sample.
+    """
+    # The Common Drain drain is tied to VDD
+    rd = np.zeros_like(samples["RD"]) if topology == "Common Drain" else samples["RD"]
+    bias = solve_bias(
+        vdd, samples["R1"], samples["R2"], rd, samples["RS"],
+        vth=samples["vth"], kn=samples["kp"] * mosfet["w"] / mosfet["l"], lam=mosfet["lambda"],
+    )
+    rg = samples["R1"] * samples["R2"] / (samples["R1"] + samples["R2"])
+    metrics = evaluate_small_signal_batch(
+        topology, bias["g_m"], bias["r_o"],
+        Rd=rd,
+        # RS is bypassed by CS in the Common Source stage
+        Rs=0.0 if topology == "Common Source" else samples["RS"],
+        Rg=rg, Cgs=samples["C_gs"], Cgd=samples["C_gd"], Cin=samples["CIN"],
+    )
+    return {
+        "voltage_gain": np.abs(metrics["voltage_gain"]),
+        "bandwidth": metrics["high_cutoff"] - metrics["low_cutoff"],
+        "power_consumption": vdd * (bias["I_D"] + vdd / (samples["R1"] + samples["R2"])),
+        "low_cutoff": metrics["low_cutoff"],
+        "high_cutoff": metrics["high_cutoff"],
+        "I_D": bias["I_D"],
+        "saturated": bias["region"] == SATURATION,
+    }
+
+
+def run_monte_carlo(
+    topology: str,
+    values: Dict[str, Any],
+    vdd: float,
+    mosfet: Dict[str, float],
+    requirements: Dict[str, float],
+    n: int = 100_000,
+    seed: Optional[int] = None,
+    tolerances: Optional[Tolerances] = None,
+) -> Dict[str, Any]:
+    """
+    Estimate the production yield of a design.
+
+    Args:
+        topology (str): "Common Source", "Common Drain" or "Common Gate".
+        values (Dict[str, Any]): Nominal component values from the design solver.
+        vdd (float): Supply voltage.
+        mosfet (Dict[str, float]): Nominal vth, kp, w, l and lambda.
+        requirements (Dict[str, float]): Required value per parameter (voltage_gain,
+            bandwidth, power_consumption), checked in the validation tool's direction.
+        n (int, optional): Number of samples.
+        seed (int, optional): Seed for numpy.random.default_rng, for reproducible runs.
+        tolerances (Tolerances, optional): Component and device spread.
+
+    Returns:
+        Dict[str, Any]: Overall yield (every requirement met and the device saturated),
+        the pass rate of each requirement, and mean / 1st / 50th / 99th percentile of each
+        metric.
+
+    Raises:
+        ValueError: If a requirement is not one of REQUIREMENTS; an unchecked requirement
+            would otherwise count as met and inflate the yield.
+    """
+    unknown = sorted(set(requirements) - set(REQUIREMENTS))
+    if unknown:
+        raise ValueError(f"Cannot evaluate requirement(s) {', '.join(unknown)}; supported: {', '.join(REQUIREMENTS)}")
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    samples = sample_design(values, mosfet, n, tolerances or Tolerances(), rng)
+    metrics = evaluate_samples(topology, samples, vdd, mosfet)
+
+    passing = metrics["saturated"].copy()
+    parameter_yield = {"saturation": float(metrics["saturated"].mean())}
+    for parameter, required in requirements.items():
+        met = np.broadcast_to(meets_requirement(parameter, metrics[parameter], required), passing.shape)
+        parameter_yield[parameter] = float(met.mean())
+        passing &= met
+
+    statistics = {}
+    for name in REQUIREMENTS:
+        finite = metrics[name][np.isfinite(metrics[name])]
+        if finite.size:
+            p1, p50, p99 = np.percentile(finite, [1, 50, 99])
+            statistics[name] = {"mean": float(finite.mean()), "p1": float(p1), "p50": float(p50), "p99": float(p99)}
+
+    return {
+        "samples": n,
+        "seed": seed,
+        "yield": float(passing.mean()),
+        "parameter_yield": parameter_yield,
+        "statistics": statistics,
+        "elapsed_seconds": time.perf_counter() - start,
+    }
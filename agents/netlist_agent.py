@@ -1,32 +1,44 @@
 from crewai import Agent, Task
-import litellm
+from crewai.tools import BaseTool
+from agents.llm_client import GeminiLLM
+from agents.netlist_checker import check_netlist
+from agents.netlist_parser import NetlistParseError
 import os
+from typing import Any
 
 
-
-class GeminiLLM:
-    def __init__(self, model_name="gemini/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
-
 # Initialize the custom LLM for CrewAI
 llm = GeminiLLM()
 
+class NetlistStructureCheckTool(BaseTool):
+    name: str = "Netlist Structure Check Tool"
+    description: str = ("Checks a SPICE netlist for floating nodes, nodes without a DC path to ground, "
+                       "voltage-source loops, shorted elements and undefined models before simulation.")
+
+    def _run(self, netlist: Any) -> Any:
+        if isinstance(netlist, dict):
+            netlist = netlist.get("netlist") or netlist.get("raw_spice", "")
+        try:
+            result = check_netlist(str(netlist))
+        except NetlistParseError as e:
+            return {"error": f"Could not parse the netlist: {e}"}
+        return {
+            "passed": result.ok,
+            "errors": result.errors,
+            "warnings": result.warnings,
+            "check_time_us": round(result.elapsed * 1e6, 1)
+        }
+
+
+netlist_check_tool = NetlistStructureCheckTool()
+
 netlist_generator = Agent(
     role="High-Performance Netlist Generator",
     goal="Convert previous agent's circuit design output into precise, simulator-ready SPICE netlists for PySpice",
     backstory="You're an AI-driven circuit compiler with specialized expertise in translating circuit designs into optimized netlists for simulation environments. You've been trained on thousands of successful MOSFET circuit simulations and understand the nuances of different simulators' syntax requirements. Your netlists are known for their accuracy, completeness, and compatibility with PySpice and other simulation tools. You're meticulous about including all component connections, proper MOSFET model parameters, and simulation directives necessary for accurate analysis.",
     allow_delegation=False,
     verbose=True,
+    tools=[netlist_check_tool],
     llm=llm
 )
 
@@ -53,6 +65,8 @@ netlist_generation_task = Task(
         "3. Ensure the netlist follows correct SPICE syntax and is compatible with PySpice\n\n"
         "4. Specify output node(s) for measurement and analysis\n\n"
         "5. Format the netlist with proper indentation and organization\n\n"
+        "6. Run the Netlist Structure Check Tool on the finished netlist and fix every error it reports "
+        "(floating subnets, missing DC paths to ground, voltage-source loops, undefined models)\n\n"
         "IMPORTANT: Return ONLY the complete SPICE netlist code as your output."
     ),
     expected_output="A complete, ready-to-run SPICE netlist compatible with PySpice, containing all components, connections, MOSFET models, and simulation directives with proper formatting and commenting, and clearly defined output nodes for measurement.",
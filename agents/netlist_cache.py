@@ -0,0 +1,344 @@
+"""
+Canonical SPICE netlists and a disk cache of simulation results keyed by them.
+
+Two netlists that differ only in comments, whitespace, letter case, element order,
+model-parameter order or value spelling ("10k", "10K", "10000", "10kΩ") describe the
+same circuit, so they canonicalize to the same text and share one cache entry. The
+cache reuses agents.cache.DiskCache and is configured through the environment:
+
+    CIRCUIT_SIM_CACHE            path of the cache file ("" disables caching)
+    CIRCUIT_SIM_CACHE_MAX_BYTES  size bound before LRU eviction (default 512 MiB)
+    CIRCUIT_SIM_CACHE_TTL        entry lifetime in seconds (default: never expire)
+    CIRCUIT_SIM_REPORT_TTL       lifetime of cached LLM simulation reports (default 1 day)
+
+Simulator results are deterministic and kept until evicted. LLM simulation reports are
+not: only reports that read as a successful run are cached, and only for a limited time,
+so a failed or hallucinated run is not replayed indefinitely.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.cache import DEFAULT_CACHE_DIR, DiskCache, make_key
+
+
+# SPICE scale suffixes; anything after the suffix (units such as V, F, Ω, Hz) is ignored
+SCALE_SUFFIXES = {
+    "t": 1e12, "g": 1e9, "meg": 1e6, "k": 1e3, "mil": 25.4e-6,
+    "m": 1e-3, "u": 1e-6, "µ": 1e-6, "μ": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15,
+}
+
+NUMBER = re.compile(r"^([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(meg|mil|[tgkmuµμnpf])?([a-zω°]*)$")
+
+# Lines that carry no circuit information
+IGNORED_DIRECTIVES = (".title", ".end")
+
+# Bump when the stored result layout changes
+RESULT_FORMAT = 1
+REPORT_FORMAT = 2
+
+DEFAULT_REPORT_TTL = 24 * 3600
+
+# Wording of LLM simulation reports that did not produce results
+FAILED_REPORT = re.compile(
+    r"traceback|exception|error|fail|could not|couldn't|unable to|timed out|not converge", re.IGNORECASE
+)
+# The interpreter tool's section headers (agents.interpreter_tools), present on every run
+TOOL_HEADERS = re.compile(r"-+\s*(?:input code|execution output|errors|exit code)\s*-+", re.IGNORECASE)
+EXIT_CODE = re.compile(r"exit code\s*-*\s*:?\s*(-?\d+)", re.IGNORECASE)
+
+_simulation_cache: Optional[DiskCache] = None
+_simulation_cache_lock = threading.Lock()
+
+
+class NetlistFragment(str):
+    """
+    Netlist text extract_netlist pulled out of a code fence in LLM output.
+
+    A deck's first line is its title, but LLMs often open the fence straight with
+    elements; consumers use this marker to decide whether there is a title line at all.
+    """
+
+
+def extract_netlist(text: str) -> str:
+    """
+    Return the contents of the first fenced code block in text, or text itself.
+
+    Fenced contents come back as a NetlistFragment; text without a fence is returned
+    unchanged (a fragment stays a fragment).
+    """
+    match = re.search(r"```[^\n]*\n(.*?)```", text, re.DOTALL)
+    return NetlistFragment(match.group(1)) if match else text
+
+
+def logical_lines(netlist: str) -> List[str]:
+    """
+    Split a netlist into logical lines.
+
+    Full-line comments (*) and inline comments (; or $) are removed and "+" continuation
+    lines are joined onto the line they continue. Blank lines are dropped.
+
+    Args:
+        netlist (str): SPICE netlist text.
+
+    Returns:
+        List[str]: One string per element or directive, whitespace-collapsed.
+    """
+    lines: List[str] = []
+    for raw in netlist.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("*"):
+            continue
+        line = re.split(r"\s[;$]|^;", line, maxsplit=1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("+"):
+            if lines:
+                lines[-1] += " " + line[1:].strip()
+            continue
+        lines.append(line)
+    return [" ".join(line.split()) for line in lines]
+
+
+def parse_value(token: str) -> Optional[float]:
+    """Parse a SPICE number such as "4.7k", "1Meg", "10uF" or "2e-3"; None if token is not numeric."""
+    match = NUMBER.match(token.lower())
+    if match is None:
+        return None
+    number, suffix, _ = match.groups()
+    return float(number) * (SCALE_SUFFIXES[suffix] if suffix else 1.0)
+
+
+def _normalize_token(token: str) -> str:
+    if "=" in token:
+        key, _, value = token.partition("=")
+        return f"{key}={_normalize_token(value)}"
+    value = parse_value(token)
+    return token if value is None else format(value, ".12g")
+
+
+def _tokens(line: str) -> List[str]:
+    line = line.lower()
+    line = re.sub(r"\s*=\s*", "=", line)
+    line = re.sub(r"[(),]", " ", line)
+    return line.split()
+
+
+def _canonical_line(line: str) -> str:
+    tokens = _tokens(line)
+    if tokens[0] == ".model":
+        head, params = tokens[:3], tokens[3:]
+        return " ".join(head + sorted(_normalize_token(t) for t in params))
+    if tokens[0].startswith("."):
+        return " ".join(_normalize_token(t) for t in tokens)
+    # Element: name and nodes keep their spelling, positional values are normalized and
+    # keyword parameters (W=, L=, ...) are order-independent
+    name, rest = tokens[0], tokens[1:]
+    positional = [t for t in rest if "=" not in t]
+    keywords = sorted(_normalize_token(t) for t in rest if "=" in t)
+    node_count = {"r": 2, "c": 2, "l": 2, "v": 2, "i": 2, "d": 2, "m": 4, "q": 3, "j": 3,
+                  "e": 4, "g": 4, "f": 2, "h": 2}.get(name[0], len(positional))
+    nodes, values = positional[:node_count], positional[node_count:]
+    return " ".join([name] + nodes + [_normalize_token(t) for t in values] + keywords)
+
+
+def _canonical_block(lines: List[str]) -> List[str]:
+    elements, models, directives = [], [], []
+    for line in lines:
+        canonical = _canonical_line(line)
+        if canonical.startswith(".model"):
+            models.append(canonical)
+        elif canonical.startswith("."):
+            if not canonical.split()[0] in IGNORED_DIRECTIVES:
+                directives.append(canonical)
+        else:
+            elements.append(canonical)
+    return sorted(models) + sorted(elements) + sorted(directives)
+
+
+def canonicalize(netlist: str) -> str:
+    """
+    Rewrite a netlist into a canonical form that is identical for equivalent circuits.
+
+    Comments, continuations, case, whitespace and value spellings are normalized;
+    models, elements and analysis directives are each sorted; .subckt blocks are
+    canonicalized on their own and kept whole. .control blocks keep their order.
+
+    Args:
+        netlist (str): SPICE netlist text, optionally wrapped in a ``` code fence.
+
+    Returns:
+        str: The canonical netlist.
+    """
+    top: List[str] = []
+    subcircuits: List[str] = []
+    control: List[str] = []
+    block: Optional[List[str]] = None
+    in_control = False
+    for line in logical_lines(extract_netlist(netlist)):
+        keyword = line.split()[0].lower()
+        if in_control:
+            if keyword == ".endc":
+                in_control = False
+            else:
+                control.append(" ".join(_tokens(line)))
+        elif keyword == ".control":
+            in_control = True
+        elif keyword == ".subckt":
+            block = [" ".join(_tokens(line))]
+        elif keyword == ".ends" and block is not None:
+            subcircuits.append("\n".join(block[:1] + _canonical_block(block[1:]) + [".ends"]))
+            block = None
+        elif block is not None:
+            block.append(line)
+        else:
+            top.append(line)
+
+    parts = sorted(subcircuits) + _canonical_block(top)
+    if control:
+        parts += [".control"] + control + [".endc"]
+    return "\n".join(parts)
+
+
+def netlist_hash(netlist: str) -> str:
+    """Hex SHA-256 digest of the canonical form of netlist."""
+    return hashlib.sha256(canonicalize(netlist).encode("utf-8")).hexdigest()
+
+
+def get_simulation_cache() -> Optional[DiskCache]:
+    """Return the process-wide simulation cache, creating it on first use."""
+    global _simulation_cache
+    path = os.getenv("CIRCUIT_SIM_CACHE", os.path.join(DEFAULT_CACHE_DIR, "simulations.sqlite"))
+    if not path:
+        return None
+    with _simulation_cache_lock:
+        if _simulation_cache is None:
+            ttl = os.getenv("CIRCUIT_SIM_CACHE_TTL")
+            _simulation_cache = DiskCache(
+                path,
+                max_bytes=int(os.getenv("CIRCUIT_SIM_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+                ttl=float(ttl) if ttl else None,
+            )
+        return _simulation_cache
+
+
+def encode_results(results: Dict[str, Dict[str, Any]]) -> bytes:
+    """
+    Serialize simulation results to bytes.
+
+    Args:
+        results (Dict[str, Dict[str, Any]]): Analysis name ("op", "ac", "tran", ...) to a
+            mapping of vector name to a scalar or NumPy array (complex for AC).
+
+    Returns:
+        bytes: An uncompressed .npz archive.
+    """
+    arrays = {
+        f"{analysis}/{vector}": np.asarray(value)
+        for analysis, vectors in results.items()
+        for vector, value in vectors.items()
+    }
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_results(payload: bytes) -> Dict[str, Dict[str, Any]]:
+    """Inverse of encode_results; 0-d arrays come back as Python scalars."""
+    results: Dict[str, Dict[str, Any]] = {}
+    with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+        for name in archive.files:
+            analysis, _, vector = name.partition("/")
+            value = archive[name]
+            results.setdefault(analysis, {})[vector] = value.item() if value.ndim == 0 else value
+    return results
+
+
+def cached_simulation(
+    netlist: str,
+    simulate: Callable[[str], Dict[str, Dict[str, Any]]],
+    cache: Optional[DiskCache] = None,
+    namespace: str = "simulation",
+) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """
+    Return the simulation results of netlist, simulating only on a cache miss.
+
+    Args:
+        netlist (str): SPICE netlist text.
+        simulate (Callable[[str], Dict[str, Dict[str, Any]]]): Runs the netlist and returns
+            results in the layout accepted by encode_results.
+        cache (DiskCache, optional): Cache to use; defaults to get_simulation_cache().
+        namespace (str, optional): Separates results of different simulators.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Any]], bool]: The results and whether they came from the cache.
+    """
+    cache = cache if cache is not None else get_simulation_cache()
+    if cache is None:
+        return simulate(netlist), False
+    key = make_key(namespace, RESULT_FORMAT, netlist_hash(netlist))
+    payload = cache.get(key)
+    if payload is not None:
+        return decode_results(payload), True
+    results = simulate(netlist)
+    cache.set(key, encode_results(results))
+    return results, False
+
+
+def report_succeeded(report: str) -> bool:
+    """
+    Heuristic check that an LLM simulation report holds results rather than a failure.
+
+    A report passes if it carries numbers, exits with code 0 when it quotes one, and has
+    no error wording outside the interpreter tool's section headers.
+    """
+    text = TOOL_HEADERS.sub("", report)
+    exit_code = EXIT_CODE.search(report)
+    if exit_code is not None and int(exit_code.group(1)) != 0:
+        return False
+    return bool(re.search(r"\d", text)) and FAILED_REPORT.search(text) is None
+
+
+def cached_report(
+    netlist: str,
+    produce: Callable[[], Any],
+    cache: Optional[DiskCache] = None,
+    ttl: Optional[float] = None,
+) -> Tuple[str, bool]:
+    """
+    Text-level variant of cached_simulation for the LLM simulation stage.
+
+    Only reports that pass report_succeeded are stored, and they expire after ttl.
+
+    Args:
+        netlist (str): The netlist the report was produced from.
+        produce (Callable[[], Any]): Produces the report on a miss; its str() is stored.
+        cache (DiskCache, optional): Cache to use; defaults to get_simulation_cache().
+        ttl (float, optional): Seconds a report is reused; defaults to CIRCUIT_SIM_REPORT_TTL.
+
+    Returns:
+        Tuple[str, bool]: The report text and whether it came from the cache.
+    """
+    cache = cache if cache is not None else get_simulation_cache()
+    if cache is None:
+        return str(produce()), False
+    if ttl is None:
+        ttl = float(os.getenv("CIRCUIT_SIM_REPORT_TTL", DEFAULT_REPORT_TTL))
+    key = make_key("simulation-report", REPORT_FORMAT, netlist_hash(netlist))
+    payload = cache.get(key)
+    if payload is not None:
+        entry = json.loads(payload.decode("utf-8"))
+        if time.time() - entry["created"] <= ttl:
+            return entry["report"], True
+    report = str(produce())
+    if report_succeeded(report):
+        cache.set(key, json.dumps({"created": time.time(), "report": report}).encode("utf-8"))
+    return report, False
@@ -0,0 +1,271 @@
+"""
+Structural checks of parsed netlists, run before anything is simulated.
+
+Most netlists that make ngspice fail with "singular matrix" or "timestep too small"
+are structurally broken in a way that needs no simulation to see. Working on the
+array-backed IR of agents.netlist_parser, a handful of union-find passes and degree
+counts find them in time linear in the netlist size:
+
+    floating_node        a node only one element terminal touches
+    floating_subnet      nodes with no connection to ground at all
+    no_dc_path           nodes reaching ground only through capacitors, current sources
+                         or MOSFET gates (a capacitor / current-source cutset)
+    voltage_loop         a loop of voltage sources and inductors (shorted at DC)
+    shorted_element      every terminal of an element on the same node
+    undefined_model      a device or subcircuit instance naming a missing .model / .subckt
+
+Errors make ngspice fail; warnings are legal but almost always mistakes.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from agents.netlist_parser import GROUND, Circuit, parse_netlist
+
+
+# Terminals that conduct at DC, by element letter (None: all terminals)
+DC_TERMINALS = {
+    "r": None, "l": None, "v": None, "d": None, "q": None, "j": None, "z": None,
+    "e": (0, 1), "h": (0, 1), "b": None, "s": (0, 1), "w": (0, 1), "t": None,
+    "m": (0, 2, 3),  # drain, source and bulk (through the junctions); not the gate
+}
+
+# Elements that force a voltage (or short at DC) between their first two nodes
+VOLTAGE_DEFINED = "vehl"
+
+# Elements that need a .model card
+MODEL_REQUIRED = "dmqjzsw"
+
+
+@dataclass
+class CheckResult:
+    """Outcome of check_netlist; each issue is a dict with type, message and the nodes or elements involved."""
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    warnings: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> str:
+        return "; ".join(issue["message"] for issue in self.errors + self.warnings) or "no structural problems"
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]  # path halving
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        """Join the sets of a and b; False if they were already joined."""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        self.parent[ra] = rb
+        return True
+
+    def roots(self) -> np.ndarray:
+        return np.array([self.find(x) for x in range(len(self.parent))], dtype=np.int64)
+
+
+def _find_subcircuit(circuit: Circuit, name: str) -> Optional[Circuit]:
+    scope: Optional[Circuit] = circuit
+    while scope is not None:
+        if name in scope.subcircuits:
+            return scope.subcircuits[name]
+        scope = scope.parent
+    return None
+
+
+def _port_ids(circuit: Circuit) -> List[int]:
+    ids = {name: node for node, name in enumerate(circuit.node_names)}
+    return [0 if port in GROUND else ids[port] for port in circuit.ports if port in GROUND or port in ids]
+
+
+def _port_groups(definition: Circuit, cache: Dict[int, List[List[int]]]) -> List[List[int]]:
+    """Positions of the ports of a subcircuit that are joined at DC inside it (or via its ground)."""
+    key = id(definition)
+    if key not in cache:
+        dc = _UnionFind(definition.node_count)
+        _union_dc(definition, dc, cache)
+        groups: Dict[int, List[int]] = {}
+        for position, node in enumerate(_port_ids(definition)):
+            groups.setdefault(dc.find(node), []).append(position)
+        ground = groups.pop(dc.find(0), None)
+        cache[key] = list(groups.values()) + ([[-1] + ground] if ground else [])
+    return cache[key]
+
+
+def _union_dc(circuit: Circuit, dc: _UnionFind, cache: Dict[int, Any]) -> None:
+    # Plain lists: per-element NumPy indexing would dominate the run time
+    ptr, flat = circuit.node_ptr.tolist(), circuit.node_index.tolist()
+    for i, code in enumerate(circuit.kind.tolist()):
+        letter = chr(code)
+        nodes = flat[ptr[i]:ptr[i + 1]]
+        if letter == "x":
+            definition = _find_subcircuit(circuit, circuit.model_names[circuit.model[i]])
+            if definition is None:
+                continue
+            # Position -1 stands for the (global) ground inside the definition
+            outer = [0] + nodes
+            for group in _port_groups(definition, cache):
+                members = [outer[position + 1] for position in group if position + 1 < len(outer)]
+                for node in members[1:]:
+                    dc.union(members[0], node)
+            continue
+        if letter not in DC_TERMINALS:
+            continue
+        terminals = DC_TERMINALS[letter]
+        conducting = nodes if terminals is None else [nodes[t] for t in terminals if t < len(nodes)]
+        for node in conducting[1:]:
+            dc.union(conducting[0], node)
+
+
+def check_circuit(circuit: Circuit) -> CheckResult:
+    """
+    Run every structural check on a parsed circuit.
+
+    Args:
+        circuit (Circuit): Output of agents.netlist_parser.parse_netlist.
+
+    Returns:
+        CheckResult: Errors and warnings found, with the time the checks took.
+    """
+    start = time.perf_counter()
+    result = CheckResult()
+    names = circuit.node_names
+    count = circuit.node_count
+    lengths = np.diff(circuit.node_ptr)
+
+    # Degree counts: a node touched by a single terminal cannot carry current
+    degree = np.bincount(circuit.node_index, minlength=count)
+    ports = set(_port_ids(circuit)) - {0}
+    dangling = [n for n in np.flatnonzero(degree == 1) if n != 0 and n not in ports]
+    if dangling:
+        result.warnings.append({
+            "type": "floating_node",
+            "nodes": [names[n] for n in dangling],
+            "message": f"node(s) {', '.join(names[n] for n in dangling)} connect to only one element terminal",
+        })
+
+    # Shorted elements: every terminal on the same node
+    with_nodes = np.flatnonzero(lengths >= 2)
+    nonempty = np.flatnonzero(lengths > 0)
+    if len(nonempty):
+        # Each element's nodes are one contiguous run of node_index
+        starts = circuit.node_ptr[nonempty]
+        low = np.minimum.reduceat(circuit.node_index, starts)
+        high = np.maximum.reduceat(circuit.node_index, starts)
+        for i in nonempty[(low == high) & (lengths[nonempty] >= 2)]:
+            letter = chr(circuit.kind[i])
+            element = circuit.element_names[i]
+            nonzero = not np.isnan(circuit.value[i]) and circuit.value[i] != 0
+            issue = {
+                "type": "shorted_element",
+                "elements": [element],
+                "message": f"{element} has all terminals on node {names[circuit.node_index[circuit.node_ptr[i]]]}",
+            }
+            # A non-zero source across a short cannot be satisfied
+            (result.errors if letter in "ve" and nonzero else result.warnings).append(issue)
+
+    # Voltage-source / inductor loops: an edge closing a cycle in the voltage-defined forest
+    loops = _UnionFind(count)
+    for i in np.flatnonzero(np.isin(circuit.kind, np.frombuffer(VOLTAGE_DEFINED.encode(), dtype=np.uint8))).tolist():
+        nodes = circuit.node_index[circuit.node_ptr[i]:circuit.node_ptr[i] + 2].tolist()
+        if len(nodes) == 2 and nodes[0] != nodes[1] and not loops.union(nodes[0], nodes[1]):
+            element = circuit.element_names[i]
+            result.errors.append({
+                "type": "voltage_loop",
+                "elements": [element],
+                "message": f"{element} closes a loop of voltage sources / inductors",
+            })
+
+    # Connectivity to ground: through anything at all, and through DC-conducting paths
+    cache: Dict[int, Any] = {}
+    dc = _UnionFind(count)
+    _union_dc(circuit, dc, cache)
+    anything = _UnionFind(count)
+    # Subcircuit ports are driven from outside; treat them as tied to ground
+    for port in ports:
+        dc.union(port, 0)
+        anything.union(port, 0)
+    ptr, flat = circuit.node_ptr.tolist(), circuit.node_index.tolist()
+    for i in with_nodes.tolist():
+        first = flat[ptr[i]]
+        for node in flat[ptr[i] + 1:ptr[i + 1]]:
+            anything.union(first, node)
+    ground_dc, ground_any = dc.find(0), anything.find(0)
+    dc_roots, any_roots = dc.roots(), anything.roots()
+    candidates = np.arange(1, count)
+    if len(candidates):
+        isolated = candidates[any_roots[candidates] != ground_any]
+        cut = candidates[(any_roots[candidates] == ground_any) & (dc_roots[candidates] != ground_dc)]
+        if len(isolated):
+            result.errors.append({
+                "type": "floating_subnet",
+                "nodes": [names[n] for n in isolated],
+                "message": f"node(s) {', '.join(names[n] for n in isolated)} have no connection to ground",
+            })
+        if len(cut):
+            result.errors.append({
+                "type": "no_dc_path",
+                "nodes": [names[n] for n in cut],
+                "message": f"node(s) {', '.join(names[n] for n in cut)} reach ground only through capacitors, "
+                           "current sources or MOSFET gates (no DC path)",
+            })
+
+    # Models and subcircuits referenced but never defined
+    missing: Dict[str, List[str]] = {}
+    is_instance = circuit.kind == ord("x")
+    for ref, model in enumerate(circuit.model_names):
+        users = circuit.model == ref
+        if users.any() and (
+            (is_instance[users].any() and _find_subcircuit(circuit, model) is None)
+            or ((~is_instance[users]).any() and circuit.find_model(model) is None)
+        ):
+            missing[model] = [circuit.element_names[i] for i in np.flatnonzero(users)]
+    modelless = (circuit.model < 0) & np.isin(circuit.kind, np.frombuffer(MODEL_REQUIRED.encode(), dtype=np.uint8))
+    if modelless.any():
+        missing["(none)"] = [circuit.element_names[i] for i in np.flatnonzero(modelless)]
+    for model, elements in missing.items():
+        result.errors.append({
+            "type": "undefined_model",
+            "elements": elements,
+            "message": f"{', '.join(elements)} use{'s' if len(elements) == 1 else ''} undefined model {model}",
+        })
+
+    for name, definition in circuit.subcircuits.items():
+        inner = check_circuit(definition)
+        for found, target in ((inner.errors, result.errors), (inner.warnings, result.warnings)):
+            target += [dict(issue, message=f"in .subckt {name}: {issue['message']}") for issue in found]
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def check_netlist(netlist: Union[str, Sequence[str], Circuit]) -> CheckResult:
+    """
+    Parse (if needed) and structurally check a netlist.
+
+    Args:
+        netlist (str, lines or Circuit): SPICE netlist text, an iterable of lines, or a
+            circuit already parsed by agents.netlist_parser.
+
+    Returns:
+        CheckResult: See check_circuit.
+
+    Raises:
+        NetlistParseError: If the netlist cannot be parsed.
+    """
+    circuit = netlist if isinstance(netlist, Circuit) else parse_netlist(netlist)
+    return check_circuit(circuit)
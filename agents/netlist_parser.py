@@ -0,0 +1,551 @@
+"""
+Streaming SPICE netlist parser producing a compact, array-backed circuit IR.
+
+The parser reads one physical line at a time, so a netlist can come from a string, an
+open file or any iterable of lines without ever being held in memory whole. As in SPICE,
+the first line is the title (code-fence fragments of LLM text excepted, see
+deck_statements). Logical statements are assembled on the fly: "*" and inline ";" / "$" comments are dropped,
+"+" continuation lines are joined, and a .model card whose parameter list opens a
+parenthesis keeps absorbing lines until it closes (the multi-line style LLMs write):
+
+    .model NMOS NMOS(
+        Level = 1
+        Vto = 0.7  ; Threshold voltage
+    )
+
+Elements are not kept as objects. Node names are interned to integer ids once, and
+each element becomes a row of typed columns (kind, value, model, node offsets) plus a
+CSR-style node list and a sparse list of keyword parameters, grown in array.array
+buffers while parsing and frozen into NumPy arrays at the end. Apart from the names,
+no per-element Python objects are kept, so 300k elements parse in about 5 s within
+~60 MB.
+
+.subckt definitions are parsed into nested Circuit objects with their own node table;
+.model cards, analyses, .param, .options and .ic/.nodeset are collected per scope.
+"""
+
+import io
+import itertools
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from agents.netlist_cache import NetlistFragment, extract_netlist, parse_value
+
+
+# Number of nodes of each element letter (X takes every token but the last)
+ELEMENT_NODES = {
+    "r": 2, "c": 2, "l": 2, "v": 2, "i": 2, "d": 2, "b": 2, "s": 4, "w": 2,
+    "m": 4, "q": 3, "j": 3, "z": 3, "e": 4, "g": 4, "f": 2, "h": 2, "t": 4, "k": 0, "x": -1,
+}
+
+# Elements whose first token after the nodes names a .model
+MODEL_ELEMENTS = "dmqjzsw"
+
+ANALYSES = (".op", ".ac", ".dc", ".tran", ".noise", ".tf", ".sens", ".pz", ".disto")
+
+WAVEFORMS = ("sin", "pulse", "pwl", "exp", "sffm", "am")
+
+GROUND = ("0", "gnd")
+
+KEYWORD = re.compile(r"([a-z_][\w.]*)\s*=\s*(\{[^}]*\}|'[^']*'|[^\s=(),]+)")
+WAVEFORM = re.compile(r"\b(" + "|".join(WAVEFORMS) + r")\s*\(([^)]*)\)")
+INITIAL_CONDITION = re.compile(r"v\(\s*([^\s)]+)\s*\)\s*=\s*(\S+)")
+INLINE_COMMENT = re.compile(r"\s[;$]|^;")
+
+NAN = float("nan")
+
+
+class NetlistParseError(ValueError):
+    """Raised for a statement the parser cannot make sense of; carries the line number."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+@dataclass
+class Model:
+    """A .model card: name, device type (NMOS, D, ...) and parameters (floats where numeric)."""
+    name: str
+    type: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Analysis:
+    """An analysis directive, e.g. Analysis("ac", ("dec", "10", "1", "1meg"))."""
+    kind: str
+    args: Tuple[str, ...] = ()
+
+
+class Circuit:
+    """
+    Parsed circuit (or subcircuit definition).
+
+    Element i has kind chr(kind[i]), value value[i] (NaN when it has none), model
+    model_names[model[i]] (model[i] == -1 when it has none) and nodes
+    node_index[node_ptr[i]:node_ptr[i + 1]], which index node_names (0 is ground).
+    Keyword parameters are stored as parallel arrays param_element / param_key /
+    param_value sorted by element, with param_key indexing param_names.
+    """
+
+    def __init__(self, builder: "_Builder"):
+        self.title = builder.title
+        self.ports: Tuple[str, ...] = builder.ports
+        self.node_names: List[str] = builder.node_names
+        self.element_names: List[str] = builder.element_names
+        self.model_names: List[str] = builder.model_names
+        self.param_names: List[str] = builder.param_names
+        self.kind = np.array(builder.kind, dtype=np.uint8)
+        self.value = np.array(builder.value, dtype=np.float64)
+        self.model = np.array(builder.model, dtype=np.int32)
+        self.node_ptr = np.array(builder.node_ptr, dtype=np.int64)
+        self.node_index = np.array(builder.node_index, dtype=np.int32)
+        self.param_element = np.array(builder.param_element, dtype=np.int32)
+        self.param_key = np.array(builder.param_key, dtype=np.int32)
+        self.param_value = np.array(builder.param_value, dtype=np.float64)
+        self.models: Dict[str, Model] = builder.models
+        self.subcircuits: Dict[str, "Circuit"] = builder.subcircuits
+        self.analyses: List[Analysis] = builder.analyses
+        self.parameters: Dict[str, Any] = builder.parameters
+        self.options: Dict[str, Any] = builder.options
+        self.initial_conditions: Dict[str, float] = builder.initial_conditions
+        self.directives: List[str] = builder.directives
+        # Sparse per-element extras, keyed by element index
+        self.waveforms: Dict[int, Tuple[str, np.ndarray]] = builder.waveforms
+        self.ac: Dict[int, Tuple[float, float]] = builder.ac
+        self.controls: Dict[int, Tuple[str, ...]] = builder.controls
+        self.expressions: Dict[int, Dict[str, str]] = builder.expressions
+        self.parent: Optional["Circuit"] = None
+        self._element_ids: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_names)
+
+    def index_of(self, name: str) -> int:
+        """Element index of an element name (case-insensitive)."""
+        if self._element_ids is None:
+            self._element_ids = {element: i for i, element in enumerate(self.element_names)}
+        return self._element_ids[name.lower()]
+
+    def select(self, kinds: str) -> np.ndarray:
+        """Indices of every element whose letter is in kinds, e.g. select("rc")."""
+        return np.flatnonzero(np.isin(self.kind, np.frombuffer(kinds.lower().encode("ascii"), dtype=np.uint8)))
+
+    def nodes_of(self, i: int) -> np.ndarray:
+        """Node ids of element i, in netlist order."""
+        return self.node_index[self.node_ptr[i]:self.node_ptr[i + 1]]
+
+    def params_of(self, i: int) -> Dict[str, float]:
+        """Keyword parameters (W, L, ...) of element i."""
+        lo, hi = np.searchsorted(self.param_element, [i, i + 1])
+        return {self.param_names[k]: float(v) for k, v in zip(self.param_key[lo:hi], self.param_value[lo:hi])}
+
+    def find_model(self, name: str) -> Optional[Model]:
+        """Model card by name, looking through enclosing scopes for subcircuits."""
+        scope: Optional[Circuit] = self
+        while scope is not None:
+            if name in scope.models:
+                return scope.models[name]
+            scope = scope.parent
+        return None
+
+    def element(self, i: int) -> Dict[str, Any]:
+        """
+        Everything known about element i as a plain dict.
+
+        Returns:
+            Dict[str, Any]: name, kind, nodes (names), value, model and params, plus
+            waveform, ac, controls and expressions when the element has them.
+        """
+        model = int(self.model[i])
+        description: Dict[str, Any] = {
+            "name": self.element_names[i],
+            "kind": chr(self.kind[i]),
+            "nodes": [self.node_names[n] for n in self.nodes_of(i)],
+            "value": None if np.isnan(self.value[i]) else float(self.value[i]),
+            "model": self.model_names[model] if model >= 0 else None,
+            "params": self.params_of(i),
+        }
+        if i in self.waveforms:
+            function, args = self.waveforms[i]
+            description["waveform"] = {"function": function, "args": args.tolist()}
+        for key, extras in (("ac", self.ac), ("controls", self.controls), ("expressions", self.expressions)):
+            if i in extras:
+                description[key] = extras[i]
+        return description
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self.element(i) for i in range(len(self)))
+
+
+class _Builder:
+    """Growable columns for one scope while it is being parsed."""
+
+    def __init__(self, title: str = "", ports: Tuple[str, ...] = ()):
+        self.title = title
+        self.ports = ports
+        self.node_names: List[str] = ["0"]
+        self.node_ids: Dict[str, int] = {name: 0 for name in GROUND}
+        self.element_names: List[str] = []
+        self.model_names: List[str] = []
+        self.model_ids: Dict[str, int] = {}
+        self.param_names: List[str] = []
+        self.param_ids: Dict[str, int] = {}
+        self.kind = array("B")
+        self.value = array("d")
+        self.model = array("i")
+        self.node_ptr = array("q", [0])
+        self.node_index = array("i")
+        self.param_element = array("i")
+        self.param_key = array("i")
+        self.param_value = array("d")
+        self.models: Dict[str, Model] = {}
+        self.subcircuits: Dict[str, Circuit] = {}
+        self.analyses: List[Analysis] = []
+        self.parameters: Dict[str, Any] = {}
+        self.options: Dict[str, Any] = {}
+        self.initial_conditions: Dict[str, float] = {}
+        self.directives: List[str] = []
+        self.waveforms: Dict[int, Tuple[str, np.ndarray]] = {}
+        self.ac: Dict[int, Tuple[float, float]] = {}
+        self.controls: Dict[int, Tuple[str, ...]] = {}
+        self.expressions: Dict[int, Dict[str, str]] = {}
+        for port in ports:
+            self.node(port)
+
+    def node(self, name: str) -> int:
+        node = self.node_ids.get(name)
+        if node is None:
+            node = self.node_ids[name] = len(self.node_names)
+            self.node_names.append(name)
+        return node
+
+    def model_ref(self, name: str) -> int:
+        ref = self.model_ids.get(name)
+        if ref is None:
+            ref = self.model_ids[name] = len(self.model_names)
+            self.model_names.append(name)
+        return ref
+
+    def add(self, name: str, nodes: List[str], value: Optional[float], model: Optional[str],
+            params: Dict[str, float]) -> int:
+        index = len(self.element_names)
+        self.element_names.append(name)
+        self.kind.append(ord(name[0]))
+        self.value.append(NAN if value is None else value)
+        self.model.append(self.model_ref(model) if model else -1)
+        node_ids = self.node_ids
+        for node in nodes:
+            node_id = node_ids.get(node)
+            self.node_index.append(self.node(node) if node_id is None else node_id)
+        self.node_ptr.append(len(self.node_index))
+        for key, number in params.items():
+            key_id = self.param_ids.get(key)
+            if key_id is None:
+                key_id = self.param_ids[key] = len(self.param_names)
+                self.param_names.append(key)
+            self.param_element.append(index)
+            self.param_key.append(key_id)
+            self.param_value.append(number)
+        return index
+
+
+def _strip_comment(raw: str) -> str:
+    line = raw.strip()
+    if not line or line.startswith("*") or line.startswith("```"):
+        return ""
+    if ";" in line or "$" in line:
+        line = INLINE_COMMENT.split(line, maxsplit=1)[0].strip()
+    return line
+
+
+def iter_statements(lines: Iterable[str], start: int = 1) -> Iterator[Tuple[int, str]]:
+    """
+    Assemble physical lines into logical SPICE statements, lazily.
+
+    Args:
+        lines (Iterable[str]): Physical lines (an open file works).
+        start (int, optional): Line number of the first of them.
+
+    Yields:
+        Tuple[int, str]: Line number where the statement starts, and its text with
+        comments removed, continuations joined and whitespace collapsed.
+    """
+    pending: Optional[List[Any]] = None  # [line number, text, open parentheses]
+    for number, raw in enumerate(lines, start=start):
+        line = _strip_comment(raw)
+        if not line:
+            continue
+        if pending is not None and (line.startswith("+") or pending[2] > 0):
+            text = line[1:] if line.startswith("+") else line
+            pending[1] += " " + text
+            pending[2] += text.count("(") - text.count(")")
+            continue
+        if pending is not None:
+            yield pending[0], " ".join(pending[1].split())
+        # Only .model cards may spill over lines without "+" while a parenthesis is open
+        depth = line.count("(") - line.count(")") if line[:6].lower() == ".model" else 0
+        pending = [number, line, depth]
+    if pending is not None:
+        yield pending[0], " ".join(pending[1].split())
+
+
+def _keywords(text: str) -> Tuple[str, Dict[str, float], Dict[str, str]]:
+    numeric: Dict[str, float] = {}
+    symbolic: Dict[str, str] = {}
+    if "=" not in text:
+        return text, numeric, symbolic
+    for key, raw in KEYWORD.findall(text):
+        value = parse_value(raw)
+        if value is None:
+            symbolic[key] = raw
+        else:
+            numeric[key] = value
+    return KEYWORD.sub(" ", text), numeric, symbolic
+
+
+def _split(text: str) -> List[str]:
+    return text.replace("(", " ").replace(")", " ").replace(",", " ").split()
+
+
+def _parse_element(builder: _Builder, number: int, text: str) -> None:
+    text, params, symbolic = _keywords(text)
+    waveform = None
+    match = WAVEFORM.search(text) if "(" in text else None
+    if match is not None:
+        args = [parse_value(token) for token in _split(match.group(2))]
+        if any(arg is None for arg in args):
+            raise NetlistParseError(number, f"non-numeric {match.group(1).upper()} arguments")
+        waveform = (match.group(1), np.array(args, dtype=np.float64))
+        text = text[:match.start()] + text[match.end():]
+    tokens = [token for token in _split(text) if not token.endswith(":")]  # "params:"
+    name = tokens[0]
+    letter = name[0]
+    if letter not in ELEMENT_NODES:
+        raise NetlistParseError(number, f"unknown element type {name!r}")
+
+    count = ELEMENT_NODES[letter]
+    if letter == "x":
+        count = len(tokens) - 2
+    elif letter == "q" and len(tokens) > 5 and parse_value(tokens[5]) is None and tokens[5] != "off":
+        count = 4  # substrate node given
+    if count < 0 or len(tokens) < 1 + count:
+        raise NetlistParseError(number, f"{name} needs {max(count, 1)} nodes")
+    nodes, tail = tokens[1:1 + count], tokens[1 + count:]
+
+    value: Optional[float] = None
+    model = None
+    controls: Tuple[str, ...] = ()
+    ac = None
+    if letter == "x":
+        model = tail[0]
+    elif letter == "k":
+        controls, tail = tuple(tail[:-1]), tail[-1:]
+    elif letter in "fh":
+        controls, tail = tuple(tail[:1]), tail[1:]
+    elif letter in MODEL_ELEMENTS:
+        if not tail:
+            raise NetlistParseError(number, f"{name} has no model")
+        model, tail = tail[0], tail[1:]
+    if letter in "vi":
+        i = 0
+        while i < len(tail):
+            token = tail[i]
+            if token == "dc" and i + 1 < len(tail):
+                value, i = parse_value(tail[i + 1]), i + 2
+                if value is None:
+                    raise NetlistParseError(number, f"{name} has a non-numeric DC value")
+            elif token == "ac":
+                magnitude = parse_value(tail[i + 1]) if i + 1 < len(tail) else None
+                phase = parse_value(tail[i + 2]) if i + 2 < len(tail) else None
+                ac = (1.0 if magnitude is None else magnitude, 0.0 if phase is None else phase)
+                i += 1 + (magnitude is not None) + (magnitude is not None and phase is not None)
+            elif value is None and parse_value(token) is not None:
+                value, i = parse_value(token), i + 1
+            else:
+                i += 1
+    elif letter != "x":
+        for token in tail:
+            parsed = parse_value(token)
+            if parsed is not None:
+                if value is None:
+                    value = parsed
+            elif token.startswith(("{", "'")):
+                symbolic["value"] = token
+            elif model is None and letter in "rcl":
+                model = token  # semiconductor resistor / capacitor model
+            elif letter in MODEL_ELEMENTS:
+                symbolic["flags"] = f"{symbolic['flags']} {token}" if "flags" in symbolic else token  # "off"
+            else:
+                raise NetlistParseError(number, f"unexpected token {token!r} in {name}")
+
+    index = builder.add(name, nodes, value, model, params)
+    if waveform is not None:
+        builder.waveforms[index] = waveform
+    if ac is not None:
+        builder.ac[index] = ac
+    if controls:
+        builder.controls[index] = controls
+    if symbolic:
+        builder.expressions[index] = symbolic
+
+
+def is_title_line(text: str) -> bool:
+    """
+    Whether the first statement of a NetlistFragment is a free-form title rather than an element.
+
+    Only used where there may be no title line at all (see deck_statements). Titles often
+    start with an element letter and parse as one ("Common source amplifier" is a capacitor
+    between nodes source and amplifier), so the statement only counts as an element if it
+    carries a value, model, waveform, AC specification or parameter.
+    """
+    text = text.lower()
+    scratch = _Builder()
+    try:
+        _parse_element(scratch, 0, text)
+    except NetlistParseError:
+        return True
+    # On R / C / L a bare trailing word is taken as a model ("Resistor divider with load")
+    has_model = scratch.model[0] >= 0 and text[0] not in "rcl"
+    carries_data = (not np.isnan(scratch.value[0]) or has_model or scratch.waveforms or scratch.ac
+                    or scratch.controls or scratch.expressions or len(scratch.param_element))
+    return not carries_data
+
+
+def _parse_model(builder: _Builder, number: int, text: str) -> None:
+    text, params, symbolic = _keywords(text)
+    tokens = _split(text)
+    if len(tokens) < 3:
+        raise NetlistParseError(number, ".model needs a name and a type")
+    params.update(symbolic)
+    builder.models[tokens[1]] = Model(tokens[1], tokens[2], params)
+
+
+def _parse_directive(builder: _Builder, number: int, text: str) -> None:
+    keyword = text.split()[0]
+    if keyword == ".model":
+        _parse_model(builder, number, text)
+    elif keyword in ANALYSES:
+        builder.analyses.append(Analysis(keyword[1:], tuple(text.split()[1:])))
+    elif keyword == ".param":
+        _, numeric, symbolic = _keywords(text)
+        builder.parameters.update(symbolic)
+        builder.parameters.update(numeric)
+    elif keyword in (".options", ".option", ".opt"):
+        rest, numeric, symbolic = _keywords(text)
+        builder.options.update({flag: True for flag in rest.split()[1:]})
+        builder.options.update(symbolic)
+        builder.options.update(numeric)
+    elif keyword in (".ic", ".nodeset"):
+        for node, raw in INITIAL_CONDITION.findall(text):
+            value = parse_value(raw)
+            if value is None:
+                raise NetlistParseError(number, f"non-numeric initial condition for {node}")
+            builder.initial_conditions[node] = value
+    else:
+        builder.directives.append(text)
+
+
+def deck_statements(source: Union[str, Iterable[str]]) -> Tuple[str, Iterator[Tuple[int, str]]]:
+    """
+    Split a netlist into its title line and its logical statements.
+
+    SPICE reads the first line of a deck as the title whatever it says, so it is never
+    parsed. The exception is a NetlistFragment, the contents of a code fence pulled out
+    of LLM text by extract_netlist: those often start straight with elements, so their
+    first statement is only taken as the title when is_title_line says so.
+
+    Args:
+        source (str or Iterable[str]): Netlist text (optionally inside a ``` code fence),
+            or an iterable of lines such as an open file, which is read lazily.
+
+    Returns:
+        Tuple[str, Iterator[Tuple[int, str]]]: The title ("" if there is none) and the
+        remaining statements as yielded by iter_statements.
+    """
+    text = extract_netlist(source) if isinstance(source, str) else None
+    lines = iter(io.StringIO(text) if text is not None else source)
+    if not isinstance(text, NetlistFragment):
+        return next(lines, "").strip(), iter_statements(lines, start=2)
+    statements = iter_statements(lines)
+    head = next(statements, None)
+    if head is None:
+        return "", statements
+    if not head[1].startswith(".") and is_title_line(head[1]):
+        return head[1], statements
+    return "", itertools.chain([head], statements)
+
+
+def parse_netlist(source: Union[str, Iterable[str]]) -> Circuit:
+    """
+    Parse a SPICE netlist into a Circuit.
+
+    Args:
+        source (str or Iterable[str]): Netlist text (optionally inside a ``` code fence),
+            or an iterable of lines such as an open file, which is read lazily.
+
+    Returns:
+        Circuit: The top-level circuit; .subckt definitions are in circuit.subcircuits.
+
+    Raises:
+        NetlistParseError: On a malformed element or directive, or unbalanced .subckt.
+    """
+    title, statements = deck_statements(source)
+    stack = [_Builder(title)]
+    in_control = False
+    number = 0
+    for number, text in statements:
+        original, text = text, text.lower()
+        keyword = text.split()[0]
+        builder = stack[-1]
+        if in_control:
+            in_control = keyword != ".endc"
+        elif keyword == ".control":
+            in_control = True
+        elif keyword == ".end":
+            break
+        elif keyword == ".title":
+            # Titles are the one thing that keeps its case
+            builder.title = original[len(keyword):].strip()
+        elif keyword == ".subckt":
+            tokens = _split(_keywords(text)[0])
+            if len(tokens) < 2:
+                raise NetlistParseError(number, ".subckt needs a name")
+            stack.append(_Builder(tokens[1], tuple(t for t in tokens[2:] if not t.endswith(":"))))
+        elif keyword == ".ends":
+            if len(stack) == 1:
+                raise NetlistParseError(number, ".ends without .subckt")
+            definition = stack.pop()
+            stack[-1].subcircuits[definition.title] = definition
+        elif keyword.startswith("."):
+            _parse_directive(builder, number, text)
+        else:
+            _parse_element(builder, number, text)
+    if len(stack) > 1:
+        raise NetlistParseError(number, f"unterminated .subckt {stack[-1].title}")
+    return _freeze(stack[0])
+
+
+def _freeze(builder: _Builder, parent: Optional[Circuit] = None) -> Circuit:
+    subcircuits = builder.subcircuits
+    builder.subcircuits = {}
+    circuit = Circuit(builder)
+    circuit.parent = parent
+    for name, definition in subcircuits.items():
+        circuit.subcircuits[name] = _freeze(definition, circuit)
+    return circuit
+
+
+def parse_netlist_file(path: str, encoding: str = "utf-8") -> Circuit:
+    """Parse a netlist file line by line; see parse_netlist."""
+    with open(path, encoding=encoding, errors="replace") as handle:
+        return parse_netlist(handle)
@@ -0,0 +1,276 @@
+"""
+In-process SPICE simulation through PySpice's shared-library ngspice backend.
+
+Netlists are loaded straight into libngspice, the analyses they declare (.op, .ac,
+.tran, .dc) are run, and every resulting vector is returned as a NumPy array. This
+replaces generating a PySpice script with the LLM and running it in a subprocess.
+Results go through the canonical-netlist cache (agents.netlist_cache), so equivalent
+netlists are only simulated once.
+
+PySpice and libngspice are optional: available() reports whether they can be loaded,
+and when they cannot, simulate_netlist runs the pure-NumPy simulator in agents.spice_sim
+instead (backend() names the one in use). Netlists neither backend can run raise
+SimulationError, and callers fall back to the LLM simulation stage.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from agents.metrics import extract_metrics
+from agents.netlist_cache import cached_simulation
+from agents.netlist_checker import check_netlist
+from agents.netlist_parser import NetlistParseError, deck_statements
+from agents import spice_sim
+
+try:
+    from PySpice.Spice.NgSpice.Shared import NgSpiceShared
+except ImportError:  # PySpice not installed
+    NgSpiceShared = None
+
+
+# Directives the service replaces or cannot honour in shared mode
+ANALYSIS_DIRECTIVES = (".op", ".ac", ".tran", ".dc", ".noise")
+DROPPED_DIRECTIVES = (".end", ".title", ".plot", ".print", ".probe", ".backanno")
+
+# Independent SIN sources, and an AC specification on a source line
+SIN_SOURCE = re.compile(r"^[vi]\S*\s.*\bsin\s*\(", re.IGNORECASE)
+AC_SPEC = re.compile(r"\sac(?:\s|$)", re.IGNORECASE)
+
+# ngspice names plots after their analysis with a run counter ("tran1", "ac2", ...)
+PLOT_ANALYSIS = re.compile(r"^(op|ac|tran|dc|noise)\d*$")
+
+# Abscissa vector of each analysis
+SCALES = {"ac": "frequency", "tran": "time"}
+
+
+class SimulationError(RuntimeError):
+    """Raised when no simulator is available or the simulator rejects a netlist."""
+
+
+def _vector_array(vector: Any) -> np.ndarray:
+    # Vector.to_waveform() returns a unit-carrying ndarray subclass; keep the raw values
+    try:
+        data = vector.to_waveform()
+    except Exception:
+        data = getattr(vector, "_data", vector)
+    return np.array(data, copy=True).view(np.ndarray)
+
+
+def prepare_deck(netlist: str, analyses: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Turn a (possibly LLM-formatted) netlist into lines ngspice can load in shared mode.
+
+    Code fences, comments and .control blocks are stripped, continuations and multi-line
+    .model cards are joined, the netlist's own title line (see deck_statements) is
+    replaced by a fixed one and .end is appended. SIN sources without an AC specification
+    get AC 1, PySpice's default (and pyspice_codegen's), so .ac has a stimulus.
+
+    Args:
+        netlist (str): SPICE netlist text.
+        analyses (Sequence[str], optional): Analysis directives (".op", ".ac dec 10 1 1Meg", ...)
+            replacing the ones declared in the netlist.
+
+    Returns:
+        List[str]: The deck, one line per entry.
+    """
+    deck = ["* circuit_maker in-process simulation"]
+    in_control = False
+    for _, line in deck_statements(netlist)[1]:
+        keyword = line.split()[0].lower()
+        if keyword == ".control":
+            in_control = True
+        elif keyword == ".endc":
+            in_control = False
+        elif in_control or keyword in DROPPED_DIRECTIVES:
+            continue
+        elif analyses is not None and keyword in ANALYSIS_DIRECTIVES:
+            continue
+        elif SIN_SOURCE.match(line) and not AC_SPEC.search(line):
+            deck.append(f"{line} AC 1")
+        else:
+            deck.append(line)
+    if analyses is not None:
+        deck.extend(analyses)
+    if not any(line.split()[0].lower() in ANALYSIS_DIRECTIVES for line in deck[1:]):
+        deck.append(".op")
+    deck.append(".end")
+    return deck
+
+
+class NgSpiceService:
+    """Serialized access to the process-wide libngspice instance."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ngspice = None
+
+    def _instance(self):
+        if NgSpiceShared is None:
+            raise SimulationError("PySpice is not installed")
+        if self._ngspice is None:
+            try:
+                self._ngspice = NgSpiceShared.new_instance()
+            except Exception as e:  # libngspice missing or failed to load
+                raise SimulationError(f"Could not load ngspice: {e}")
+        return self._ngspice
+
+    def simulate(self, netlist: str, analyses: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Run a netlist and collect every vector of every analysis.
+
+        Args:
+            netlist (str): SPICE netlist text.
+            analyses (Sequence[str], optional): Override the netlist's analysis directives.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Analysis name ("op", "ac", "tran", "dc") to vector
+            name to values: floats for the operating point, NumPy arrays otherwise
+            (complex for AC), including the "frequency" / "time" abscissa.
+
+        Raises:
+            SimulationError: If ngspice is unavailable or produces no results.
+        """
+        deck = prepare_deck(netlist, analyses)
+        # libngspice keeps global state, so only one deck runs at a time per process
+        with self._lock:
+            ngspice = self._instance()
+            try:
+                ngspice.load_circuit("\n".join(deck))
+                ngspice.run()
+                results: Dict[str, Dict[str, Any]] = {}
+                for plot_name in ngspice.plot_names:
+                    match = PLOT_ANALYSIS.match(plot_name)
+                    if match is None:
+                        continue
+                    analysis = match.group(1)
+                    plot = ngspice.plot(None, plot_name)
+                    vectors = {name.lower(): _vector_array(vector) for name, vector in plot.items()}
+                    if analysis == "op":
+                        vectors = {name: float(np.real(values.ravel()[0])) for name, values in vectors.items()}
+                    results[analysis] = vectors
+            except SimulationError:
+                raise
+            except Exception as e:
+                raise SimulationError(f"ngspice failed: {e}")
+            finally:
+                try:
+                    ngspice.destroy()
+                    ngspice.remove_circuit()
+                except Exception:
+                    pass
+        if not results:
+            raise SimulationError("ngspice produced no analysis results; check the netlist")
+        return results
+
+
+_service = NgSpiceService()
+
+
+def available() -> bool:
+    """True if PySpice and libngspice can be loaded in this process."""
+    try:
+        _service._instance()
+    except SimulationError:
+        return False
+    return True
+
+
+def backend() -> str:
+    """Name of the simulator simulate_netlist uses: "ngspice", or "numpy" (agents.spice_sim)."""
+    return "ngspice" if available() else "numpy"
+
+
+def _simulate_builtin(netlist: str, analyses: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+    try:
+        return spice_sim.simulate("\n".join(prepare_deck(netlist, analyses)))
+    except (ValueError, spice_sim.ConvergenceError) as e:
+        raise SimulationError(f"Built-in simulator failed: {e}")
+
+
+def simulate_netlist(
+    netlist: str,
+    analyses: Optional[Sequence[str]] = None,
+    use_cache: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Simulate a netlist in-process, reusing cached results for equivalent netlists.
+
+    ngspice is used when it can be loaded, the built-in NumPy simulator otherwise.
+
+    Args:
+        netlist (str): SPICE netlist text.
+        analyses (Sequence[str], optional): Override the netlist's analysis directives.
+        use_cache (bool, optional): Consult and fill the simulation cache.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: See NgSpiceService.simulate.
+
+    Raises:
+        SimulationError: If the netlist fails the structural checks
+            (agents.netlist_checker) or the simulator rejects it.
+    """
+    try:
+        check = check_netlist(netlist)
+    except NetlistParseError:
+        check = None  # syntax the parser does not know; let ngspice judge it
+    if check is not None and not check.ok:
+        raise SimulationError(f"Netlist failed structural checks: {check.summary()}")
+    simulate, namespace = (_service.simulate, "ngspice") if available() else (_simulate_builtin, "numpy-sim")
+    if not use_cache:
+        return simulate(netlist, analyses)
+    deck = "\n".join(prepare_deck(netlist, analyses))
+    return cached_simulation(deck, simulate, namespace=namespace)[0]
+
+
+def summarize(
+    results: Dict[str, Dict[str, Any]],
+    output_node: str = "vout",
+    input_node: str = "vin",
+    reference_frequency: float = 1e3,
+) -> Dict[str, Any]:
+    """
+    Reduce simulation vectors to the figures the validation stage reads.
+
+    Args:
+        results (Dict[str, Dict[str, Any]]): Output of simulate_netlist.
+        output_node (str, optional): Node measured as the amplifier output.
+        input_node (str, optional): Node driven by the input source.
+        reference_frequency (float, optional): Frequency at which the gain is reported.
+
+    Returns:
+        Dict[str, Any]: Operating point, AC gain (at the reference frequency and the
+        midband maximum) and bandwidth, transient swing, and the validation metrics of
+        agents.metrics.extract_metrics.
+    """
+    summary: Dict[str, Any] = {"method": f"{backend()} (in-process)"}
+    if "op" in results:
+        summary["operating_point"] = {name: round(value, 6) for name, value in results["op"].items()}
+    metrics = extract_metrics(results, output_node=output_node, input_node=input_node)
+    ac = results.get("ac", {})
+    if "voltage_gain" in metrics:
+        frequency = np.real(ac["frequency"])
+        response = ac[output_node] / ac[input_node] if input_node in ac else ac[output_node]
+        magnitude_db = 20 * np.log10(np.maximum(np.abs(response), 1e-300))
+        reference = int(np.argmin(np.abs(np.log10(frequency / reference_frequency))))
+        summary["ac"] = {
+            "voltage_gain": float(np.abs(response[reference])),
+            "midband_gain": metrics["voltage_gain"],
+            "voltage_gain_db": f"{float(magnitude_db[reference])} dB",
+            "phase_deg": float(np.degrees(np.angle(response[reference]))),
+            "at_frequency": f"{float(frequency[reference])} Hz",
+            "low_cutoff": f"{metrics['low_cutoff']} Hz",
+            "high_cutoff": f"{metrics['high_cutoff']} Hz",
+        }
+    tran = results.get("tran", {})
+    if output_node in tran:
+        waveform = np.real(tran[output_node])
+        summary["transient"] = {
+            "output_min": float(waveform.min()),
+            "output_max": float(waveform.max()),
+            "output_peak_to_peak": float(np.ptp(waveform)),
+        }
+    summary["metrics"] = metrics
+    return summary
@@ -0,0 +1,104 @@
+"""
+Live per-stage progress for a crew kickoff.
+
+The crew reports task boundaries and the LLM client reports token usage; StageProgress
+turns both into wall time and token counts per stage and notifies the UI on every change.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+SKIPPED = "skipped"
+
+
+class StageProgress:
+    """Tracks the status, elapsed wall time and token usage of each pipeline stage."""
+
+    def __init__(self, stages: List[str], on_update: Optional[Callable[["StageProgress"], None]] = None):
+        """
+        Args:
+            stages (List[str]): Human-readable stage labels, in task order.
+            on_update (Callable[[StageProgress], None], optional): Called after every change.
+        """
+        self.on_update = on_update
+        self.stages: List[Dict[str, Any]] = [
+            {"name": name, "status": PENDING, "started": None, "elapsed": 0.0, "tokens": 0}
+            for name in stages
+        ]
+        self._lock = threading.Lock()
+
+    def _notify(self) -> None:
+        if self.on_update is not None:
+            self.on_update(self)
+
+    def start(self, index: int) -> None:
+        """Mark stage index as running."""
+        with self._lock:
+            stage = self.stages[index]
+            stage["status"] = RUNNING
+            stage["started"] = time.perf_counter()
+        self._notify()
+
+    def complete(self, index: int) -> None:
+        """Mark stage index as done and freeze its elapsed time."""
+        with self._lock:
+            stage = self.stages[index]
+            if stage["started"] is not None:
+                stage["elapsed"] = time.perf_counter() - stage["started"]
+            stage["status"] = DONE
+        self._notify()
+
+    def skip(self, index: int) -> None:
+        """Mark stage index as not needed for this request."""
+        with self._lock:
+            self.stages[index]["status"] = SKIPPED
+        self._notify()
+
+    def advance(self) -> None:
+        """Complete the first running stage and start the next pending one (sequential crews)."""
+        running = self.running()
+        if running:
+            self.complete(running[0])
+        pending = [i for i, stage in enumerate(self.stages) if stage["status"] == PENDING]
+        if pending:
+            self.start(pending[0])
+
+    def add_usage(self, usage: Dict[str, Any], index: Optional[int] = None) -> None:
+        """Attribute an LLM completion's tokens to stage index, or to the running stage(s)."""
+        tokens = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        with self._lock:
+            targets = [self.stages[index]] if index is not None else [
+                stage for stage in self.stages if stage["status"] == RUNNING
+            ]
+            for stage in targets:
+                stage["tokens"] += tokens
+        self._notify()
+
+    def running(self) -> List[int]:
+        return [i for i, stage in enumerate(self.stages) if stage["status"] == RUNNING]
+
+    @property
+    def fraction(self) -> float:
+        """Share of stages completed, for a progress bar."""
+        return sum(stage["status"] in (DONE, SKIPPED) for stage in self.stages) / len(self.stages)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Snapshot of every stage with live elapsed time for running ones."""
+        now = time.perf_counter()
+        with self._lock:
+            return [
+                {
+                    "stage": stage["name"],
+                    "status": stage["status"],
+                    "elapsed_s": round(
+                        now - stage["started"] if stage["status"] == RUNNING else stage["elapsed"], 2
+                    ),
+                    "tokens": stage["tokens"],
+                }
+                for stage in self.stages
+            ]
@@ -1,30 +1,16 @@
 from crewai import Agent, Task
 from crewai.tools import BaseTool
 
-import litellm
+from agents.llm_client import GeminiLLM
+from agents.netlist_parser import NetlistParseError
+from agents.pyspice_codegen import netlist_to_pyspice
+from agents.pyspice_optimizer import optimize_script
 import os
 from typing import Any
 
 
-
-
-
-class GeminiLLM:
-    def __init__(self, model_name="google/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
-
 # Initialize the custom LLM for CrewAI
-llm = GeminiLLM()
+llm = GeminiLLM("google/gemini-2.0-flash-lite")
 
 
 class NetlistToPySpiceConverterTool(BaseTool):
@@ -33,89 +19,46 @@ class NetlistToPySpiceConverterTool(BaseTool):
                        "with guaranteed simulation compatibility and error prevention.")
     
     def _run(self, netlist_data: Any) -> Any:
-        # Extract netlist components and structure
+        # Accept the raw netlist text or the netlist agent's {"raw_spice": ..., "title": ...}
+        if isinstance(netlist_data, str):
+            netlist_data = {"raw_spice": netlist_data}
         raw_spice = netlist_data.get("raw_spice", "")
         title = netlist_data.get("title", "MOSFET Amplifier Circuit")
-        components = netlist_data.get("components", [])
-        models = netlist_data.get("models", [])
-        analyses = netlist_data.get("analyses", [])
-        
-        # Initialize the PySpice code structure
-        pyspice_script = {
-            "imports": [
-                "import numpy as np",
-                "import matplotlib.pyplot as plt",
-                "import PySpice.Logging.Logging as Logging",
-                "from PySpice.Plot.BodeDiagram import bode_diagram",
-                "from PySpice.Spice.Netlist import Circuit",
-                "from PySpice.Unit import *"
-            ],
-            "circuit_definition": [],
-            "component_instantiation": [],
-            "analysis_configuration": [],
-            "simulation_execution": [],
-            "results_processing": [],
-            "visualization": [],
-            "complete_code": "",  # Will contain the full executable script
-            "verification_tests": []
-        }
-        
-        # Generate PySpice code from netlist components
-        # (Implementation would convert each component to PySpice syntax)
-        
-        # Convert MOSFET models to PySpice format
-        # (Implementation would handle model parameter conversion)
-        
-        # Generate analysis configurations
-        # (Implementation would create appropriate simulator.xxxx_analysis() calls)
-        
-        # Implement robust error prevention mechanisms
-        # (Implementation would add checks and safeguards)
-        
-        # Generate visualization code
-        # (Implementation would create appropriate plotting code)
-        
-        # Assemble complete Python script
-        # (Implementation would join all code sections)
-        
-        # Generate verification tests
-        # (Implementation would create test cases to verify circuit operation)
-        
-        return pyspice_script
+        if not raw_spice.strip():
+            return {"error": "No SPICE netlist provided in raw_spice"}
+
+        # Parse the netlist and render each element, model and analysis through the
+        # per-type templates; the script is deterministic for a given netlist
+        try:
+            return netlist_to_pyspice(raw_spice, title)
+        except NetlistParseError as e:
+            return {"error": f"Could not parse the netlist: {e}"}
 
 class PySpiceCodeOptimizerTool(BaseTool):
     name: str = "PySpice Code Optimizer Tool"
     description: str = ("Optimizes and validates PySpice code for execution efficiency, "
                        "convergence robustness, and simulation accuracy.")
     
-    def _run(self, pyspice_script: dict) -> dict:
-        # Analyze the PySpice code for potential issues
-        # (Implementation would check for common errors and optimization opportunities)
-        
-        # Apply code optimizations
-        # (Implementation would refactor code for better performance)
-        
-        # Add convergence assistance techniques
-        # (Implementation would add .OPTION statements or equivalent PySpice options)
-        
-        # Validate node connections and component values
-        # (Implementation would check for disconnected nodes, out-of-range values, etc.)
-        
-        # Add additional error handling
-        # (Implementation would add try/except blocks and validation checks)
-        
-        # Return optimized and validated PySpice script
+    def _run(self, pyspice_script: Any) -> dict:
+        # Accept the converter's output dict or the script text itself
+        code = pyspice_script.get("complete_code", "") if isinstance(pyspice_script, dict) else str(pyspice_script)
+        if not code.strip():
+            return {"error": "No PySpice code provided in complete_code"}
+
+        # Parse with ast, drop redundant simulators and duplicate analyses, check the
+        # ground reference and add ngspice convergence options before anything runs
+        optimized_code, report = optimize_script(code)
+        if isinstance(pyspice_script, dict):
+            optimized_script = dict(pyspice_script, complete_code=optimized_code)
+        else:
+            optimized_script = optimized_code
         return {
-            "optimized_script": pyspice_script,
-            "optimization_report": {
-                "issues_detected": [],
-                "optimizations_applied": [],
-                "convergence_enhancements": [],
-                "validation_results": "PASS"
-            }
+            "optimized_script": optimized_script,
+            "optimization_report": report
         }
 
 tool=PySpiceCodeOptimizerTool()
+converter_tool = NetlistToPySpiceConverterTool()
 
 netlist_to_pyspice_generator = Agent(
     role="High-Precision Netlist-to-PySpice Code Generator",
@@ -123,13 +66,15 @@ netlist_to_pyspice_generator = Agent(
     backstory="You're an elite AI-powered SPICE automation engineer with unparalleled expertise in translating circuit simulations across platforms. Your specialized knowledge spans the full spectrum of circuit elements from basic passives to complex MOSFET models, with particular mastery of amplifier topologies including Common Source, Common Drain, and Common Gate configurations. Through thousands of simulated circuit conversions, you've developed proprietary algorithms for netlist parsing and PySpice code generation that ensure zero-error execution. Engineers worldwide rely on your translated code for its readability, optimization, and simulation accuracy, knowing your conversions never fail during execution.",
     allow_delegation=False,
     verbose=True,
-    tools=[tool],
+    tools=[converter_tool, tool],
     llm=llm
 )
 
 netlist_to_pyspice_task = Task(
     description=(
-        "1. Receive and parse the SPICE netlist from the High-Performance Netlist Generator.\n"
+        "1. Receive the SPICE netlist from the High-Performance Netlist Generator and convert it with the "
+        "Netlist-to-PySpice Converter Tool (pass the netlist text as raw_spice); use its complete_code as "
+        "the basis of the script.\n"
         "2. Meticulously map each component, node, and connection to corresponding PySpice syntax:\n"
         "   - Power supplies and signal sources (V, I sources)\n"
         "   - Passive components (R, L, C)\n"
@@ -147,7 +92,8 @@ netlist_to_pyspice_task = Task(
         "   - Analysis configuration (DC, AC, transient)\n"
         "   - Simulation execution\n"
         "   - Results processing and visualization\n"
-        "6. Optimize the code for execution efficiency and readability.\n"
+        "6. Optimize the code for execution efficiency and readability: run the PySpice Code Optimizer Tool on "
+        "the script, keep its optimized_script and fix any error it reports (e.g. a missing ground).\n"
         "7. Include sample execution code with appropriate parameter values.\n"
         "8. Generate verification tests to ensure circuit behavior matches specifications.\n"
         "9. Pass the netlist code to next agent [very important step]" 
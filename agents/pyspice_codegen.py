@@ -0,0 +1,366 @@
+"""
+Deterministic SPICE netlist to PySpice code generation.
+
+The netlist is parsed by agents.netlist_parser and every element is rendered through a
+format template chosen by its type: R, C, L, DC and SIN sources, current sources and
+MOSFETs map to PySpice's element methods, and anything without a template (controlled
+sources, subcircuit instances, PULSE/PWL sources, ...) is passed through verbatim with
+circuit.raw_spice. Analysis directives become simulator calls, followed by result
+printing, plots and assertions that the simulation produced finite results.
+
+Templates are looked up once per element type and whole conversions are memoized on
+the netlist text, so converting a netlist takes well under a millisecond and the same
+netlist always yields byte-identical code.
+"""
+
+import keyword
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.netlist_cache import parse_value
+from agents.netlist_parser import Circuit, Model, parse_netlist
+
+
+IMPORTS = (
+    "import numpy as np",
+    "import matplotlib.pyplot as plt",
+    "import PySpice.Logging.Logging as Logging",
+    "from PySpice.Plot.BodeDiagram import bode_diagram",
+    "from PySpice.Spice.Netlist import Circuit",
+    "from PySpice.Unit import *",
+)
+
+ELEMENT_TEMPLATES = {
+    "r": "circuit.R({name}, {nodes}, {value})",
+    "c": "circuit.C({name}, {nodes}, {value})",
+    "l": "circuit.L({name}, {nodes}, {value})",
+    "v": "circuit.V({name}, {nodes}, {value})",
+    "i": "circuit.I({name}, {nodes}, {value})",
+    "v_sin": ("circuit.SinusoidalVoltageSource({name}, {nodes}, dc_offset={dc}, ac_magnitude={ac}, "
+              "offset={offset}, amplitude={amplitude}, frequency={frequency}, delay={delay}, "
+              "damping_factor={damping})"),
+    "i_sin": ("circuit.SinusoidalCurrentSource({name}, {nodes}, dc_offset={dc}, ac_magnitude={ac}, "
+              "offset={offset}, amplitude={amplitude}, frequency={frequency}, delay={delay}, "
+              "damping_factor={damping})"),
+    "m": "circuit.MOSFET({name}, {nodes}, model={model}{params})",
+    "raw": "circuit.raw_spice += {line}",
+}
+
+ANALYSIS_TEMPLATES = {
+    "op": "analysis_op = simulator.operating_point()",
+    "ac": ("analysis_ac = simulator.ac(start_frequency={start}, stop_frequency={stop}, "
+           "number_of_points={points}, variation={variation})"),
+    "tran": "analysis_tran = simulator.transient(step_time={step}, end_time={end}{extra})",
+    "dc": "analysis_dc = simulator.dc(**{{{source}: slice({start}, {stop}, {step})}})",
+}
+
+# MOSFET instance parameters PySpice accepts as keyword arguments
+MOSFET_PARAMETERS = ("w", "l", "m", "nrd", "nrs", "ad", "pd", "ps")
+
+# SIN(VO VA FREQ TD THETA) argument names and SPICE defaults
+SIN_ARGUMENTS = (("offset", 0.0), ("amplitude", 0.0), ("frequency", 0.0), ("delay", 0.0), ("damping", 0.0))
+
+OUTPUT_NODES = ("vout", "out", "output")
+INPUT_NODES = ("vin", "in", "input")
+
+
+@lru_cache(maxsize=None)
+def _template(kind: str) -> Callable[..., str]:
+    return ELEMENT_TEMPLATES[kind].format
+
+
+def _number(value: float) -> str:
+    return format(float(value), ".12g")
+
+
+def _node(name: str) -> str:
+    return "circuit.gnd" if name == "0" else repr(name)
+
+
+def _keyword_arguments(params: Dict[str, Any]) -> str:
+    plain = {key: value for key, value in params.items() if key.isidentifier() and not keyword.iskeyword(key)}
+    reserved = {key: value for key, value in params.items() if key not in plain}
+    text = "".join(f", {key}={_format_parameter(value)}" for key, value in plain.items())
+    if reserved:
+        text += ", **{" + ", ".join(f"{key!r}: {_format_parameter(value)}" for key, value in reserved.items()) + "}"
+    return text
+
+
+def _format_parameter(value: Any) -> str:
+    return _number(value) if isinstance(value, (int, float)) else repr(value)
+
+
+def _spice_element(circuit: Circuit, i: int) -> str:
+    """SPICE text of element i, reconstructed from the IR."""
+    element = circuit.element(i)
+    tokens = [element["name"]] + element["nodes"] + list(element.get("controls", ()))
+    if element["model"]:
+        tokens.append(element["model"])
+    if element["value"] is not None:
+        tokens.append(("dc " if element["kind"] in "vi" else "") + _number(element["value"]))
+    if "ac" in element:
+        tokens.append("ac " + " ".join(_number(v) for v in element["ac"]))
+    if "waveform" in element:
+        waveform = element["waveform"]
+        tokens.append(f"{waveform['function']}({' '.join(_number(v) for v in waveform['args'])})")
+    expressions = dict(element.get("expressions", {}))
+    if "value" in expressions and element["kind"] not in "be":
+        tokens.append(expressions.pop("value"))
+    if "flags" in expressions:
+        tokens.append(expressions.pop("flags"))
+    tokens += [f"{key}={_number(value)}" for key, value in element["params"].items()]
+    tokens += [f"{key}={value}" for key, value in expressions.items()]
+    return " ".join(tokens)
+
+
+def _spice_model(model: Model) -> str:
+    params = " ".join(
+        f"{key}={_number(value) if isinstance(value, float) else value}" for key, value in model.params.items()
+    )
+    return f".model {model.name} {model.type} ({params})"
+
+
+def _spice_subcircuit(name: str, definition: Circuit) -> List[str]:
+    lines = [f".subckt {name} {' '.join(definition.ports)}"]
+    lines += [_spice_model(model) for model in definition.models.values()]
+    lines += [_spice_element(definition, i) for i in range(len(definition))]
+    return lines + [".ends"]
+
+
+def _raw(line: str) -> str:
+    return _template("raw")(line=repr(line + "\n"))
+
+
+def _mos_geometry(circuit: Circuit) -> Dict[str, Dict[str, float]]:
+    # ngspice ignores W and L on a level-1 .model card; they belong on the instances
+    geometry = {}
+    for name, model in circuit.models.items():
+        if model.type in ("nmos", "pmos"):
+            geometry[name] = {key: model.params[key] for key in ("w", "l") if isinstance(model.params.get(key), float)}
+    return geometry
+
+
+def _render_raw(circuit: Circuit, i: int, geometry: Dict[str, Dict[str, float]]) -> str:
+    element = circuit.element(i)
+    line = _spice_element(circuit, i)
+    if element["kind"] == "m":
+        # The model card no longer carries W / L (see _mos_geometry); put them on the instance
+        given = set(element["params"]) | set(element.get("expressions", {}))
+        missing = {key: value for key, value in geometry.get(element["model"], {}).items() if key not in given}
+        line += "".join(f" {key}={_number(value)}" for key, value in missing.items())
+    return _raw(line)
+
+
+def _render_element(circuit: Circuit, i: int, geometry: Dict[str, Dict[str, float]]) -> str:
+    element = circuit.element(i)
+    kind, name = element["kind"], element["name"][1:] or "0"
+    nodes = ", ".join(_node(node) for node in element["nodes"])
+    if "expressions" in element or "controls" in element:
+        return _render_raw(circuit, i, geometry)
+    if kind in "rcl" and element["value"] is not None and element["model"] is None:
+        return _template(kind)(name=repr(name), nodes=nodes, value=_number(element["value"]))
+    if kind in "vi":
+        waveform = element.get("waveform")
+        if waveform is None and "ac" not in element:
+            return _template(kind)(name=repr(name), nodes=nodes, value=_number(element["value"] or 0.0))
+        if waveform is not None and waveform["function"] == "sin" and len(waveform["args"]) <= len(SIN_ARGUMENTS):
+            args = dict(SIN_ARGUMENTS)
+            args.update(zip((key for key, _ in SIN_ARGUMENTS), waveform["args"]))
+            # Without an AC spec keep PySpice's default AC magnitude of 1, so .ac has a stimulus
+            ac = element.get("ac", (1.0, 0.0))[0]
+            return _template(f"{kind}_sin")(
+                name=repr(name), nodes=nodes, dc=_number(element["value"] or 0.0), ac=_number(ac),
+                **{key: _number(value) for key, value in args.items()},
+            )
+    if kind == "m" and element["model"] and set(element["params"]) <= set(MOSFET_PARAMETERS):
+        params = dict(geometry.get(element["model"], {}))
+        params.update(element["params"])
+        return _template("m")(
+            name=repr(name), nodes=nodes, model=repr(element["model"]), params=_keyword_arguments(params),
+        )
+    return _render_raw(circuit, i, geometry)
+
+
+def _render_model(model: Model, geometry: Dict[str, Dict[str, float]]) -> str:
+    params = {key: value for key, value in model.params.items() if key not in geometry.get(model.name, {})}
+    return f"circuit.model({model.name!r}, {model.type!r}{_keyword_arguments(params)})"
+
+
+def _pick_node(nodes: List[str], preferred: Tuple[str, ...]) -> Optional[str]:
+    return next((node for node in preferred if node in nodes), None)
+
+
+def _render_analyses(circuit: Circuit) -> Tuple[List[str], List[str]]:
+    configuration = ["simulator = circuit.simulator(temperature=25, nominal_temperature=25)"]
+    if circuit.options:
+        configuration.append(f"simulator.options({_keyword_arguments(circuit.options)[2:]})")
+    if circuit.initial_conditions:
+        configuration.append(f"simulator.initial_condition({_keyword_arguments(circuit.initial_conditions)[2:]})")
+    execution = []
+    for analysis in circuit.analyses:
+        args = analysis.args
+        try:
+            if analysis.kind == "op":
+                execution.append(ANALYSIS_TEMPLATES["op"])
+            elif analysis.kind == "ac":
+                variation, points, start, stop = args[:4]
+                execution.append(ANALYSIS_TEMPLATES["ac"].format(
+                    start=_number(_value(start)), stop=_number(_value(stop)),
+                    points=int(_value(points)), variation=repr(variation),
+                ))
+            elif analysis.kind == "tran":
+                step, end = _value(args[0]), _value(args[1])
+                extra = ""
+                if len(args) > 2 and args[2] != "uic":
+                    extra += f", start_time={_number(_value(args[2]))}"
+                if len(args) > 3 and args[3] != "uic":
+                    extra += f", max_time={_number(_value(args[3]))}"
+                execution.append(ANALYSIS_TEMPLATES["tran"].format(step=_number(step), end=_number(end), extra=extra))
+            elif analysis.kind == "dc":
+                source, start, stop, step = args[:4]
+                execution.append(ANALYSIS_TEMPLATES["dc"].format(
+                    source=repr(source), start=_number(_value(start)),
+                    stop=_number(_value(stop)), step=_number(_value(step)),
+                ))
+            else:
+                execution.append(f"# .{analysis.kind} {' '.join(args)} has no PySpice equivalent here and is skipped")
+        except (ValueError, IndexError):
+            execution.append(f"# .{analysis.kind} {' '.join(args)} could not be converted and is skipped")
+    if not any(line.startswith("analysis_") for line in execution):
+        execution.insert(0, ANALYSIS_TEMPLATES["op"])
+    return configuration, execution
+
+
+def _value(token: str) -> float:
+    value = parse_value(token)
+    if value is None:
+        raise ValueError(token)
+    return value
+
+
+def _render_results(circuit: Circuit, execution: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    output = _pick_node(circuit.node_names, OUTPUT_NODES) or circuit.node_names[-1]
+    source = _pick_node(circuit.node_names, INPUT_NODES)
+    ran = {line.split(" = ")[0] for line in execution if line.startswith("analysis_")}
+    processing, visualization, tests = [], [], []
+    if "analysis_op" in ran:
+        processing += [
+            "for node, value in sorted(analysis_op.nodes.items()):",
+            "    print(f'V({node}) = {float(value[0]):.6g} V')",
+        ]
+        tests.append("assert all(np.isfinite(float(value[0])) for value in analysis_op.nodes.values()), "
+                     "'operating point did not converge'")
+    if "analysis_ac" in ran:
+        response = f"np.array(analysis_ac[{output!r}])"
+        if source is not None:
+            response += f" / np.array(analysis_ac[{source!r}])"
+        processing += [
+            "frequency = np.array(analysis_ac.frequency)",
+            f"response = {response}",
+            "gain_db = 20 * np.log10(np.abs(response))",
+            "peak = int(np.argmax(gain_db))",
+            "print(f'Peak gain: {gain_db[peak]:.2f} dB at {frequency[peak]:.6g} Hz')",
+        ]
+        visualization += [
+            "figure, (magnitude_axis, phase_axis) = plt.subplots(2, sharex=True, figsize=(10, 8))",
+            "magnitude_axis.semilogx(frequency, gain_db)",
+            "magnitude_axis.set_ylabel('Gain [dB]')",
+            "magnitude_axis.grid(True)",
+            "phase_axis.semilogx(frequency, np.degrees(np.angle(response)))",
+            "phase_axis.set_xlabel('Frequency [Hz]')",
+            "phase_axis.set_ylabel('Phase [deg]')",
+            "phase_axis.grid(True)",
+            f"figure.suptitle({circuit.title + ' frequency response'!r})",
+            "plt.show()",
+        ]
+        tests.append("assert np.all(np.isfinite(gain_db)), 'AC response is not finite'")
+    if "analysis_tran" in ran:
+        processing += [
+            "time = np.array(analysis_tran.time)",
+            f"output = np.array(analysis_tran[{output!r}])",
+            "print(f'Output swing: {output.min():.6g} V to {output.max():.6g} V')",
+        ]
+        visualization += [
+            "plt.figure(figsize=(10, 6))",
+            f"plt.plot(time, output, label={'V(' + output + ')'!r})",
+        ]
+        if source is not None:
+            visualization.append(f"plt.plot(time, np.array(analysis_tran[{source!r}]), label={'V(' + source + ')'!r})")
+        visualization += [
+            "plt.xlabel('Time [s]')",
+            "plt.ylabel('Voltage [V]')",
+            "plt.legend()",
+            "plt.grid(True)",
+            f"plt.title({circuit.title + ' transient response'!r})",
+            "plt.show()",
+        ]
+        tests.append("assert len(time) > 1 and np.all(np.isfinite(output)), 'transient analysis failed'")
+    if "analysis_dc" in ran:
+        processing += [
+            f"print('DC sweep of V({output}):', np.array(analysis_dc[{output!r}]))",
+        ]
+        tests.append(f"assert np.all(np.isfinite(np.array(analysis_dc[{output!r}]))), 'DC sweep failed'")
+    return processing, visualization, tests
+
+
+@lru_cache(maxsize=256)
+def _convert(netlist: str, title: str) -> Tuple[Tuple[str, ...], ...]:
+    circuit = parse_netlist(netlist)
+    title = circuit.title or title
+    geometry = _mos_geometry(circuit)
+
+    definition = [
+        "logger = Logging.setup_logging()",
+        f"circuit = Circuit({title!r})",
+    ]
+    definition += [_render_model(model, geometry) for model in circuit.models.values()]
+    for name, subcircuit in circuit.subcircuits.items():
+        definition += [_raw(line) for line in _spice_subcircuit(name, subcircuit)]
+    for name, value in circuit.parameters.items():
+        definition.append(_raw(f".param {name}={_number(value) if isinstance(value, float) else value}"))
+
+    instantiation = [_render_element(circuit, i, geometry) for i in range(len(circuit))]
+    configuration, execution = _render_analyses(circuit)
+    processing, visualization, tests = _render_results(circuit, execution)
+    return (IMPORTS, tuple(definition), tuple(instantiation), tuple(configuration), tuple(execution),
+            tuple(processing), tuple(visualization), tuple(tests))
+
+
+SECTIONS = (
+    ("imports", None),
+    ("circuit_definition", "Circuit and device models"),
+    ("component_instantiation", "Components"),
+    ("analysis_configuration", "Simulator"),
+    ("simulation_execution", "Analyses"),
+    ("results_processing", "Results"),
+    ("visualization", "Plots"),
+    ("verification_tests", "Verification"),
+)
+
+
+def netlist_to_pyspice(netlist: str, title: str = "MOSFET Amplifier Circuit") -> Dict[str, Any]:
+    """
+    Convert a SPICE netlist into an executable PySpice script.
+
+    Args:
+        netlist (str): SPICE netlist text, optionally inside a ``` code fence.
+        title (str, optional): Circuit title when the netlist has no .title line.
+
+    Returns:
+        Dict[str, Any]: The script split into sections (imports, circuit_definition,
+        component_instantiation, analysis_configuration, simulation_execution,
+        results_processing, visualization, verification_tests; each a list of lines)
+        and complete_code, the whole script as one string.
+
+    Raises:
+        NetlistParseError: If the netlist cannot be parsed.
+    """
+    sections = _convert(netlist, title)
+    script: Dict[str, Any] = {}
+    blocks = []
+    for (key, heading), lines in zip(SECTIONS, sections):
+        script[key] = list(lines)
+        if lines:
+            blocks.append("\n".join(([f"# {heading}"] if heading else []) + list(lines)))
+    script["complete_code"] = "\n\n".join(blocks) + "\n"
+    return script
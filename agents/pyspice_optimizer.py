@@ -0,0 +1,294 @@
+"""
+Static analysis and convergence hardening of generated PySpice scripts.
+
+Scripts are parsed with ast and checked before they are executed, so problems that
+would otherwise cost a full execute / read traceback / regenerate cycle are caught
+up front:
+
+    syntax_error          the script does not parse
+    missing_ground        no element of a circuit connects to circuit.gnd / node 0
+    redundant_simulator   circuit.simulator() is created again with the same arguments
+    duplicate_analysis    the same analysis runs twice with no circuit change in between
+
+Redundant simulators and duplicate analyses at module level are rewritten away (a
+repeated assignment becomes an alias of the first result), and a simulator.options()
+call with ngspice's convergence aids (gmin and source stepping, relaxed iteration
+limits, a shunt conductance for floating nodes) is inserted after the first simulator,
+keeping any option the script already sets. Edits are applied to the source lines, so
+comments and formatting of the rest of the script survive.
+"""
+
+import ast
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+# ngspice options that help the operating point and transient converge; gminsteps and
+# srcsteps make ngspice fall back to gmin stepping and source stepping on failure
+CONVERGENCE_OPTIONS = {
+    "gmin": 1e-12,
+    "gminsteps": 100,
+    "srcsteps": 100,
+    "reltol": 1e-3,
+    "abstol": 1e-12,
+    "vntol": 1e-6,
+    "itl1": 500,
+    "itl4": 100,
+    "rshunt": 1e12,
+}
+
+ANALYSIS_METHODS = {"operating_point", "ac", "transient", "dc", "noise", "dc_sensitivity", "ac_sensitivity",
+                    "polezero", "transfer_function", "distortion"}
+
+# Circuit methods that do not add elements
+NON_ELEMENT_METHODS = {"simulator", "model", "subcircuit", "include", "lib", "parameter", "raw_spice",
+                       "element", "str", "clone", "set_ground_alias"}
+
+GROUND_NAMES = {"0", "gnd"}
+
+
+def _call_name(node: ast.AST) -> Optional[Tuple[str, str]]:
+    """("circuit", "simulator") for circuit.simulator(...), else None."""
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name):
+        return node.func.value.id, node.func.attr
+    return None
+
+
+def _call_key(call: ast.Call) -> str:
+    return ast.dump(ast.Call(func=call.func, args=call.args, keywords=call.keywords))
+
+
+def _statement_call(statement: ast.stmt) -> Tuple[Optional[str], Optional[ast.Call]]:
+    """Target name and call of "name = obj.method(...)" or a bare "obj.method(...)"."""
+    if isinstance(statement, ast.Assign) and len(statement.targets) == 1 and isinstance(statement.value, ast.Call):
+        target = statement.targets[0]
+        return (target.id if isinstance(target, ast.Name) else None), statement.value
+    if isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call):
+        return None, statement.value
+    return None, None
+
+
+def _circuit_names(tree: ast.Module) -> List[str]:
+    names = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and isinstance(node.value.func, ast.Name) and node.value.func.id == "Circuit"):
+            names += [target.id for target in node.targets if isinstance(target, ast.Name)]
+    return names
+
+
+def _is_ground(node: ast.AST) -> bool:
+    if isinstance(node, ast.Attribute) and node.attr == "gnd":
+        return True
+    return isinstance(node, ast.Constant) and str(node.value).lower() in GROUND_NAMES
+
+
+def _raw_spice_grounded(text: str) -> bool:
+    for line in text.lower().splitlines():
+        tokens = re.sub(r"[(),]", " ", line).split()
+        if tokens and not tokens[0].startswith((".", "*")) and GROUND_NAMES & set(tokens[1:5]):
+            return True
+    return False
+
+
+def _ground_issues(tree: ast.Module) -> List[Dict[str, Any]]:
+    issues = []
+    for circuit in _circuit_names(tree):
+        elements, grounded = 0, False
+        for node in ast.walk(tree):
+            name = _call_name(node)
+            if name is not None and name[0] == circuit and name[1] not in NON_ELEMENT_METHODS:
+                elements += 1
+                # The first positional argument is the element name, the rest are nodes and values
+                grounded |= any(_is_ground(arg) for arg in node.args[1:])
+                grounded |= any(_is_ground(keyword.value) for keyword in node.keywords)
+            elif (isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Attribute)
+                  and node.target.attr == "raw_spice" and isinstance(node.value, ast.Constant)
+                  and isinstance(node.value.value, str)):
+                elements += 1
+                grounded |= _raw_spice_grounded(node.value.value)
+        if elements and not grounded:
+            issues.append({
+                "type": "missing_ground",
+                "severity": "error",
+                "line": None,
+                "message": f"No element of {circuit} connects to {circuit}.gnd (node 0); "
+                           "every node would float and ngspice reports a singular matrix",
+            })
+    return issues
+
+
+def _root_name(node: ast.AST) -> Optional[str]:
+    """"circuit" for circuit.R1.resistance, circuit['R2'] or circuit.R1.plus.add(...)."""
+    while isinstance(node, (ast.Attribute, ast.Subscript, ast.Call)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _mentions(node: ast.AST, names: Set[str]) -> bool:
+    return any(isinstance(child, ast.Name) and child.id in names for child in ast.walk(node))
+
+
+def _modifies_circuit(statement: ast.stmt, tracked: Set[str], functions: Set[str]) -> bool:
+    """
+    Whether statement may change a circuit or simulator between two analyses.
+
+    tracked holds the circuit and simulator variables and grows with names bound from
+    them ("r = circuit.R1", "for element in circuit.elements"). The test is deliberately
+    loose: a false positive only costs a deduplication, a false negative returns stale
+    results. Any store into a tracked object, method call on one, call that is handed
+    one, or call of a function defined in the script counts as a change.
+    """
+    changed = False
+    for node in ast.walk(statement):
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.For, ast.AsyncFor, ast.withitem)):
+            if isinstance(node, ast.Assign):
+                targets, value = node.targets, node.value
+            elif isinstance(node, (ast.For, ast.AsyncFor)):
+                targets, value = [node.target], node.iter
+            elif isinstance(node, ast.withitem):
+                targets, value = [node.optional_vars] if node.optional_vars else [], node.context_expr
+            else:
+                targets, value = [node.target], node.value
+            if value is not None and _mentions(value, tracked):
+                tracked |= {child.id for target in targets for child in ast.walk(target) if isinstance(child, ast.Name)}
+            changed |= any(not isinstance(target, ast.Name) and _root_name(target) in tracked for target in targets)
+        elif isinstance(node, ast.Delete):
+            changed |= any(_root_name(target) in tracked for target in node.targets)
+        elif isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Attribute):
+                changed |= _root_name(node.func) in tracked
+            elif isinstance(node.func, ast.Name):
+                changed |= node.func.id in functions
+            changed |= any(_mentions(argument, tracked) for argument in node.args)
+            changed |= any(_mentions(keyword.value, tracked) for keyword in node.keywords)
+    return changed
+
+
+def analyze_script(code: str) -> Tuple[List[Dict[str, Any]], List[Tuple[int, int, List[str]]], Optional[str]]:
+    """
+    Find problems in a PySpice script and the edits that fix the mechanical ones.
+
+    Args:
+        code (str): The script source.
+
+    Returns:
+        Tuple: The issues found (type, severity, line, message), line edits as
+        (first line, last line, replacement lines) with 1-based inclusive line numbers,
+        and the name of the first simulator variable (None if there is none).
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [{"type": "syntax_error", "severity": "error", "line": e.lineno, "message": str(e)}], [], None
+
+    issues = _ground_issues(tree)
+    edits: List[Tuple[int, int, List[str]]] = []
+    circuits = _circuit_names(tree) or ["circuit"]
+    simulators: Dict[Tuple[int, str, str], str] = {}   # (generation, circuit, call) -> first simulator variable
+    analyses: Dict[Tuple[int, str], Optional[str]] = {}
+    aliases: Dict[str, str] = {}
+    first_simulator = None
+    # Bumped whenever a circuit or simulator may change; simulators and analyses are only
+    # deduplicated within one generation
+    generation = 0
+    tracked = set(circuits)
+    functions = {statement.name for statement in tree.body
+                 if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef))}
+
+    for statement in tree.body:
+        target, call = _statement_call(statement)
+        name = _call_name(call) if call is not None else None
+        indent = " " * statement.col_offset
+        if name is not None and name[1] == "simulator":
+            key = (generation, name[0], _call_key(call))
+            if key in simulators:
+                issues.append({
+                    "type": "redundant_simulator", "severity": "warning", "line": statement.lineno,
+                    "message": f"{name[0]}.simulator() is created again with the same arguments; "
+                               f"reusing {simulators[key]}",
+                })
+                replacement = [] if target in (None, simulators[key]) else [f"{indent}{target} = {simulators[key]}"]
+                edits.append((statement.lineno, statement.end_lineno, replacement))
+                if target is not None:
+                    aliases[target] = simulators[key]
+                    tracked.add(target)
+            elif target is not None:
+                simulators[key] = target
+                tracked.add(target)
+                first_simulator = first_simulator or target
+            continue
+        if name is not None and name[1] in ANALYSIS_METHODS:
+            simulator = aliases.get(name[0], name[0])
+            key = (generation, simulator + "." + _call_key(ast.Call(
+                func=ast.Attribute(value=ast.Name(id=simulator), attr=name[1]), args=call.args, keywords=call.keywords)))
+            if key in analyses:
+                issues.append({
+                    "type": "duplicate_analysis", "severity": "warning", "line": statement.lineno,
+                    "message": f"{name[1]}() repeats an earlier analysis with identical arguments",
+                })
+                previous = analyses[key]
+                if target is None or previous is None:
+                    replacement = []
+                else:
+                    replacement = [] if target == previous else [f"{indent}{target} = {previous}"]
+                edits.append((statement.lineno, statement.end_lineno, replacement))
+            else:
+                analyses[key] = target
+            continue
+        if _modifies_circuit(statement, tracked, functions):
+            generation += 1
+    return issues, edits, first_simulator
+
+
+def _existing_options(tree: ast.Module, simulator: str) -> Dict[str, Any]:
+    options = {}
+    for node in ast.walk(tree):
+        if _call_name(node) == (simulator, "options"):
+            options.update({keyword.arg: keyword.value for keyword in node.keywords if keyword.arg})
+    return options
+
+
+def optimize_script(code: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Analyze a PySpice script, apply the safe fixes and add convergence options.
+
+    Args:
+        code (str): The script source.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The rewritten script and a report with
+        issues_detected, optimizations_applied, convergence_enhancements and
+        validation_results ("PASS", or "FAIL" when an error-severity issue remains).
+    """
+    issues, edits, simulator = analyze_script(code)
+    report: Dict[str, Any] = {
+        "issues_detected": issues,
+        "optimizations_applied": [],
+        "convergence_enhancements": [],
+        "validation_results": "FAIL" if any(issue["severity"] == "error" for issue in issues) else "PASS",
+    }
+    if any(issue["type"] == "syntax_error" for issue in issues):
+        return code, report
+
+    lines = code.splitlines()
+    if simulator is not None:
+        tree = ast.parse(code)
+        existing = _existing_options(tree, simulator)
+        missing = {key: value for key, value in CONVERGENCE_OPTIONS.items() if key not in existing}
+        if missing:
+            statement = next(
+                s for s in tree.body if isinstance(s, ast.Assign) and _statement_call(s)[0] == simulator
+            )
+            arguments = ", ".join(f"{key}={value:g}" for key, value in missing.items())
+            edits.append((statement.end_lineno + 1, statement.end_lineno,
+                          [f"{' ' * statement.col_offset}{simulator}.options({arguments})"]))
+            report["convergence_enhancements"] = [f"{key}={value:g}" for key, value in missing.items()]
+
+    # Apply bottom-up so earlier line numbers stay valid
+    for first, last, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1]), reverse=True):
+        lines[first - 1:last] = replacement
+    for issue in issues:
+        if issue["type"] in ("redundant_simulator", "duplicate_analysis"):
+            report["optimizations_applied"].append(f"line {issue['line']}: removed {issue['type'].replace('_', ' ')}")
+    return "\n".join(lines) + ("\n" if code.endswith("\n") else ""), report
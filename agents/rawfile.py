@@ -0,0 +1,341 @@
+"""
+ngspice rawfiles and a columnar on-disk store for simulation waveforms.
+
+read_rawfile parses the binary and ASCII rawfiles ngspice writes in batch mode
+("ngspice -b -r out.raw deck.cir" or the "write" control command). Binary payloads are
+memory-mapped: each plot's data is one (points, variables) NumPy view of the file, and a
+vector is a strided column of it, so nothing is read until it is used.
+
+The waveform store keeps results (the layout NgSpiceService.simulate and
+agents.spice_sim return) as one .npy file per vector plus a JSON manifest:
+
+    <directory>/manifest.json     analyses, their vectors and files, op values
+    <directory>/<analysis>/N.npy  one vector
+
+Stored vectors are loaded memory-mapped, and load_window slices a time or frequency
+range by bisecting the abscissa, so long transients are reopened and windowed without
+reading or re-parsing the rest. store_waveforms keeps the in-process simulations of the
+pipeline when CIRCUIT_WAVEFORMS names a directory (one store per canonical netlist).
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from agents.netlist_cache import netlist_hash
+
+
+# Plot names ngspice writes, to the analysis keys used across the project
+PLOT_ANALYSES = {
+    "operating point": "op",
+    "ac analysis": "ac",
+    "transient analysis": "tran",
+    "dc transfer characteristic": "dc",
+    "noise spectral density curves": "noise",
+}
+
+# Abscissa vector of each analysis
+SCALES = {"ac": "frequency", "tran": "time", "noise": "frequency"}
+
+# Bump when the store layout changes
+STORE_FORMAT = 1
+MANIFEST = "manifest.json"
+
+VOLTAGE = re.compile(r"^v\(([^,()]+)\)$")
+CURRENT = re.compile(r"^i\(([^,()]+)\)$")
+
+
+class RawFileError(ValueError):
+    """Raised when a rawfile is truncated or not in ngspice's format."""
+
+
+def vector_name(name: str) -> str:
+    """ngspice batch-mode vector name to its shared-mode spelling: v(out) -> out, i(v1) -> v1#branch."""
+    name = name.strip().lower()
+    match = VOLTAGE.match(name)
+    if match:
+        return match.group(1)
+    match = CURRENT.match(name)
+    if match:
+        return f"{match.group(1)}#branch"
+    return name
+
+
+@dataclass
+class RawPlot:
+    """One plot of a rawfile; data has one row per point and one column per variable."""
+    title: str
+    date: str
+    plotname: str
+    flags: str
+    variables: List[str]
+    types: List[str]
+    data: np.ndarray
+
+    @property
+    def analysis(self) -> str:
+        """Analysis key ("op", "ac", "tran", ...) or the lowercased plot name if unknown."""
+        return PLOT_ANALYSES.get(self.plotname.lower(), self.plotname.lower())
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """A vector by its rawfile or shared-mode name; a view of data, not a copy."""
+        names = [vector_name(variable) for variable in self.variables]
+        key = vector_name(name)
+        if key not in names:
+            raise KeyError(name)
+        return self.data[:, names.index(key)]
+
+    def vectors(self) -> Dict[str, np.ndarray]:
+        """Every vector under its shared-mode name."""
+        return {vector_name(name): self.data[:, k] for k, name in enumerate(self.variables)}
+
+
+def _header(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read one plot header up to its "Binary:" / "Values:" line; None at end of file."""
+    header: Dict[str, Any] = {"variables": [], "types": []}
+    line = stream.readline()
+    while line and not line.strip():
+        line = stream.readline()
+    if not line:
+        return None
+    while line:
+        text = line.decode("latin-1").rstrip("\r\n")
+        key, _, value = text.partition(":")
+        key = key.strip().lower()
+        if key == "variables":
+            for _ in range(header["count"]):
+                fields = stream.readline().decode("latin-1").split()
+                if len(fields) < 3:
+                    raise RawFileError("Truncated variable list")
+                header["variables"].append(fields[1])
+                header["types"].append(fields[2])
+        elif key in ("binary", "values"):
+            header["encoding"] = key
+            return header
+        elif key == "no. variables":
+            header["count"] = int(value)
+        elif key == "no. points":
+            header["points"] = int(value)
+        elif key in ("title", "date", "plotname", "flags"):
+            header[key] = value.strip()
+        line = stream.readline()
+    raise RawFileError("Rawfile header without a Binary: or Values: section")
+
+
+def _ascii_values(stream: BinaryIO, points: int, count: int, complex_data: bool) -> np.ndarray:
+    # Each point is its index followed by one value per variable ("re,im" when complex)
+    width = 1 + count * (2 if complex_data else 1)
+    tokens: List[str] = []
+    while len(tokens) < points * width:
+        position = stream.tell()
+        line = stream.readline()
+        if not line:
+            break
+        if line.startswith(b"Title:"):
+            stream.seek(position)
+            break
+        tokens += line.decode("latin-1").replace(",", " ").split()
+    rows = len(tokens) // width
+    values = np.array(tokens[:rows * width], dtype=np.float64).reshape(rows, width)[:, 1:]
+    return np.ascontiguousarray(values).view(np.complex128) if complex_data else values
+
+
+def read_rawfile(path: str, mmap: bool = True) -> List[RawPlot]:
+    """
+    Read every plot of an ngspice rawfile.
+
+    Args:
+        path (str): Binary or ASCII rawfile.
+        mmap (bool, optional): Memory-map binary payloads (otherwise they are read into memory).
+
+    Returns:
+        List[RawPlot]: The plots in file order.
+
+    Raises:
+        RawFileError: If the file is not an ngspice rawfile.
+    """
+    plots: List[RawPlot] = []
+    size = os.path.getsize(path)
+    with open(path, "rb") as stream:
+        while True:
+            header = _header(stream)
+            if header is None:
+                break
+            if "count" not in header or "points" not in header:
+                raise RawFileError("Rawfile header lacks No. Variables / No. Points")
+            count, points = header["count"], header["points"]
+            complex_data = "complex" in header.get("flags", "").lower()
+            if header["encoding"] == "binary":
+                dtype = np.dtype("<c16" if complex_data else "<f8")
+                offset = stream.tell()
+                # A run that was interrupted leaves fewer points than the header declares
+                points = min(points, (size - offset) // (dtype.itemsize * count)) if count else 0
+                if mmap and points:
+                    data = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(points, count))
+                else:
+                    stream.seek(offset)
+                    data = np.fromfile(stream, dtype=dtype, count=points * count).reshape(points, count)
+                stream.seek(offset + points * count * dtype.itemsize)
+            else:
+                data = _ascii_values(stream, points, count, complex_data)
+            plots.append(RawPlot(
+                title=header.get("title", ""),
+                date=header.get("date", ""),
+                plotname=header.get("plotname", ""),
+                flags=header.get("flags", ""),
+                variables=header["variables"],
+                types=header["types"],
+                data=data,
+            ))
+    return plots
+
+
+def rawfile_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read a rawfile into the results layout of NgSpiceService.simulate.
+
+    Vectors stay memory-mapped views of the file; operating-point values become floats.
+    When a file holds several plots of one analysis, the last one wins.
+
+    Args:
+        path (str): Binary or ASCII rawfile.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Analysis name to vector name to values.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for plot in read_rawfile(path):
+        vectors = plot.vectors()
+        if plot.analysis == "op":
+            vectors = {name: float(np.real(values[0])) for name, values in vectors.items() if len(values)}
+        results[plot.analysis] = vectors
+    return results
+
+
+def save_waveforms(results: Dict[str, Dict[str, Any]], directory: str) -> str:
+    """
+    Write results to a waveform store, replacing any store already in directory.
+
+    Args:
+        results (Dict[str, Dict[str, Any]]): Analysis name to vector name to a scalar or
+            array (the layout of NgSpiceService.simulate).
+        directory (str): Store directory; created if missing.
+
+    Returns:
+        str: Path of the manifest.
+    """
+    manifest: Dict[str, Any] = {"format": STORE_FORMAT, "analyses": {}}
+    for analysis, vectors in results.items():
+        entry: Dict[str, Any] = {"values": {}, "vectors": {}}
+        os.makedirs(os.path.join(directory, analysis), exist_ok=True)
+        for k, (name, value) in enumerate(vectors.items()):
+            array = np.asarray(value)
+            if array.ndim == 0:
+                entry["values"][name] = [float(array.real), float(array.imag)] if np.iscomplexobj(array) else array.item()
+                continue
+            # Vector names ("x1.n1", "v(a,b)") are not file names; number the files instead
+            relative = f"{analysis}/{k}.npy"
+            np.save(os.path.join(directory, relative), array)
+            entry["vectors"][name] = relative
+            entry["length"] = len(array)
+        manifest["analyses"][analysis] = entry
+    path = os.path.join(directory, MANIFEST)
+    # The manifest goes last, so a store is only visible once every vector is written
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _manifest(directory: str) -> Dict[str, Any]:
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != STORE_FORMAT:
+        raise ValueError(f"{directory} holds a waveform store of format {manifest.get('format')}")
+    return manifest
+
+
+def load_waveforms(
+    directory: str,
+    analyses: Optional[Sequence[str]] = None,
+    mmap: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Reopen a waveform store.
+
+    Args:
+        directory (str): Store written by save_waveforms.
+        analyses (Sequence[str], optional): Only load these analyses.
+        mmap (bool, optional): Memory-map the vectors instead of reading them.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The stored results.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for analysis, entry in _manifest(directory)["analyses"].items():
+        if analyses is not None and analysis not in analyses:
+            continue
+        vectors: Dict[str, Any] = {
+            name: complex(*value) if isinstance(value, list) else value for name, value in entry["values"].items()
+        }
+        for name, relative in entry["vectors"].items():
+            vectors[name] = np.load(os.path.join(directory, relative), mmap_mode="r" if mmap else None)
+        results[analysis] = vectors
+    return results
+
+
+def load_window(
+    directory: str,
+    analysis: str,
+    start: float,
+    stop: float,
+    vectors: Optional[Sequence[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Load the part of an analysis whose abscissa lies in [start, stop].
+
+    Only the pages holding the window are read from disk.
+
+    Args:
+        directory (str): Store written by save_waveforms.
+        analysis (str): "tran", "ac", ... (anything with an abscissa in SCALES).
+        start (float): First time / frequency to keep.
+        stop (float): Last time / frequency to keep.
+        vectors (Sequence[str], optional): Vectors to return besides the abscissa (default: all).
+
+    Returns:
+        Dict[str, np.ndarray]: The abscissa and the requested vectors over the window, as copies.
+
+    Raises:
+        KeyError: If the store has no such analysis or vector.
+    """
+    stored = load_waveforms(directory, analyses=[analysis])[analysis]
+    scale = SCALES[analysis]
+    axis = np.real(stored[scale])
+    first, last = np.searchsorted(axis, start, side="left"), np.searchsorted(axis, stop, side="right")
+    names = [scale] + [name for name in (vectors if vectors is not None else stored) if name != scale]
+    return {name: np.array(stored[name][first:last]) for name in names}
+
+
+def store_waveforms(netlist: str, results: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """
+    Keep the results of a netlist under CIRCUIT_WAVEFORMS, if that is set.
+
+    Args:
+        netlist (str): The simulated netlist; equivalent netlists share a store.
+        results (Dict[str, Dict[str, Any]]): Its simulation results.
+
+    Returns:
+        str or None: Path of the store's manifest, or None when storing is disabled.
+    """
+    root = os.getenv("CIRCUIT_WAVEFORMS", "")
+    if not root:
+        return None
+    return save_waveforms(results, os.path.join(root, netlist_hash(netlist)))
@@ -0,0 +1,110 @@
+"""
+Dependency-graph scheduler for the design pipeline.
+
+Each stage declares the stages whose outputs it actually consumes. A stage is started
+as soon as all of its inputs are available, so independent stages run concurrently on
+a thread pool instead of waiting for every earlier stage in list order.
+"""
+
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+def topological_levels(dependencies: List[List[int]]) -> List[List[int]]:
+    """
+    Group stages into levels whose members only depend on earlier levels.
+
+    Args:
+        dependencies (List[List[int]]): For each stage, the indexes of its input stages.
+
+    Returns:
+        List[List[int]]: Stage indexes per level, in execution order.
+
+    Raises:
+        ValueError: If a dependency index is out of range or the graph has a cycle.
+    """
+    count = len(dependencies)
+    indegree = [0] * count
+    dependents: Dict[int, List[int]] = {i: [] for i in range(count)}
+    for stage, inputs in enumerate(dependencies):
+        for upstream in inputs:
+            if not 0 <= upstream < count:
+                raise ValueError(f"Stage {stage} depends on unknown stage {upstream}")
+            indegree[stage] += 1
+            dependents[upstream].append(stage)
+
+    levels = []
+    ready = [i for i in range(count) if indegree[i] == 0]
+    scheduled = 0
+    while ready:
+        levels.append(ready)
+        scheduled += len(ready)
+        following = []
+        for stage in ready:
+            for dependent in dependents[stage]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    following.append(dependent)
+        ready = sorted(following)
+    if scheduled != count:
+        raise ValueError("Stage dependencies contain a cycle")
+    return levels
+
+
+def run_graph(
+    dependencies: List[List[int]],
+    run: Callable[[int, List[Any]], Any],
+    max_workers: int = 4,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_complete: Optional[Callable[[int, Any], None]] = None,
+    thread_initializer: Optional[Callable[[], None]] = None,
+) -> List[Any]:
+    """
+    Execute every stage once its inputs are ready, running independent stages in parallel.
+
+    Args:
+        dependencies (List[List[int]]): For each stage, the indexes of its input stages.
+        run (Callable[[int, List[Any]], Any]): Executes a stage given its index and the
+            outputs of its input stages (in declaration order).
+        max_workers (int, optional): Upper bound on concurrently running stages.
+        on_start (Callable[[int], None], optional): Called when a stage is submitted.
+        on_complete (Callable[[int, Any], None], optional): Called with each stage's output.
+        thread_initializer (Callable[[], None], optional): Run once in every worker thread.
+
+    Returns:
+        List[Any]: The output of every stage, indexed like dependencies.
+    """
+    topological_levels(dependencies)  # validates indexes and rejects cycles up front
+
+    outputs: List[Any] = [None] * len(dependencies)
+    finished = set()
+    pending = list(range(len(dependencies)))
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=thread_initializer) as pool:
+        while pending or running:
+            ready = [i for i in pending if all(d in finished for d in dependencies[i])]
+            for stage in ready:
+                pending.remove(stage)
+                if on_start is not None:
+                    on_start(stage)
+                upstream = [outputs[d] for d in dependencies[stage]]
+                # Copy the caller's context so token handlers and progress reach the worker
+                context = contextvars.copy_context()
+                running[pool.submit(context.run, run, stage, upstream)] = stage
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    outputs[stage] = future.result()
+                except BaseException:
+                    for other in running:
+                        other.cancel()
+                    raise
+                finished.add(stage)
+                if on_complete is not None:
+                    on_complete(stage, outputs[stage])
+
+    return outputs
@@ -1,24 +1,8 @@
 from crewai import Agent, Task
-import litellm
+from agents.llm_client import GeminiLLM
 import os
 
 
-class GeminiLLM:
-    def _init_(self,model_name="google/gemini-2.0-flash-lite" ):
-        self.model_name = model_name
-
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
-
-
-
 schematic_agent = Agent(
     role="Circuit Schematic Visualizer",
     goal="Create clear, visually appealing circuit schematics from SPICE netlists using matplotlib and networkx",
@@ -0,0 +1,640 @@
+"""
+Pure-NumPy fallback simulator for the circuits this project generates.
+
+When PySpice / libngspice are not installed, agents.ngspice_service runs netlists
+through this module instead. It covers what the pipeline's netlists use: resistors,
+capacitors, inductors, independent voltage and current sources (DC, AC and SIN / PULSE
+/ PWL waveforms) and the Level-1 (Shichman-Hodges) NMOS / PMOS model with Vto, Kp,
+lambda, gamma, phi, overlap capacitances and instance W / L.
+
+The circuit is written in modified nodal analysis form
+
+    C dx/dt + G x + f(x) = b(t)
+
+with x the node voltages followed by the voltage-source and inductor branch currents.
+G, C and the source incidence are stamped once into preallocated matrices; only the
+MOSFET currents f(x) and their Jacobian are re-evaluated, for all devices at once:
+
+    .op    Newton-Raphson with damped updates, falling back to gmin and source stepping
+    .ac    the linearization at the operating point solved for every frequency in one
+           batched numpy.linalg.solve
+    .tran  trapezoidal (default) or backward-Euler integration with local-truncation-
+           error step control, breakpoints at source discontinuities and an early exit
+           once a SIN-driven circuit reaches periodic steady state
+    .dc    a source sweep, each point starting from the previous solution
+
+Results use ngspice's vector names ("vout", "vdd#branch", "frequency", "time"), so the
+output is interchangeable with NgSpiceService.simulate.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from agents.netlist_cache import parse_value
+from agents.netlist_parser import Analysis, Circuit, parse_netlist
+
+
+GMIN = 1e-12
+RELTOL = 1e-3
+VNTOL = 1e-6
+ABSTOL = 1e-12
+MAX_ITERATIONS = 100
+# Largest node-voltage change a single Newton update may make
+MAX_STEP = 0.5
+
+# Transient step control: the truncation-error slack (ngspice allows 7x on charges; node
+# voltages of lightly damped circuits drift visibly at that), the per-step growth limit,
+# the smallest step as a fraction of tstop, and the period-to-period change (relative to
+# a node's peak value) under which a SIN-driven circuit counts as in steady state
+TRTOL = 1.0
+MAX_GROWTH = 2.0
+MIN_STEP_FRACTION = 1e-9
+STEADY_STATE_RELTOL = 1e-3
+# Step limit under periodic excitation, so peaks are sampled to about 0.05 %
+STEPS_PER_PERIOD = 100
+
+# ngspice's Level-1 defaults, and its default channel width / length
+MOSFET_DEFAULTS = {"vto": 0.0, "kp": 2e-5, "lambda": 0.0, "gamma": 0.0, "phi": 0.6,
+                   "cgso": 0.0, "cgdo": 0.0, "cgbo": 0.0}
+DEFAULT_GEOMETRY = 100e-6
+
+SUPPORTED = "rclvim"
+
+
+class ConvergenceError(RuntimeError):
+    """Raised when Newton-Raphson does not converge, even with gmin and source stepping."""
+
+
+def _waveform(function: str, args: np.ndarray, dc: float, t: np.ndarray) -> np.ndarray:
+    """Value of a SIN / PULSE / PWL source at the times t."""
+    if function == "sin":
+        vo, va, freq, td, theta, phase = np.concatenate([args, np.zeros(6 - len(args))])[:6]
+        active = t >= td
+        elapsed = np.where(active, t - td, 0.0)
+        return vo + va * np.exp(-theta * elapsed) * np.sin(2 * np.pi * freq * elapsed * active + np.radians(phase))
+    if function == "pulse":
+        v1, v2, td, tr, tf, pw, per = np.concatenate([args, np.zeros(7 - len(args))])[:7]
+        tr = tr or 1e-12
+        tf = tf or 1e-12
+        local = t - td
+        if per > 0:
+            local = np.where(local >= 0, np.mod(local, per), local)
+        return np.select(
+            [local < 0, local < tr, local < tr + pw, local < tr + pw + tf],
+            [v1, v1 + (v2 - v1) * local / tr, v2, v2 + (v1 - v2) * (local - tr - pw) / tf],
+            v1,
+        )
+    if function == "pwl":
+        return np.interp(t, args[0::2], args[1::2])
+    raise ValueError(f"{function.upper()} sources are not supported by the built-in simulator")
+
+
+class _System:
+    """MNA matrices and device tables of one circuit."""
+
+    def __init__(self, circuit: Circuit):
+        unsupported = sorted({chr(k) for k in circuit.kind} - set(SUPPORTED))
+        if unsupported or circuit.subcircuits:
+            kinds = ", ".join(k.upper() for k in unsupported) or "X (subcircuits)"
+            raise ValueError(f"The built-in simulator does not support {kinds} elements")
+        self.circuit = circuit
+        nodes = circuit.node_count
+        letters = [chr(k) for k in circuit.kind]
+        branches = [i for i, letter in enumerate(letters) if letter in "vl"]
+        self.branch_of = {element: nodes + b for b, element in enumerate(branches)}
+        self.size = size = nodes + len(branches)
+        self.nodes = nodes
+        self.names = list(circuit.node_names) + [f"{circuit.element_names[i]}#branch" for i in branches]
+
+        self.G = np.zeros((size, size))
+        self.C = np.zeros((size, size))
+        index = np.arange(1, nodes)
+        self.G[index, index] += GMIN
+
+        sources: List[Tuple[int, float, float]] = []   # (element, sign on rhs row a, sign on row b)
+        self.source_rows: List[Tuple[int, ...]] = []
+        mosfets = []
+        for i, letter in enumerate(letters):
+            terminals = [int(n) for n in circuit.nodes_of(i)]
+            value = circuit.value[i]
+            if letter in "rc" and np.isnan(value):
+                raise ValueError(f"{circuit.element_names[i]} has no numeric value")
+            if letter == "r":
+                self._stamp(self.G, terminals[0], terminals[1], 1.0 / value)
+            elif letter == "c":
+                self._stamp(self.C, terminals[0], terminals[1], value)
+            elif letter in "vl":
+                a, b = terminals
+                row = self.branch_of[i]
+                self.G[a, row] += 1.0
+                self.G[b, row] -= 1.0
+                self.G[row, a] += 1.0
+                self.G[row, b] -= 1.0
+                if letter == "l":
+                    self.C[row, row] -= value
+                else:
+                    sources.append(i)
+                    self.source_rows.append((row,))
+            elif letter == "i":
+                sources.append(i)
+                self.source_rows.append(tuple(terminals))
+            else:
+                mosfets.append(i)
+
+        # Source incidence: b(t) = B @ s(t)
+        self.sources = sources
+        self.B = np.zeros((size, len(sources)))
+        for column, rows in enumerate(self.source_rows):
+            if len(rows) == 1:
+                self.B[rows[0], column] = 1.0
+            else:
+                # Current flows into n+, through the source, out of n-
+                self.B[rows[0], column] -= 1.0
+                self.B[rows[1], column] += 1.0
+        self.dc = np.array([self._dc_value(i) for i in sources])
+        self.ac = np.array([
+            circuit.ac[i][0] * np.exp(1j * np.radians(circuit.ac[i][1])) if i in circuit.ac else 0.0 for i in sources
+        ], dtype=complex)
+
+        self._init_mosfets(mosfets)
+        self.A = np.empty((size, size))
+        self.rhs = np.empty(size)
+
+    @staticmethod
+    def _stamp(matrix: np.ndarray, a: int, b: int, value: float) -> None:
+        matrix[a, a] += value
+        matrix[b, b] += value
+        matrix[a, b] -= value
+        matrix[b, a] -= value
+
+    def _dc_value(self, i: int) -> float:
+        value = self.circuit.value[i]
+        if not np.isnan(value):
+            return float(value)
+        if i in self.circuit.waveforms:
+            function, args = self.circuit.waveforms[i]
+            return float(_waveform(function, args, 0.0, np.zeros(1))[0])
+        return 0.0
+
+    def source_values(self, t: np.ndarray) -> np.ndarray:
+        """Source values at the times t, shape (len(t), sources)."""
+        values = np.broadcast_to(self.dc, (len(t), len(self.sources))).copy()
+        for column, i in enumerate(self.sources):
+            if i in self.circuit.waveforms:
+                function, args = self.circuit.waveforms[i]
+                values[:, column] = _waveform(function, args, self.dc[column], t)
+        return values
+
+    def breakpoints(self, stop: float) -> np.ndarray:
+        """Times up to stop at which a source waveform or its slope jumps."""
+        times = [np.zeros(0)]
+        for i in self.sources:
+            if i not in self.circuit.waveforms:
+                continue
+            function, args = self.circuit.waveforms[i]
+            if function == "pulse":
+                v1, v2, td, tr, tf, pw, per = np.concatenate([args, np.zeros(7 - len(args))])[:7]
+                corners = td + np.cumsum([0.0, tr or 1e-12, pw, tf or 1e-12])
+                starts = td + per * np.arange(int((stop - td) // per) + 1) if per > 0 else np.full(1, td)
+                times.append((starts[:, None] - td + corners[None, :]).ravel())
+            elif function == "pwl":
+                times.append(args[0::2])
+            elif function == "sin" and len(args) > 3:
+                times.append(args[3:4])
+        points = np.unique(np.concatenate(times))
+        return points[(points > 0) & (points < stop)]
+
+    def sin_period(self) -> Optional[Tuple[float, float]]:
+        """
+        Common period of the sources when every time-varying one is an undamped SIN.
+
+        Returns:
+            Tuple[float, float] or None: The period and the latest source delay, or None
+            if the excitation is not periodic.
+        """
+        frequencies, delays = [], []
+        for i in self.sources:
+            if i not in self.circuit.waveforms:
+                continue
+            function, args = self.circuit.waveforms[i]
+            if function != "sin":
+                return None
+            vo, va, freq, td, theta, phase = np.concatenate([args, np.zeros(6 - len(args))])[:6]
+            if theta != 0 or freq <= 0:
+                return None
+            frequencies.append(freq)
+            delays.append(td)
+        if not frequencies:
+            return None
+        harmonics = np.array(frequencies) / min(frequencies)
+        if np.any(np.abs(harmonics - np.round(harmonics)) > 1e-6):
+            return None
+        return 1.0 / min(frequencies), max(delays)
+
+    def _init_mosfets(self, mosfets: List[int]) -> None:
+        circuit = self.circuit
+        self.mosfet_count = len(mosfets)
+        if not mosfets:
+            return
+        terminals = np.array([circuit.nodes_of(i) for i in mosfets], dtype=np.int64)
+        self.d, self.g, self.s, self.b = terminals.T
+        params = {key: np.empty(len(mosfets)) for key in MOSFET_DEFAULTS}
+        polarity, width, length = (np.empty(len(mosfets)) for _ in range(3))
+        for k, i in enumerate(mosfets):
+            name = circuit.model_names[circuit.model[i]]
+            model = circuit.find_model(name)
+            if model is None or model.type not in ("nmos", "pmos"):
+                raise ValueError(f"{circuit.element_names[i]} needs an NMOS or PMOS .model (got {name})")
+            level = model.params.get("level", 1.0)
+            if level != 1.0:
+                raise ValueError(f"Model {name} is level {level:g}; the built-in simulator only has Level 1")
+            for key, default in MOSFET_DEFAULTS.items():
+                value = model.params.get(key, default)
+                params[key][k] = value if isinstance(value, float) else default
+            polarity[k] = 1.0 if model.type == "nmos" else -1.0
+            instance = circuit.params_of(i)
+            # Instance W / L, else the model card's (ngspice ignores those), else ngspice's defaults
+            width[k] = instance.get("w", model.params.get("w", DEFAULT_GEOMETRY))
+            length[k] = instance.get("l", model.params.get("l", DEFAULT_GEOMETRY))
+        self.polarity = polarity
+        self.vth0 = polarity * params["vto"]
+        self.beta = params["kp"] * width / length
+        self.lam = params["lambda"]
+        self.gamma = params["gamma"]
+        self.phi = params["phi"]
+        # Overlap capacitances are linear and go straight into C
+        for k in range(len(mosfets)):
+            self._stamp(self.C, self.g[k], self.s[k], params["cgso"][k] * width[k])
+            self._stamp(self.C, self.g[k], self.d[k], params["cgdo"][k] * width[k])
+            self._stamp(self.C, self.g[k], self.b[k], params["cgbo"][k] * length[k])
+
+    def mosfet_stamps(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Linearize every MOSFET at x.
+
+        Returns:
+            Tuple: Flat matrix indices and values of the Jacobian entries, and rhs
+            indices and values of the companion current sources.
+        """
+        p = self.polarity
+        reverse = p * (x[self.d] - x[self.s]) < 0
+        # Drain and source swap roles when the device conducts backwards
+        drain = np.where(reverse, self.s, self.d)
+        source = np.where(reverse, self.d, self.s)
+        vgs = x[self.g] - x[source]
+        vds = x[drain] - x[source]
+        vbs = x[self.b] - x[source]
+        vgs_p, vds_p, vbs_p = p * vgs, p * vds, p * vbs
+
+        root = np.sqrt(np.maximum(self.phi - vbs_p, 1e-6))
+        vth = self.vth0 + self.gamma * (root - np.sqrt(self.phi))
+        overdrive = vgs_p - vth
+        on = overdrive > 0
+        saturated = vds_p >= overdrive
+        clm = 1 + self.lam * vds_p
+        beta = self.beta
+        ids = np.where(saturated, 0.5 * beta * overdrive ** 2 * clm, beta * vds_p * (overdrive - 0.5 * vds_p) * clm)
+        gm = np.where(saturated, beta * overdrive * clm, beta * vds_p * clm)
+        gds = np.where(
+            saturated,
+            0.5 * beta * overdrive ** 2 * self.lam,
+            beta * (overdrive - vds_p) * clm + beta * vds_p * (overdrive - 0.5 * vds_p) * self.lam,
+        )
+        ids, gm, gds = (np.where(on, value, 0.0) for value in (ids, gm, gds))
+        gmb = gm * self.gamma / (2 * root)
+
+        # I(drain -> source) = p * ids; p cancels in the derivatives
+        current = p * ids
+        ieq = current - gm * vgs - gds * vds - gmb * vbs
+        size = self.size
+        rows = np.concatenate([drain] * 4 + [source] * 4)
+        cols = np.concatenate([self.g, source, drain, self.b] * 2)
+        values = np.concatenate([gm, -(gm + gds + gmb), gds, gmb, -gm, gm + gds + gmb, -gds, -gmb])
+        return rows * size + cols, values, np.concatenate([drain, source]), np.concatenate([-ieq, ieq])
+
+    def newton(self, A_linear: np.ndarray, rhs_linear: np.ndarray, x0: np.ndarray) -> np.ndarray:
+        """Solve A_linear x + f(x) = rhs_linear, starting from x0."""
+        A, rhs, size = self.A, self.rhs, self.size
+        x = x0.copy()
+        for _ in range(MAX_ITERATIONS if self.mosfet_count else 1):
+            np.copyto(A, A_linear)
+            np.copyto(rhs, rhs_linear)
+            if self.mosfet_count:
+                matrix_index, matrix_values, rhs_index, rhs_values = self.mosfet_stamps(x)
+                A.ravel()[:] += np.bincount(matrix_index, matrix_values, minlength=size * size)
+                rhs += np.bincount(rhs_index, rhs_values, minlength=size)
+            solution = np.zeros(size)
+            try:
+                solution[1:] = np.linalg.solve(A[1:, 1:], rhs[1:])
+            except np.linalg.LinAlgError:
+                raise ConvergenceError("Singular circuit matrix; check for floating nodes")
+            if not self.mosfet_count:
+                return solution
+            delta = solution - x
+            step = np.max(np.abs(delta[1:self.nodes])) if self.nodes > 1 else 0.0
+            if step > MAX_STEP:
+                solution = x + delta * (MAX_STEP / step)
+            tolerance = RELTOL * np.maximum(np.abs(solution), np.abs(x))
+            tolerance[:self.nodes] += VNTOL
+            tolerance[self.nodes:] += ABSTOL
+            x = solution
+            if step <= MAX_STEP and np.all(np.abs(delta) <= tolerance):
+                return x
+        raise ConvergenceError("Newton-Raphson did not converge")
+
+    def operating_point(self, source_scale: np.ndarray = None) -> np.ndarray:
+        """DC solution, with gmin stepping and then source stepping as fallbacks."""
+        values = self.dc if source_scale is None else source_scale
+        rhs = self.B @ values
+        start = np.zeros(self.size)
+        try:
+            return self.newton(self.G, rhs, start)
+        except ConvergenceError:
+            pass
+        index = np.arange(1, self.nodes)
+        try:
+            x = start
+            for gshunt in np.logspace(-3, -12, 10):
+                G = self.G.copy()
+                G[index, index] += gshunt
+                x = self.newton(G, rhs, x)
+            return self.newton(self.G, rhs, x)
+        except ConvergenceError:
+            pass
+        x = start
+        for scale in np.linspace(0.1, 1.0, 10):
+            x = self.newton(self.G, self.B @ (values * scale), x)
+        return x
+
+    def small_signal(self, x: np.ndarray) -> np.ndarray:
+        """G plus the MOSFET conductances at the operating point x."""
+        G = self.G.copy()
+        if self.mosfet_count:
+            matrix_index, matrix_values, _, _ = self.mosfet_stamps(x)
+            G.ravel()[:] += np.bincount(matrix_index, matrix_values, minlength=self.size * self.size)
+        return G
+
+
+def _vectors(system: _System, solution: np.ndarray) -> Dict[str, np.ndarray]:
+    return {name: solution[..., k] for k, name in enumerate(system.names) if k > 0}
+
+
+def _frequencies(args: Tuple[str, ...]) -> np.ndarray:
+    variation, points, start, stop = args[0], int(parse_value(args[1])), parse_value(args[2]), parse_value(args[3])
+    if variation == "lin":
+        return np.linspace(start, stop, points)
+    per = {"dec": 10.0, "oct": 2.0}[variation]
+    count = int(np.floor(np.log(stop / start) / np.log(per) * points + 1e-9)) + 1
+    return start * per ** (np.arange(count) / points)
+
+
+def ac_analysis(system: _System, x_op: np.ndarray, frequencies: np.ndarray, chunk: int = 256) -> np.ndarray:
+    """Complex solution vectors, shape (len(frequencies), size)."""
+    G = system.small_signal(x_op)[1:, 1:]
+    C = system.C[1:, 1:]
+    rhs = (system.B @ system.ac)[1:]
+    out = np.zeros((len(frequencies), system.size), dtype=complex)
+    for begin in range(0, len(frequencies), chunk):
+        omega = 2 * np.pi * frequencies[begin:begin + chunk]
+        Y = G[None, :, :] + 1j * omega[:, None, None] * C[None, :, :]
+        out[begin:begin + chunk, 1:] = np.linalg.solve(Y, np.broadcast_to(rhs, (len(omega), len(rhs)))[..., None])[..., 0]
+    return out
+
+
+def _truncation_error(times: List[float], states: List[np.ndarray], order: int) -> np.ndarray:
+    """Local truncation error of the last step from divided differences of the last order + 2 points."""
+    t = np.array(times[-(order + 2):])
+    differences = np.array(states[-(order + 2):])
+    for level in range(1, order + 2):
+        differences = (differences[1:] - differences[:-1]) / (t[level:] - t[:-level])[:, None]
+    h = t[-1] - t[-2]
+    # x^(k) is k! times the k-th divided difference: BE errs by h^2 x''/2, trapezoidal by h^3 x'''/12
+    return np.abs(differences[0]) * (h ** 2 if order == 1 else h ** 3 / 2)
+
+
+def _steady(times: np.ndarray, states: np.ndarray, period: float) -> bool:
+    """True if the last period of every node waveform repeats the one before it."""
+    last = times > times[-1] - period * (1 - 1e-9)
+    previous = np.column_stack([
+        np.interp(times[last] - period, times, states[:, k]) for k in range(states.shape[1])
+    ])
+    tolerance = STEADY_STATE_RELTOL * np.max(np.abs(states[last]), axis=0) + VNTOL
+    return bool(np.all(np.abs(states[last] - previous) <= tolerance))
+
+
+def transient_analysis(
+    system: _System,
+    x_op: np.ndarray,
+    step: float,
+    stop: float,
+    start: float = 0.0,
+    max_step: Optional[float] = None,
+    method: str = "trap",
+    steady_state: bool = True,
+    uic: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transient from the operating point x_op with local-truncation-error step control.
+
+    Steps grow while the estimated truncation error of the node voltages stays within
+    TRTOL * (RELTOL * |v| + VNTOL) and shrink (rejecting the step) when it does not, or
+    when Newton-Raphson fails. Steps land exactly on source breakpoints (PULSE / PWL
+    corners, SIN delays), and integration restarts with backward Euler after each. With
+    undamped SIN sources of a common period, steps are limited to STEPS_PER_PERIOD per
+    period and the run ends early once a full period of output repeats the previous one;
+    that period is then repeated up to stop.
+
+    Args:
+        system (_System): The circuit.
+        x_op (np.ndarray): Initial solution.
+        step (float): .tran print step; the first step is a tenth of it.
+        stop (float): End time.
+        start (float, optional): Start of the returned output.
+        max_step (float, optional): Step limit; (stop - start) / 50 by default.
+        method (str, optional): "trap" or "euler".
+        steady_state (bool, optional): Allow the early exit for periodic excitation.
+        uic (bool, optional): Start from x_op as given (.tran ... uic) instead of
+            re-solving the circuit at t = 0 from it.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Accepted times at or after start, and the solution at each.
+
+    Raises:
+        ConvergenceError: If the step falls below MIN_STEP_FRACTION * stop.
+    """
+    h_max = max_step or ((stop - start) / 50 if stop > start else stop)
+    h_min = stop * MIN_STEP_FRACTION
+    discontinuities = set(system.breakpoints(stop).tolist())
+    landings = sorted(discontinuities | {stop})
+    periodic = system.sin_period()
+    if periodic is not None:
+        period, delay = periodic
+        h_max = min(h_max, period / STEPS_PER_PERIOD)
+        if steady_state:
+            checks = delay + period * np.arange(2, int((stop - delay) / period) + 1)
+            landings = sorted(set(landings) | set(checks[checks < stop].tolist()))
+    order = 2 if method == "trap" else 1
+    C, G, B = system.C, system.G, system.B
+    nodes = slice(1, system.nodes)
+
+    if uic:
+        # The given state need not satisfy the circuit (sources jump to their value on the
+        # first step), so t = 0 is a discontinuity the error estimate must not reach back to
+        t, x, window = 0.0, x_op, 0
+    else:
+        t, x, window = 0.0, system.newton(G, B @ system.source_values(np.zeros(1))[0], x_op), 1
+    times, states = [t], [x]
+    # window counts the points since the last discontinuity, usable for the error estimate
+    charge_rate = np.zeros(system.size)  # C dx/dt at the last point (zero at the operating point)
+    h = min(step, h_max) / 10
+    landing = 0
+    while landing < len(landings):
+        target = landings[landing]
+        h = min(h, h_max, target - t)
+        if h < target - t < 2 * h:
+            h = (target - t) / 2  # no sliver of a step before the landing point
+        trap = method == "trap" and window > 1
+        factor = 2.0 / h if trap else 1.0 / h
+        history = factor * (C @ x) + (charge_rate if trap else 0.0)
+        try:
+            x_next = system.newton(G + factor * C, B @ system.source_values(np.array([t + h]))[0] + history, x)
+        except ConvergenceError:
+            h /= 8
+            if h < h_min:
+                raise ConvergenceError(f"Timestep too small at t = {t:g} s")
+            continue
+        growth = MAX_GROWTH
+        if window >= order + 1:
+            error = _truncation_error(times[-(order + 1):] + [t + h], states[-(order + 1):] + [x_next], order)[nodes]
+            tolerance = TRTOL * (RELTOL * np.maximum(np.abs(x_next[nodes]), np.abs(x[nodes])) + VNTOL)
+            ratio = float(np.max(error / tolerance)) if error.size else 0.0
+            growth = min(MAX_GROWTH, 0.9 * ratio ** (-1.0 / (order + 1))) if ratio > 0 else MAX_GROWTH
+            if ratio > 1 and h > h_min:
+                h *= max(growth, 0.25)
+                continue
+        charge_rate = factor * (C @ (x_next - x)) - (charge_rate if trap else 0.0)
+        t, x = (target if target - t - h <= h_min else t + h), x_next
+        times.append(t)
+        states.append(x)
+        window += 1
+        h *= growth
+        if t < target * (1 - 1e-12):
+            continue
+        landing += 1
+        if target in discontinuities:
+            # The waveform's derivatives jump: restart small, with history from here on
+            window, h = 1, min(h, step, h_max) / 10
+        elif steady_state and periodic is not None and target - period >= start * (1 - 1e-12):
+            if _steady(np.array(times), np.array(states)[:, nodes], period):
+                break
+
+    times, states = np.array(times), np.array(states)
+    if t < stop * (1 - 1e-12):
+        # Stopped in steady state: the remaining periods repeat the last one
+        last = times > t - period * (1 - 1e-9)
+        repeats = int(np.ceil((stop - t) / period))
+        shifted = (times[last][None, :] + period * np.arange(1, repeats + 1)[:, None]).ravel()
+        within = shifted <= stop * (1 + 1e-12)
+        times = np.concatenate([times, shifted[within]])
+        states = np.concatenate([states, np.tile(states[last], (repeats, 1))[within]])
+    keep = times >= start * (1 - 1e-12)
+    return times[keep], states[keep]
+
+
+def _numbers(directive: str, tokens: Tuple[str, ...], count: int) -> List[float]:
+    numbers = [parse_value(token) for token in tokens]
+    if len(numbers) < count or any(number is None for number in numbers):
+        raise ValueError(f"Malformed directive: {directive}")
+    return numbers
+
+
+def _check_analysis(circuit: Circuit, system: _System, analysis: Analysis) -> None:
+    """Raise ValueError for analysis arguments that cannot be simulated."""
+    args = analysis.args
+    directive = " ".join((f".{analysis.kind}",) + args)
+    if analysis.kind == "ac":
+        if not args or args[0] not in ("lin", "dec", "oct"):
+            raise ValueError(f"Malformed directive: {directive}")
+        points, start, stop = _numbers(directive, args[1:], 3)[:3]
+        if points < 1 or (args[0] != "lin" and not 0 < start <= stop) or start > stop:
+            raise ValueError(f".ac needs at least one point and 0 < fstart <= fstop: {directive}")
+    elif analysis.kind == "tran":
+        numbers = _numbers(directive, tuple(token for token in args if token != "uic"), 2)
+        step, stop = numbers[0], numbers[1]
+        start = numbers[2] if len(numbers) > 2 else 0.0
+        if step <= 0 or stop <= 0 or not 0 <= start < stop or (len(numbers) > 3 and numbers[3] <= 0):
+            raise ValueError(f".tran needs positive steps and 0 <= tstart < tstop: {directive}")
+    elif analysis.kind == "dc":
+        start, stop, increment = _numbers(directive, args[1:4], 3)
+        try:
+            source = circuit.index_of(args[0])
+        except KeyError:
+            source = None
+        if source not in system.sources:
+            raise ValueError(f".dc sweeps an unknown source: {directive}")
+        if increment == 0 or (stop - start) * increment < 0:
+            raise ValueError(f".dc increment must be non-zero and step from start towards stop: {directive}")
+
+
+def simulate(netlist: Union[str, Circuit]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every analysis a netlist declares (.op when it declares none).
+
+    Args:
+        netlist (str or Circuit): SPICE netlist text, or a circuit from agents.netlist_parser.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Analysis name to vector name to values, laid out like
+        NgSpiceService.simulate (floats for "op", arrays otherwise, complex for "ac").
+
+    Raises:
+        ValueError: If the netlist uses elements, models or analyses not supported here,
+            or an analysis directive has missing or invalid arguments.
+        ConvergenceError: If the operating point or a time step does not converge.
+    """
+    circuit = netlist if isinstance(netlist, Circuit) else parse_netlist(netlist)
+    system = _System(circuit)
+    method = "euler" if str(circuit.options.get("method", "trap")) in ("euler", "gear") else "trap"
+    analyses = circuit.analyses or []
+    for analysis in analyses:
+        _check_analysis(circuit, system, analysis)
+    x_op = system.operating_point()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if not analyses or any(analysis.kind == "op" for analysis in analyses):
+        results["op"] = {name: float(value) for name, value in _vectors(system, x_op).items()}
+    for analysis in analyses:
+        args = analysis.args
+        if analysis.kind == "ac":
+            frequencies = _frequencies(args)
+            vectors = _vectors(system, ac_analysis(system, x_op, frequencies))
+            results["ac"] = {"frequency": frequencies.astype(complex), **vectors}
+        elif analysis.kind == "tran":
+            numbers = [parse_value(token) for token in args if token != "uic"]
+            step, stop = numbers[0], numbers[1]
+            start = numbers[2] if len(numbers) > 2 else 0.0
+            max_step = numbers[3] if len(numbers) > 3 else None
+            initial = x_op
+            if "uic" in args:
+                initial = np.zeros(system.size)
+                for node, value in circuit.initial_conditions.items():
+                    if node in circuit.node_names:
+                        initial[circuit.node_names.index(node)] = value
+            times, solution = transient_analysis(system, initial, step, stop, start, max_step, method,
+                                                 uic="uic" in args)
+            results["tran"] = {"time": times, **_vectors(system, solution)}
+        elif analysis.kind == "dc":
+            source, start, stop, increment = args[0], *(parse_value(token) for token in args[1:4])
+            column = system.sources.index(circuit.index_of(source))
+            sweep = np.arange(start, stop + increment / 2, increment)
+            solution = np.empty((len(sweep), system.size))
+            x = x_op
+            for k, value in enumerate(sweep):
+                values = system.dc.copy()
+                values[column] = value
+                solution[k] = x = system.newton(system.G, system.B @ values, x)
+            results["dc"] = {f"{source[0]}-sweep": sweep, **_vectors(system, solution)}
+        elif analysis.kind != "op":
+            raise ValueError(f".{analysis.kind} is not supported by the built-in simulator")
+    return results
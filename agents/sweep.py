@@ -0,0 +1,219 @@
+"""
+Corner and parameter sweeps over a base netlist.
+
+A sweep takes a netlist plus one value list per parameter (supply ±10 %, Vth from 0.6
+to 0.8 V, RD over standard values, ...), simulates every point of the Cartesian grid on
+a process pool whose workers each hold their own ngspice instance, and stacks the
+vectors of all points into arrays with a leading point axis.
+
+Parameters are addressed by name:
+
+    "Vdd"        value of an element (resistor/capacitor/inductor value, source DC level)
+    "NMOS.vto"   parameter of a .model card
+    "M1.w"       instance parameter of an element line
+"""
+
+import itertools
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agents import ngspice_service
+from agents.metrics import extract_metrics
+from agents.netlist_cache import parse_value
+from agents.netlist_parser import deck_statements
+
+
+@dataclass
+class SweepResult:
+    """Stacked results of a sweep; every array has a leading axis over the points."""
+    parameters: List[str]
+    points: np.ndarray
+    shape: Tuple[int, ...]
+    results: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict)
+    failed: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    def grid(self, analysis: str, vector: str) -> np.ndarray:
+        """Vector values reshaped to the parameter grid: shape + the vector's own axis."""
+        values = self.results[analysis][vector]
+        return values.reshape(self.shape + values.shape[1:])
+
+    def metrics(self, **kwargs: Any) -> Dict[str, np.ndarray]:
+        """agents.metrics.extract_metrics of every point, reshaped to the parameter grid."""
+        return {
+            name: np.broadcast_to(values, (len(self.points),)).reshape(self.shape)
+            for name, values in extract_metrics(self.results, **kwargs).items()
+        }
+
+
+def corners(nominal: float, relative: float = 0.1) -> List[float]:
+    """Low, nominal and high values of a parameter, e.g. corners(5.0) -> [4.5, 5.0, 5.5]."""
+    return [nominal * (1 - relative), nominal, nominal * (1 + relative)]
+
+
+def _format(value: float) -> str:
+    return format(float(value), ".12g")
+
+
+def _set_keyword(line: str, key: str, value: float) -> str:
+    pattern = re.compile(rf"(?<![\w.])({re.escape(key)}\s*=\s*)([^\s)]+)", re.IGNORECASE)
+    if pattern.search(line):
+        return pattern.sub(lambda match: match.group(1) + _format(value), line, count=1)
+    if line.rstrip().endswith(")"):
+        return line.rstrip()[:-1].rstrip() + f" {key}={_format(value)})"
+    return f"{line} {key}={_format(value)}"
+
+
+def _set_element_value(line: str, value: float) -> str:
+    tokens = line.split()
+    kind = tokens[0][0].lower()
+    if kind in "rcl":
+        if len(tokens) < 4:
+            raise ValueError(f"Element {tokens[0]} has no value to sweep")
+        tokens[3] = _format(value)
+    elif kind in "vi":
+        lowered = [token.lower() for token in tokens]
+        if "dc" in lowered[3:]:
+            tokens[lowered.index("dc", 3) + 1] = _format(value)
+        elif len(tokens) > 3 and parse_value(tokens[3]) is not None:
+            tokens[3] = _format(value)
+        else:
+            tokens[3:3] = ["DC", _format(value)]
+    else:
+        raise ValueError(f"Cannot sweep the value of element {tokens[0]}; use an instance parameter")
+    return " ".join(tokens)
+
+
+def apply_parameters(netlist: str, parameters: Mapping[str, float]) -> str:
+    """
+    Return netlist with the given element values and model/instance parameters replaced.
+
+    Args:
+        netlist (str): Base SPICE netlist.
+        parameters (Mapping[str, float]): Parameter names (see module docstring) to values.
+
+    Returns:
+        str: The modified netlist: its title line, then one line per statement (comments
+        are dropped, continuations and multi-line .model cards joined).
+
+    Raises:
+        ValueError: If a named element or model does not exist in the netlist.
+    """
+    title, statements = deck_statements(netlist)
+    lines = [line for _, line in statements]
+    for name, value in parameters.items():
+        owner, _, key = name.partition(".")
+        found = False
+        for i, line in enumerate(lines):
+            tokens = line.split()
+            if tokens[0].lower() == ".model" and len(tokens) > 1 and key and tokens[1].lower() == owner.lower():
+                lines[i] = _set_keyword(line, key, value)
+                found = True
+            elif tokens[0].lower() == owner.lower():
+                lines[i] = _set_keyword(line, key, value) if key else _set_element_value(line, value)
+                found = True
+        if not found:
+            raise ValueError(f"Sweep parameter {name!r} does not match any element or model")
+    return "\n".join([title] + lines)
+
+
+def _init_worker() -> None:
+    # Load libngspice once per worker process, before the first point arrives
+    ngspice_service.available()
+
+
+def _simulate_point(job: Tuple[str, Optional[Sequence[str]], bool]):
+    netlist, analyses, use_cache = job
+    try:
+        return ngspice_service.simulate_netlist(netlist, analyses, use_cache=use_cache), None
+    except (ngspice_service.SimulationError, ValueError) as e:
+        return None, str(e)
+
+
+def _stack(per_point: List[Optional[Dict[str, Dict[str, Any]]]]) -> Dict[str, Dict[str, np.ndarray]]:
+    reference = next((point for point in per_point if point is not None), None)
+    if reference is None:
+        return {}
+    stacked: Dict[str, Dict[str, np.ndarray]] = {}
+    for analysis, vectors in reference.items():
+        scale_name = ngspice_service.SCALES.get(analysis)
+        scale = np.real(np.asarray(vectors[scale_name])) if scale_name in vectors else None
+        stacked[analysis] = {}
+        for name, template in vectors.items():
+            template = np.asarray(template)
+            rows = []
+            for point in per_point:
+                values = None if point is None else point.get(analysis, {}).get(name)
+                if values is None:
+                    rows.append(np.full(template.shape, np.nan, dtype=template.dtype))
+                    continue
+                values = np.asarray(values)
+                own_scale = None
+                if scale is not None and scale_name in point[analysis]:
+                    own_scale = np.real(np.asarray(point[analysis][scale_name]))
+                if own_scale is not None and not np.array_equal(own_scale, scale):
+                    # Adaptive time steps differ per point, even where the point counts agree;
+                    # resample onto the first point's axis
+                    real = np.interp(scale, own_scale, np.real(values))
+                    values = real + 1j * np.interp(scale, own_scale, np.imag(values)) \
+                        if np.iscomplexobj(values) else real
+                rows.append(values)
+            stacked[analysis][name] = np.stack(rows)
+    return stacked
+
+
+def run_sweep(
+    netlist: str,
+    grid: Mapping[str, Sequence[float]],
+    analyses: Optional[Sequence[str]] = None,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> SweepResult:
+    """
+    Simulate every point of a parameter grid and stack the results.
+
+    Args:
+        netlist (str): Base SPICE netlist.
+        grid (Mapping[str, Sequence[float]]): Parameter name to the values it takes.
+        analyses (Sequence[str], optional): Analysis directives replacing the netlist's own.
+        max_workers (int, optional): Worker processes; 1 simulates serially in this process.
+        use_cache (bool, optional): Reuse cached results for points simulated before.
+
+    Returns:
+        SweepResult: Grid points, stacked vectors (NaN rows for failed points) and errors.
+
+    Raises:
+        ValueError: If a parameter does not match the netlist.
+    """
+    names = list(grid)
+    values = [list(grid[name]) for name in names]
+    points = np.array(list(itertools.product(*values)), dtype=float).reshape(-1, len(names))
+    # Build every deck up front so a bad parameter name fails before any simulation
+    jobs = [(apply_parameters(netlist, dict(zip(names, point))), analyses, use_cache) for point in points]
+
+    if max_workers == 1 or len(jobs) <= 1:
+        _init_worker()
+        outcomes = [_simulate_point(job) for job in jobs]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            chunksize = max(1, len(jobs) // (4 * workers))
+            outcomes = list(pool.map(_simulate_point, jobs, chunksize=chunksize))
+
+    per_point = [result for result, _ in outcomes]
+    return SweepResult(
+        parameters=names,
+        points=points,
+        shape=tuple(len(v) for v in values),
+        results=_stack(per_point),
+        failed=np.array([result is None for result in per_point], dtype=bool),
+        errors={i: error for i, (_, error) in enumerate(outcomes) if error is not None},
+    )
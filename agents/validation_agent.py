@@ -1,28 +1,36 @@
 from crewai import Agent, Task
 from crewai.tools import BaseTool
-import litellm
+from agents.llm_client import GeminiLLM
 import os
 from typing import Any
 
 
+# Initialize the custom LLM for CrewAI
+llm = GeminiLLM()
 
+# Parameters that must reach the requirement, and parameters that must stay below it
+MINIMUM_PARAMETERS = ("voltage_gain", "bandwidth", "phase_margin")
+MAXIMUM_PARAMETERS = ("noise", "power_consumption", "distortion")
 
-class GeminiLLM:
-    def __init__(self, model_name="gemini/gemini-2.0-flash-lite"):
-        self.model_name = model_name
-    
-    def generate(self, messages):
-        response = litellm.completion(
-            model=self.model_name,
-            messages=messages
-        )
-        return response.choices[0].message.content
-        
-    def chat(self, messages):
-        return self.generate(messages)
 
-# Initialize the custom LLM for CrewAI
-llm = GeminiLLM()
+def meets_requirement(parameter: str, achieved: Any, required: Any) -> Any:
+    """
+    Check an achieved value against its requirement; works elementwise on NumPy arrays.
+
+    Args:
+        parameter (str): Parameter name, e.g. "voltage_gain" or "power_consumption".
+        achieved: Achieved value(s).
+        required: Required value(s).
+
+    Returns:
+        bool (or boolean array): True where the requirement is met. Parameters without a
+        direction are not checked and always pass.
+    """
+    if parameter in MINIMUM_PARAMETERS:
+        return achieved >= required
+    if parameter in MAXIMUM_PARAMETERS:
+        return achieved <= required
+    return True
 
 
 class ValidationReportGeneratorTool(BaseTool):
@@ -32,6 +40,10 @@ class ValidationReportGeneratorTool(BaseTool):
     def _run(self, validation_results: dict, simulation_results: dict = None) -> dict:
         # Simple comparison between requirements and simulation results
         parameter_validation = validation_results.get("parameter_validation", {})
+        # Measurements from agents.metrics (a simulation summary or the metrics themselves)
+        # stand in for achieved values the caller left out
+        simulation_results = simulation_results or {}
+        measured = simulation_results.get("metrics", simulation_results)
         
         # Check if results match requirements
         matches_requirements = True
@@ -39,18 +51,13 @@ class ValidationReportGeneratorTool(BaseTool):
         
         for param, validation in parameter_validation.items():
             required = validation.get("required")
-            achieved = validation.get("achieved")
+            achieved = validation.get("achieved", measured.get(param))
             
             if isinstance(required, (int, float)) and isinstance(achieved, (int, float)):
                 # Check if parameter meets requirements
-                if param in ["voltage_gain", "bandwidth", "phase_margin"]:
-                    if achieved < required:
-                        matches_requirements = False
-                        failed_parameters.append(param)
-                elif param in ["noise", "power_consumption", "distortion"]:
-                    if achieved > required:
-                        matches_requirements = False
-                        failed_parameters.append(param)
+                if not meets_requirement(param, achieved, required):
+                    matches_requirements = False
+                    failed_parameters.append(param)
         
         # Determine which agent to redirect to (simplified logic)
         redirect_to = None
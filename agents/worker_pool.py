@@ -0,0 +1,290 @@
+"""
+Pool of warm Python worker processes for executing generated code.
+
+Starting a fresh interpreter per snippet pays for interpreter startup and for importing
+NumPy, matplotlib and PySpice every time. Workers here import those once, then execute
+snippets sent over a pipe and return stdout, stderr and an exit code. Output is captured
+at file descriptors 1 and 2, so prints from C extensions (ngspice), os.system and
+subprocesses are returned along with Python's own. A worker is
+replaced after max_jobs snippets (so state leaking between snippets stays bounded), when
+it crashes, or when a snippet exceeds its timeout.
+"""
+
+import atexit
+import contextlib
+import ctypes
+import importlib
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import traceback
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence
+
+
+# Modules every worker imports before taking jobs; missing ones are skipped
+DEFAULT_PRELOAD = ("numpy", "matplotlib", "matplotlib.pyplot", "PySpice.Spice.Netlist")
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of one snippet."""
+    stdout: str
+    stderr: str
+    exit_code: int
+    timed_out: bool = False
+
+
+def _preload(modules: Sequence[str]) -> None:
+    for name in modules:
+        if name == "matplotlib.pyplot":
+            try:
+                importlib.import_module("matplotlib").use("Agg")  # no display in workers
+            except ImportError:
+                pass
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def _reset() -> None:
+    # Free figures left open by the last snippet
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is not None:
+        pyplot.close("all")
+
+
+def _flush_c_streams() -> None:
+    # C stdio buffers output written by extensions (ngspice) until it is flushed
+    try:
+        ctypes.CDLL(None).fflush(None)
+    except (OSError, AttributeError):
+        pass
+
+
+@contextlib.contextmanager
+def _capture_fds() -> Iterator[List[str]]:
+    """Point file descriptors 1 and 2 at temp files; yields [stdout, stderr], filled on exit."""
+    captured = ["", ""]
+    files = [tempfile.TemporaryFile(), tempfile.TemporaryFile()]
+    streams = sys.stdout, sys.stderr
+    for stream in streams:
+        if stream is not None:
+            stream.flush()
+    _flush_c_streams()
+    saved = [os.dup(1), os.dup(2)]
+    os.dup2(files[0].fileno(), 1)
+    os.dup2(files[1].fileno(), 2)
+    # Python-level writes go to the same descriptors, in order with the C-level ones
+    sys.stdout = io.TextIOWrapper(open(1, "wb", buffering=0, closefd=False), write_through=True)
+    sys.stderr = io.TextIOWrapper(open(2, "wb", buffering=0, closefd=False), write_through=True)
+    try:
+        yield captured
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        _flush_c_streams()
+        sys.stdout, sys.stderr = streams
+        for fd, copy in zip((1, 2), saved):
+            os.dup2(copy, fd)
+            os.close(copy)
+        for k, f in enumerate(files):
+            f.seek(0)
+            captured[k] = f.read().decode("utf-8", "replace")
+            f.close()
+
+
+def _execute(code: str):
+    exit_code = 0
+    # Like `python file.py`: the snippet has a __file__ and its tracebacks show source lines
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as source:
+        source.write(code)
+    try:
+        with _capture_fds() as output:
+            try:
+                namespace = {"__name__": "__main__", "__file__": source.name, "__builtins__": __builtins__}
+                exec(compile(code, source.name, "exec"), namespace)
+            except SystemExit as exc:
+                if exc.code is None:
+                    exit_code = 0
+                elif isinstance(exc.code, int):
+                    exit_code = exc.code
+                else:
+                    print(exc.code, file=sys.stderr)
+                    exit_code = 1
+            except BaseException as exc:
+                # Drop this frame so the traceback starts in the snippet, as `python file.py` would
+                traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next)
+                exit_code = 1
+    finally:
+        os.unlink(source.name)
+    return output[0], output[1], exit_code
+
+
+def _worker_main(conn, preload: Sequence[str]) -> None:
+    _preload(preload)
+    conn.send("ready")
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            break
+        if code is None:
+            break
+        conn.send(_execute(code))
+        _reset()
+
+
+class _Worker:
+    def __init__(self, context, preload: Sequence[str]):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, tuple(preload)), daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+        self.ready = False
+
+    def wait_ready(self, timeout: Optional[float]) -> bool:
+        try:
+            if not self.ready and self.conn.poll(timeout):
+                self.ready = self.conn.recv() == "ready"
+        except (EOFError, OSError):
+            self.ready = False
+        return self.ready
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """Fixed-size pool of pre-imported interpreter processes."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_jobs: int = 50,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+        start_timeout: float = 60.0,
+    ):
+        """
+        Args:
+            size (int, optional): Maximum number of worker processes.
+            max_jobs (int, optional): Snippets a worker runs before it is replaced.
+            preload (Sequence[str], optional): Modules imported by every worker at startup.
+            start_timeout (float, optional): Seconds to wait for a new worker's imports.
+        """
+        methods = multiprocessing.get_all_start_methods()
+        # Workers are forked from a server that already holds the preloaded modules;
+        # never fork the (threaded) app process itself
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if "forkserver" in methods:
+            self._context.set_forkserver_preload([name for name in preload if name != "matplotlib.pyplot"])
+        self.size = size
+        self.max_jobs = max_jobs
+        self.preload = tuple(preload)
+        self.start_timeout = start_timeout
+        self._idle: "queue.SimpleQueue[_Worker]" = queue.SimpleQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._closed = False
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, self.preload)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker: _Worker) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop()
+
+    def warm_up(self) -> None:
+        """Start every worker now instead of on first use."""
+        for _ in range(self.size - len(self._workers)):
+            worker = self._spawn()
+            if worker.wait_ready(self.start_timeout):
+                self._idle.put(worker)
+            else:
+                self._retire(worker)
+
+    def run(self, code: str, timeout: float = 10) -> ExecutionResult:
+        """
+        Execute code in a warm worker.
+
+        Args:
+            code (str): Python source to run as __main__.
+            timeout (float, optional): Seconds the snippet may run; the worker is killed after.
+
+        Returns:
+            ExecutionResult: Captured stdout, stderr, exit code and whether it timed out.
+        """
+        if self._closed:
+            raise RuntimeError("Worker pool is shut down")
+        with self._slots:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = self._spawn()
+            if not worker.wait_ready(self.start_timeout):
+                self._retire(worker)
+                return ExecutionResult("", "Worker failed to start", 1)
+
+            try:
+                worker.conn.send(code)
+                finished = worker.conn.poll(timeout)
+                result = ExecutionResult(*worker.conn.recv()) if finished else None
+            except (EOFError, BrokenPipeError, OSError):
+                # The snippet took the interpreter down (os._exit, segfault in a C extension)
+                worker.process.join(timeout=1)
+                self._retire(worker)
+                exit_code = worker.process.exitcode
+                return ExecutionResult("", "Worker process exited unexpectedly", exit_code if exit_code else 1)
+
+            if result is None:
+                worker.process.kill()
+                self._retire(worker)
+                return ExecutionResult("", "", -9, timed_out=True)
+
+            worker.jobs += 1
+            if worker.jobs >= self.max_jobs:
+                self._retire(worker)
+            else:
+                self._idle.put(worker)
+            return result
+
+    def shutdown(self) -> None:
+        """Stop every worker."""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            self._retire(worker)
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """Process-wide pool shared by every interpreter tool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -1,53 +1,9 @@
 
-
 import streamlit as st
-import time
-from crewai import Crew
-from agents.analysis_agent import senior_circuit_analyzer, circuit_analysis_task
-from agents.component_agent import component_selection_specialist, component_selection_task
-from agents.connection_agent import small_signal_analysis_agent, small_signal_analysis_task
-from agents.formula_agent import formulas_equations_engineer, formula_calculation_task
-from agents.netlist_agent import netlist_generator, netlist_generation_task
-#from agents.schematic import schematic_agent, schematic_task
-from agents.pyspice_agent import netlist_to_pyspice_generator, netlist_to_pyspice_task
-from agents.simulation_agent import pyspice_simulation_expert, pyspice_simulation_task
-from agents.validation_agent import performance_validation_engineer, performance_validation_task
-from agents.matplot_lib import circuit_code_generator, circuit_code_generation_task
-
-
-def create_crew():
-    """Create and return a CrewAI Crew with all agents and tasks."""
-    crew = Crew(
-        agents=[
-            senior_circuit_analyzer,
-            component_selection_specialist,
-            small_signal_analysis_agent,
-            formulas_equations_engineer,
-            netlist_generator,
-            netlist_to_pyspice_generator,
-            pyspice_simulation_expert,
-            performance_validation_engineer,
-            circuit_code_generator
-        ],
-        tasks=[
-            circuit_analysis_task,
-            component_selection_task,
-            small_signal_analysis_task,
-            formula_calculation_task,
-            netlist_generation_task,
-            netlist_to_pyspice_task,
-            pyspice_simulation_task,
-            performance_validation_task,
-            circuit_code_generation_task
-        ],
-        verbose=True
-    )
-    return crew
-
-def kickoff_crew(prompt):
-    """Run the CrewAI workflow with the given prompt."""
-    crew = create_crew()
-    return crew.kickoff(inputs={"prompt": prompt})
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from agents.crew_factory import STAGES, kickoff_crew, new_context
+from agents.progress import StageProgress
 
 # Custom CSS for light theme with black text on white background
 light_theme = """
@@ -171,27 +127,36 @@ if submit_button and user_prompt:
         # Create placeholder for progress updates
         progress_placeholder = st.empty()
         progress_bar = st.progress(0)
-        
-        # Status updates
-        stages = [
-            "Analyzing circuit requirements...",
-            "Selecting components...",
-            "Performing small signal analysis...",
-            "Calculating formulas and equations...",
-            "Generating netlist...",
-            "Converting to PySpice...",
-            "Running simulation...",
-            "Validating performance..."
-        ]
-        
-        for idx, stage in enumerate(stages):
-            progress_placeholder.text(stage)
-            progress_bar.progress((idx + 1) / len(stages))
-            time.sleep(0.5)
-        
+        stage_table = st.empty()
+
+        # Progress follows the crew's real task boundaries
+        def show_progress(progress):
+            progress_bar.progress(progress.fraction)
+            running = progress.running()
+            progress_placeholder.text(progress.stages[running[0]]["name"] if running else "Finishing up...")
+            stage_table.table(progress.rows())
+
+        # Stream agent output to the page as tokens arrive
+        live_output = st.empty()
+        streamed_tokens = []
+
+        def show_token(delta):
+            streamed_tokens.append(delta)
+            live_output.code("".join(streamed_tokens)[-2000:], language="text")
+            # Keep the running stage's elapsed time ticking while tokens stream in
+            stage_table.table(progress.rows())
+
         # Execute the actual CrewAI process
         try:
-            result = kickoff_crew(user_prompt)
+            progress = StageProgress(STAGES, on_update=show_progress)
+            context = new_context(user_prompt, progress=progress)
+            script_ctx = get_script_run_ctx()
+            result = kickoff_crew(
+                context,
+                on_token=show_token,
+                # Parallel stages stream from worker threads, which need the page context
+                thread_initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx)
+            )
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
             st.error("Please check your input and try again.")
@@ -241,13 +206,19 @@ M1  vout  vgate  0  0  NMOS ; Drain, Gate, Source, Bulk - connected to the subst
             
     # Display results
     st.success("Circuit design completed!")
+    st.caption(
+        f"Crew setup took {context.setup_seconds * 1000:.2f} ms using the cached crew "
+        f"(saved {context.setup_seconds_saved * 1000:.1f} ms versus rebuilding it)."
+    )
+    if context.compiled is not None and context.compiled.complete:
+        st.caption(f"Compiled deterministically in {context.compiled.elapsed * 1000:.1f} ms without calling the LLM.")
     
     # Display the results in tabs - reduced to just the netlist & code tab
     tab1, tab2 = st.tabs(["Netlist", "PySpice Code"])
     
     with tab1:
         st.header("Circuit Netlist")
-        netlist = circuit_netlist
+        netlist = getattr(result, "netlist", None) or circuit_netlist
         st.code(netlist, language="text")
         
     with tab2:
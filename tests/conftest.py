@@ -0,0 +1,14 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def reference_netlist() -> str:
+    """The demo netlist hard-coded in main.py (LLM-style: multi-line .model, SIN-only input)."""
+    tree = ast.parse((Path(__file__).resolve().parent.parent / "main.py").read_text())
+    return next(
+        node.value.value for node in ast.walk(tree)
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "circuit_netlist"
+    )
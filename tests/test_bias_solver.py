@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from agents.bias_solver import CUTOFF, SATURATION, TRIODE, solve_bias
+from agents.spice_sim import simulate
+
+
+def _simulated(vdd, r1, r2, rd, rs, vth=0.7, kp=100e-6, lam=0.02):
+    # W/L = 5, so k_n = 5 * Kp
+    drain = "vdd" if rd == 0 else "d"
+    source = "0" if rs == 0 else "s"
+    results = simulate("\n".join([
+        "bias point",
+        f".model n NMOS (Level=1 Vto={vth} Kp={kp} lambda={lam})",
+        f"Vdd vdd 0 DC {vdd}",
+        f"R1 vdd g {r1}",
+        f"R2 g 0 {r2}",
+        *([f"Rd vdd d {rd}"] if rd else []),
+        *([f"Rs s 0 {rs}"] if rs else []),
+        f"M1 {drain} g {source} 0 n W=10u L=2u",
+        ".op",
+        ".end",
+    ]))["op"]
+    return results
+
+
+@pytest.mark.parametrize("vdd, r1, r2, rd, rs, region", [
+    (12.0, 1e6, 1e6, 10e3, 10e3, SATURATION),
+    (12.0, 1e6, 1e6, 0.0, 10e3, SATURATION),   # source follower
+    (5.0, 20e3, 20e3, 5e3, 0.0, TRIODE),       # main.py's reference stage
+    (5.0, 1e6, 100e3, 5e3, 1e3, CUTOFF),
+])
+def test_bias_point_matches_the_simulator(vdd, r1, r2, rd, rs, region):
+    bias = solve_bias(vdd, r1, r2, rd, rs, kn=500e-6)
+    assert bias["region"] == region and bias["converged"]
+    op = _simulated(vdd, r1, r2, rd, rs)
+    assert float(bias["V_S"]) == pytest.approx(op.get("s", 0.0), rel=1e-5, abs=1e-9)
+    if rd:
+        assert float(bias["V_D"]) == pytest.approx(op["d"], rel=1e-5)
+
+
+def test_batches_broadcast():
+    rd = np.linspace(1e3, 40e3, 50)
+    bias = solve_bias(12.0, 1e6, 1e6, rd, 10e3, kn=500e-6)
+    assert bias["I_D"].shape == rd.shape and bias["converged"].all()
+    # More drain resistance pushes the stage from saturation into triode, never back
+    assert np.all(np.diff(bias["region"].astype(int)) <= 0)
+    assert set(bias["region"].tolist()) == {SATURATION, TRIODE}
+    single = solve_bias(12.0, 1e6, 1e6, rd[17], 10e3, kn=500e-6)
+    assert float(single["I_D"]) == pytest.approx(bias["I_D"][17], rel=1e-12)
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+pytest.importorskip("crewai")
+# The agent modules build their LLM clients at import time; no request is made here
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+from agents.compiler import ANALYSIS, SIMULATION, Unresolved, _validation, compile_design  # noqa: E402
+
+
+def _state(achieved: float, gain: float = 5.0) -> dict:
+    return {
+        ANALYSIS: {"specification": {"gain": gain}},
+        SIMULATION: {"voltage_gain": achieved, "tolerance": 1e-3},
+    }
+
+
+@pytest.mark.parametrize("achieved", [5.0, 4.996, 5.004, -5.0])
+def test_validation_accepts_gains_within_tolerance(achieved):
+    assert _validation("", _state(achieved))["matches_requirements"]
+
+
+@pytest.mark.parametrize("achieved", [4.99, 5.01, 5.07])
+def test_validation_rejects_undershoot_and_overshoot(achieved):
+    with pytest.raises(Unresolved):
+        _validation("", _state(achieved))
+
+
+def test_common_source_compiles_to_its_target(monkeypatch):
+    monkeypatch.setenv("CIRCUIT_SIM_CACHE", "")
+    design = compile_design("Design a Common Source amplifier with gain of 10, VDD 12V DC supply "
+                            "and 10mV AC input amplitude")
+    assert design.complete, design.unresolved
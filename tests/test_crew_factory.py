@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+pytest.importorskip("crewai")
+# The agent modules build their LLM clients at import time; no request is made here
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+from agents.crew_factory import TASK_INPUTS, create_crew  # noqa: E402
+
+
+def test_sequential_context_never_reads_a_later_task():
+    crew = create_crew()
+    for index, task in enumerate(crew.tasks):
+        context = [crew.tasks.index(upstream) for upstream in getattr(task, "context", None) or []]
+        assert all(i < index for i in context), (index, context)
+        assert context == [i for i in TASK_INPUTS[index] if i < index]
@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+from agents.design_solver import DEFAULT_KP, DEFAULT_LAMBDA, DEFAULT_VTH, design_amplifier, solve_bracket
+from agents.metrics import extract_metrics
+from agents.spice_sim import simulate
+
+VDD = 12.0
+RLOAD = 1e6
+
+
+def _netlist(topology: str, values: dict) -> str:
+    # Same stage layouts as agents.compiler._netlist: W = 10u, L = 2u gives the default W/L of 5
+    lines = [
+        f"{topology} design",
+        f".model NMOS NMOS (Level=1 Vto={DEFAULT_VTH} Kp={DEFAULT_KP} lambda={DEFAULT_LAMBDA})",
+        f"Vdd vdd 0 DC {VDD}",
+        "Vin vin 0 DC 0 AC 1",
+        f"R1 vdd vgate {values['R1']!r}",
+        f"R2 vgate 0 {values['R2']!r}",
+        f"Rs vsource 0 {values['RS']!r}",
+    ]
+    if topology == "Common Source":
+        lines += [f"Rd vdd vdrain {values['RD']!r}", "Cs vsource 0 100u", "Cin vin vgate 1u",
+                  "Cout vdrain vout 1u", "M1 vdrain vgate vsource 0 NMOS W=10u L=2u"]
+    elif topology == "Common Drain":
+        lines += ["Cin vin vgate 1u", "Cout vsource vout 1u", "M1 vdd vgate vsource 0 NMOS W=10u L=2u"]
+    else:
+        lines += [f"Rd vdd vdrain {values['RD']!r}", "Cg vgate 0 1u", "Cin vin vsource 1u",
+                  "Cout vdrain vout 1u", "M1 vdrain vgate vsource 0 NMOS W=10u L=2u"]
+    lines += [f"Rload vout 0 {RLOAD:g}", ".ac dec 20 10 100k", ".end"]
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("topology, gain", [
+    ("Common Source", 10.0), ("Common Source", 30.0),
+    ("Common Drain", 0.9),
+    ("Common Gate", 5.0), ("Common Gate", 20.0),
+])
+def test_designs_simulate_to_their_target(topology, gain):
+    values = design_amplifier(topology, gain, VDD, r_load=RLOAD)
+    assert values["region"] == "saturation"
+    simulated = extract_metrics(simulate(_netlist(topology, values)))["voltage_gain"]
+    assert simulated == pytest.approx(gain, rel=1e-3)
+
+
+def test_unreachable_gain_raises():
+    with pytest.raises(ValueError, match="out of reach"):
+        design_amplifier("Common Source", 1e4, VDD, r_load=10e3)
+
+
+def test_solve_bracket_finds_the_root():
+    assert solve_bracket(lambda x: x * x - 2, 0, 2) == pytest.approx(math.sqrt(2), rel=1e-12)
+    with pytest.raises(ValueError):
+        solve_bracket(lambda x: x * x + 1, 0, 2)
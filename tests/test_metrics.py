@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from agents.metrics import (
+    bandwidth, extract_metrics, harmonic_distortion, midband_gain, phase_margin, supply_power,
+)
+
+FREQUENCY = np.logspace(0, 7, 701)
+
+
+def _band_pass(gain=20.0, low=100.0, high=1e5):
+    s = 1j * FREQUENCY
+    return -gain * (s / low) / (1 + s / low) / (1 + s / high)
+
+
+def test_midband_gain_and_bandwidth_of_a_band_pass():
+    response = _band_pass()
+    assert midband_gain(FREQUENCY, response)["gain"] == pytest.approx(20.0, rel=1e-3)
+    result = bandwidth(FREQUENCY, response)
+    assert result["low_cutoff"] == pytest.approx(100.0, rel=1e-2)
+    assert result["high_cutoff"] == pytest.approx(1e5, rel=1e-2)
+
+
+def test_phase_margin_of_a_two_pole_loop():
+    s = 1j * FREQUENCY
+    loop = 1e3 / (1 + s / 10) / (1 + s / 1e4)
+    result = phase_margin(FREQUENCY, loop)
+    assert result["crossover_frequency"] == pytest.approx(7861, rel=1e-2)
+    assert result["phase_margin"] == pytest.approx(180 - 90 - np.degrees(np.arctan(0.7861)), abs=0.5)
+
+
+def test_harmonic_distortion_on_a_non_uniform_record():
+    time = np.sort(np.concatenate([np.linspace(0, 5e-3, 3001), np.random.default_rng(0).uniform(0, 5e-3, 2000)]))
+    wave = np.sin(2 * np.pi * 1e3 * time) + 0.1 * np.sin(2 * np.pi * 3e3 * time)
+    result = harmonic_distortion(time, wave, 1e3)
+    assert result["thd_percent"] == pytest.approx(10.0, rel=1e-2)
+    assert result["fundamental_amplitude"] == pytest.approx(1.0, rel=1e-2)
+
+
+def test_supply_power_averages_over_time():
+    time = np.linspace(0, 1, 101)
+    assert supply_power(5.0, -1e-3) == pytest.approx(5e-3)
+    assert supply_power(np.full(101, 5.0), -1e-3 * time, time) == pytest.approx(2.5e-3)
+
+
+def test_extract_metrics_needs_a_loop_gain_for_the_phase_margin():
+    s = 1j * FREQUENCY
+    results = {"ac": {"frequency": FREQUENCY.astype(complex), "vout": _band_pass(), "vin": np.ones_like(s),
+                      "loop": 1e3 / (1 + s / 10) / (1 + s / 1e4)}}
+    metrics = extract_metrics(results)
+    assert metrics["voltage_gain"] == pytest.approx(20.0, rel=1e-3)
+    assert "phase_margin" not in metrics and "crossover_frequency" not in metrics
+    assert extract_metrics(results, loop_gain="loop")["phase_margin"] == pytest.approx(51.8, abs=0.5)
+
+
+def test_extract_metrics_on_stacked_results():
+    responses = np.stack([_band_pass(gain) for gain in (5.0, 10.0, 20.0)])
+    metrics = extract_metrics({"ac": {"frequency": FREQUENCY, "vout": responses}})
+    np.testing.assert_allclose(metrics["voltage_gain"], [5.0, 10.0, 20.0], rtol=1e-3)
+    assert metrics["bandwidth"].shape == (3,)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from agents.mna import ac_response, cutoff_frequencies, topology_response
+
+FREQUENCIES = np.logspace(0, 6, 121)
+
+
+def test_rc_low_pass_matches_the_closed_form():
+    elements = [{"name": "R1", "from": "in", "to": "out", "value": 1e3},
+                {"name": "C1", "from": "out", "to": "gnd", "value": 1e-6}]
+    result = ac_response(elements, "in", "out", FREQUENCIES)
+    expected = 1 / (1 + 2j * np.pi * FREQUENCIES * 1e3 * 1e-6)
+    np.testing.assert_allclose(result["response"], expected, rtol=1e-6)
+    cutoffs = cutoff_frequencies(FREQUENCIES, result["magnitude_db"])
+    assert cutoffs["low_cutoff"] == 0.0
+    assert cutoffs["high_cutoff"] == pytest.approx(1 / (2 * np.pi * 1e-3), rel=1e-2)
+
+
+def test_common_source_midband_gain():
+    gm, ro, rd = 2e-3, 50e3, 10e3
+    elements = [
+        {"name": "gm*vgs", "from": "drain", "to": "source", "value": gm},
+        {"name": "rd", "from": "drain", "to": "source", "value": ro},
+        {"name": "Rd", "from": "drain", "to": "vdd", "value": rd},
+        {"name": "Rg", "from": "gate", "to": "gnd", "value": "1000000 Ω"},
+    ]
+    result = topology_response("Common Source", elements, [1e3])
+    assert result["response"][0] == pytest.approx(-gm * (ro * rd / (ro + rd)), rel=1e-6)
+
+
+def test_element_arrays_solve_a_batch():
+    resistances = np.array([1e3, 2e3, 4e3])
+    elements = [{"name": "R1", "from": "in", "to": "out", "value": resistances},
+                {"name": "C1", "from": "out", "to": "gnd", "value": 1e-6}]
+    result = ac_response(elements, "in", "out", FREQUENCIES)
+    assert result["response"].shape == (3, len(FREQUENCIES))
+    high = cutoff_frequencies(FREQUENCIES, result["magnitude_db"])["high_cutoff"]
+    np.testing.assert_allclose(high, 1 / (2 * np.pi * resistances * 1e-6), rtol=1e-2)
+
+
+def test_grounded_output_is_rejected():
+    with pytest.raises(ValueError):
+        ac_response([{"name": "R1", "from": "in", "to": "gnd", "value": 1e3}], "in", "gnd", [1.0])
@@ -0,0 +1,42 @@
+from agents.netlist_cache import extract_netlist
+from agents.netlist_checker import check_netlist
+from agents.netlist_parser import deck_statements, parse_netlist
+
+
+def test_first_line_is_the_title():
+    # Whatever it says: titles starting with an element letter used to parse as devices
+    for title in ("Inverting amplifier circuit", "Voltage divider 12V to 5V", "R1 in 0 1k"):
+        circuit = parse_netlist(f"{title}\nVin in 0 DC 1\nR1 in 0 1k\n.op\n.end")
+        assert circuit.title == title
+        assert circuit.element_names == ["vin", "r1"]
+
+
+def test_title_is_not_checked_as_an_element():
+    check = check_netlist("Voltage divider 12V to 5V\nV1 in 0 DC 12\nR1 in out 7k\nR2 out 0 5k\n.op\n.end")
+    assert check.ok, check.errors
+
+
+def test_title_directive_overrides_the_title_line():
+    circuit = parse_netlist("* Common source stage\n.title Common Source Amplifier\nR1 a 0 1k\n.end")
+    assert circuit.title == "Common Source Amplifier"
+    assert circuit.element_names == ["r1"]
+
+
+def test_fenced_fragment_without_a_title_keeps_its_first_element():
+    text = "Here is the netlist:\n```spice\nR1 in 0 1k\nVin in 0 DC 1\n.end\n```\nDone."
+    title, statements = deck_statements(text)
+    assert title == ""
+    assert [statement for _, statement in statements][:2] == ["R1 in 0 1k", "Vin in 0 DC 1"]
+    assert parse_netlist(text).element_names == ["r1", "vin"]
+
+
+def test_fenced_fragment_with_a_plain_title():
+    circuit = parse_netlist("```\nCommon source amplifier\nVin in 0 DC 1\nR1 in 0 1k\n```")
+    assert circuit.title == "Common source amplifier"
+    assert circuit.element_names == ["vin", "r1"]
+
+
+def test_line_numbers_count_the_title_line():
+    _, statements = deck_statements("title\n\nR1 a 0 1k\n")
+    assert list(statements) == [(3, "R1 a 0 1k")]
+    assert type(extract_netlist("R1 a 0 1k")) is str
@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+
+from agents import ngspice_service
+
+
+def test_reference_deck_joins_the_model_card(reference_netlist):
+    deck = ngspice_service.prepare_deck(reference_netlist)
+    assert deck[0].startswith("*") and deck[-1] == ".end"
+    models = [line for line in deck if line.lower().startswith(".model")]
+    assert models == [".model NMOS NMOS( Level = 1 Vto = 0.7 lambda = 0.02 Kp = 100u W = 10u L = 2u )"]
+    # Every other line is an element or directive, none a stray model parameter or ")"
+    assert all(line[0].lower() in "vrcm.*" for line in deck), deck
+    assert not any(line.lower().startswith((".control", "run", "plot", ".title")) for line in deck)
+
+
+def test_sin_source_gets_an_ac_stimulus(reference_netlist):
+    deck = ngspice_service.prepare_deck(reference_netlist)
+    assert "Vin vin 0 SIN(0 1m 1k) AC 1" in deck
+    assert "Vin vin 0 DC 0 AC 2 SIN(0 1m 1k)" in ngspice_service.prepare_deck("t\nVin vin 0 DC 0 AC 2 SIN(0 1m 1k)\n")
+
+
+def test_title_line_is_replaced_whatever_it_says():
+    deck = ngspice_service.prepare_deck("Voltage divider 12V to 5V\nV1 in 0 DC 12\nR1 in out 7k\nR2 out 0 5k\n.end")
+    assert deck[1:] == ["V1 in 0 DC 12", "R1 in out 7k", "R2 out 0 5k", ".op", ".end"]
+    fragment = ngspice_service.prepare_deck("Netlist:\n```\nV1 in 0 DC 12\nR1 in 0 1k\n```")
+    assert fragment[1:] == ["V1 in 0 DC 12", "R1 in 0 1k", ".op", ".end"]
+
+
+def test_reference_netlist_summary_is_finite(reference_netlist):
+    results = ngspice_service.simulate_netlist(reference_netlist, use_cache=False)
+    summary = ngspice_service.summarize(results)
+    assert np.isfinite(summary["ac"]["midband_gain"]) and summary["ac"]["midband_gain"] > 0
+    assert all(np.isfinite(value) for value in summary["metrics"].values())
+    assert summary["operating_point"]["vgate"] == 2.5
+    json.dumps(summary, allow_nan=False)
+
+
+def test_input_without_ac_stimulus_reports_no_gain():
+    results = ngspice_service.simulate_netlist("t\nVin vin 0 DC 1\nR1 vin vout 1k\nR2 vout 0 1k\n.ac dec 5 1 1k\n.end",
+                                               use_cache=False)
+    summary = ngspice_service.summarize(results)
+    assert "ac" not in summary and "voltage_gain" not in summary["metrics"]
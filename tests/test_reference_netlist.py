@@ -0,0 +1,51 @@
+"""main.py's demo netlist end to end: deck, simulation, summary, metrics and a corner sweep."""
+
+import json
+
+import numpy as np
+import pytest
+
+from agents import ngspice_service
+from agents.metrics import extract_metrics
+from agents.netlist_checker import check_netlist
+from agents.netlist_parser import parse_netlist
+from agents.sweep import corners, run_sweep
+
+
+def test_reference_netlist_parses_and_checks(reference_netlist):
+    circuit = parse_netlist(reference_netlist)
+    assert circuit.title == "Common Source Amplifier"
+    assert circuit.element_names == ["vdd", "vin", "rd", "r1", "r2", "cin", "cout", "m1"]
+    assert circuit.find_model("nmos").params["vto"] == 0.7
+    assert [analysis.kind for analysis in circuit.analyses] == ["op", "ac", "tran"]
+    assert check_netlist(reference_netlist).ok
+
+
+def test_reference_netlist_end_to_end(reference_netlist):
+    deck = ngspice_service.prepare_deck(reference_netlist)
+    results = ngspice_service.simulate_netlist("\n".join(deck), use_cache=False)
+    assert set(results) == {"op", "ac", "tran"}
+
+    summary = ngspice_service.summarize(results)
+    json.dumps(summary, allow_nan=False)
+    metrics = extract_metrics(results)
+    assert summary["metrics"] == metrics
+    assert metrics["voltage_gain"] > 0 and metrics["low_cutoff"] < metrics["high_cutoff"]
+    assert metrics["power_consumption"] == pytest.approx(
+        -results["op"]["vdd"] * results["op"]["vdd#branch"], rel=1e-2)
+    # The 1 ms record holds a single period of the 1 kHz input, too little to find its frequency
+    assert "distortion" not in metrics
+    assert np.isfinite(extract_metrics(results, fundamental=1e3)["distortion"])
+
+
+def test_reference_netlist_supply_corners(reference_netlist):
+    nominal = ngspice_service.simulate_netlist(reference_netlist, [".op", ".ac dec 10 1 1Meg"], use_cache=False)
+    sweep = run_sweep(reference_netlist, {"Vdd": corners(5.0)}, analyses=[".op", ".ac dec 10 1 1Meg"],
+                      max_workers=1, use_cache=False)
+    assert not sweep.failed.any(), sweep.errors
+    vout = sweep.grid("op", "vout")
+    assert vout[1] == pytest.approx(nominal["op"]["vout"])
+    assert len(set(vout.tolist())) == 3
+    gain = sweep.metrics()["voltage_gain"]
+    assert gain[1] == pytest.approx(extract_metrics(nominal)["voltage_gain"])
+    assert np.all(np.isfinite(gain))
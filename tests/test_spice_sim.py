@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from agents.spice_sim import simulate
+
+RC = "rc\nV1 in 0 DC 1 AC 1\nR1 in out 1k\nC1 out 0 1u\n"
+
+
+def test_operating_point_of_a_divider():
+    op = simulate("divider\nV1 in 0 DC 12\nR1 in out 7k\nR2 out 0 5k\n.op\n.end")["op"]
+    assert op["out"] == pytest.approx(5.0)
+    assert op["v1#branch"] == pytest.approx(-1e-3)
+
+
+def test_ac_matches_the_closed_form():
+    ac = simulate(RC + ".ac dec 10 1 1meg\n.end")["ac"]
+    frequency = np.real(ac["frequency"])
+    assert len(frequency) == 61 and frequency[-1] == pytest.approx(1e6)
+    np.testing.assert_allclose(ac["out"], 1 / (1 + 2j * np.pi * frequency * 1e-3), rtol=1e-9)
+
+
+def test_dc_sweep():
+    dc = simulate("divider\nV1 in 0 DC 12\nR1 in out 7k\nR2 out 0 5k\n.dc V1 0 12 3\n.end")["dc"]
+    np.testing.assert_allclose(dc["v-sweep"], [0, 3, 6, 9, 12])
+    np.testing.assert_allclose(dc["out"], np.array([0, 3, 6, 9, 12]) * 5 / 12)
+
+
+def test_uic_starts_from_the_initial_conditions():
+    with_uic = simulate(RC + ".ic v(out)=0\n.tran 10u 5m uic\n.end")["tran"]
+    assert np.interp(1e-3, with_uic["time"], with_uic["out"]) == pytest.approx(1 - np.exp(-1), rel=2e-3)
+    # Without uic the transient starts from the operating point, where C1 is charged
+    without = simulate(RC + ".ic v(out)=0\n.tran 10u 5m\n.end")["tran"]
+    np.testing.assert_allclose(without["out"], 1.0)
+
+
+@pytest.mark.parametrize("directive", [
+    ".tran 1u", ".tran 0 1m", ".tran 1u 1m 2m", ".dc vx 0 5 1", ".dc v1 0 5 0", ".dc v1 0 5 -1", ".dc",
+    ".ac dec 10 0 1meg", ".ac dec 0 1 1meg", ".ac log 10 1 1meg", ".ac dec ten 1 1meg",
+])
+def test_malformed_directives_raise_value_error(directive):
+    with pytest.raises(ValueError):
+        simulate(RC + directive + "\n.end")
+
+
+def test_unsupported_elements_raise_value_error():
+    with pytest.raises(ValueError):
+        simulate("bjt\nV1 c 0 DC 5\nQ1 c b 0 qn\n.model qn NPN\n.op\n.end")
+
+
+def test_transient_step_response_lands_on_the_pulse_edge():
+    tran = simulate("step\nV1 in 0 PULSE(0 1 1m 1n 1n 20m 40m)\nR1 in out 1k\nC1 out 0 1u\n.tran 10u 5m\n.end")["tran"]
+    time, out = tran["time"], tran["out"]
+    assert np.any(np.isclose(time, 1e-3, rtol=0, atol=1e-15))
+    for t in (1.5e-3, 2e-3, 4e-3):
+        assert np.interp(t, time, out) == pytest.approx(1 - np.exp(-(t - 1e-3) / 1e-3), abs=2e-3)
+
+
+def test_transient_steps_grow_once_the_circuit_settles():
+    tran = simulate("step\nV1 in 0 PULSE(0 1 0 1n 1n 1 2)\nR1 in out 1k\nC1 out 0 1u\n.tran 1u 100m\n.end")["tran"]
+    assert tran["time"][-1] == pytest.approx(0.1)
+    # A fixed 1 us step would take 100k points
+    assert len(tran["time"]) < 2000
+    assert tran["out"][-1] == pytest.approx(1.0, abs=1e-3)
+
+
+def test_periodic_steady_state_is_extended_to_the_stop_time():
+    tran = simulate("sine\nV1 in 0 SIN(0 1 1k)\nR1 in out 1k\nC1 out 0 1u\n.tran 10u 50m\n.end")["tran"]
+    time, out = tran["time"], tran["out"]
+    assert time[-1] == pytest.approx(50e-3)
+    last = time > 49e-3
+    amplitude = (out[last].max() - out[last].min()) / 2
+    assert amplitude == pytest.approx(1 / np.hypot(1, 2 * np.pi), rel=2e-2)
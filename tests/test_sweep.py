@@ -0,0 +1,32 @@
+import numpy as np
+
+from agents.netlist_parser import parse_netlist
+from agents.sweep import apply_parameters, run_sweep
+
+
+def test_model_parameter_is_replaced_across_a_multiline_card(reference_netlist):
+    deck = apply_parameters(reference_netlist, {"NMOS.vto": 0.6, "NMOS.gamma": 0.4})
+    models = [line for line in deck.splitlines() if line.lower().startswith(".model")]
+    assert len(models) == 1
+    assert "Vto = 0.6" in models[0] and "0.7" not in models[0] and "gamma=0.4" in models[0]
+    model = parse_netlist(deck).find_model("nmos")
+    assert model.params["vto"] == 0.6 and model.params["gamma"] == 0.4
+
+
+def test_title_line_survives_rewriting(reference_netlist):
+    deck = apply_parameters("Voltage divider 12V to 5V\nV1 in 0 DC 12\nR1 in out 7k\nR2 out 0 5k\n", {"R1": 5e3})
+    assert deck.splitlines() == ["Voltage divider 12V to 5V", "V1 in 0 DC 12", "R1 in out 5000", "R2 out 0 5k"]
+    fragment = apply_parameters("```\nV1 in 0 DC 12\nR1 in 0 1k\n```", {"V1": 5})
+    assert parse_netlist(fragment).element_names == ["v1", "r1"]
+
+
+def test_threshold_sweep_of_the_reference_netlist(reference_netlist):
+    sweep = run_sweep(reference_netlist, {"NMOS.vto": [0.6, 0.7, 0.8]}, analyses=[".op", ".ac dec 10 1 1Meg"],
+                      max_workers=1, use_cache=False)
+    assert not sweep.failed.any(), sweep.errors
+    vout = sweep.grid("op", "vout")
+    # A higher threshold draws less drain current, so the drain sits higher
+    assert np.all(np.diff(vout) > 0)
+    # ... and further out of triode, where the stage has more gain
+    gain = sweep.metrics()["voltage_gain"]
+    assert gain.shape == (3,) and np.all(np.isfinite(gain)) and np.all(np.diff(gain) > 0)